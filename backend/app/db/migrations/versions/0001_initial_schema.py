@@ -0,0 +1,100 @@
+"""Initial schema
+
+The tables as ``Base.metadata.create_all`` created them before migrations
+existed. Databases bootstrapped that way are stamped at this revision by
+``init_db`` and upgraded from here.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:54:31.042404
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('memory_files',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('case_id', sa.String(), nullable=False),
+    sa.Column('filename', sa.String(), nullable=False),
+    sa.Column('stored_path', sa.String(), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_memory_files_case_id'), 'memory_files', ['case_id'], unique=False)
+    op.create_index(op.f('ix_memory_files_id'), 'memory_files', ['id'], unique=False)
+    op.create_index(op.f('ix_memory_files_sha256'), 'memory_files', ['sha256'], unique=False)
+
+    op.create_table('alerts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=False),
+    sa.Column('process_name', sa.String(), nullable=False),
+    sa.Column('pid', sa.Integer(), nullable=False),
+    sa.Column('anomaly_score', sa.Float(), nullable=False),
+    sa.Column('ml_confidence', sa.Float(), nullable=True),
+    sa.Column('label', sa.String(), nullable=False),
+    sa.Column('message', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['file_id'], ['memory_files.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_alerts_file_id'), 'alerts', ['file_id'], unique=False)
+    op.create_index(op.f('ix_alerts_id'), 'alerts', ['id'], unique=False)
+
+    op.create_table('analysis_results',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('summary', sa.String(), nullable=True),
+    sa.Column('volatility_output', sa.JSON(), nullable=True),
+    sa.Column('ml_output', sa.JSON(), nullable=True),
+    sa.Column('dl_output', sa.JSON(), nullable=True),
+    sa.Column('max_anomaly_score', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['file_id'], ['memory_files.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_analysis_results_file_id'), 'analysis_results', ['file_id'], unique=False)
+    op.create_index(op.f('ix_analysis_results_id'), 'analysis_results', ['id'], unique=False)
+
+    op.create_table('chain_of_custody_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=True),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['file_id'], ['memory_files.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_chain_of_custody_logs_file_id'), 'chain_of_custody_logs', ['file_id'], unique=False)
+    op.create_index(op.f('ix_chain_of_custody_logs_id'), 'chain_of_custody_logs', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_chain_of_custody_logs_id'), table_name='chain_of_custody_logs')
+    op.drop_index(op.f('ix_chain_of_custody_logs_file_id'), table_name='chain_of_custody_logs')
+    op.drop_table('chain_of_custody_logs')
+
+    op.drop_index(op.f('ix_analysis_results_id'), table_name='analysis_results')
+    op.drop_index(op.f('ix_analysis_results_file_id'), table_name='analysis_results')
+    op.drop_table('analysis_results')
+
+    op.drop_index(op.f('ix_alerts_id'), table_name='alerts')
+    op.drop_index(op.f('ix_alerts_file_id'), table_name='alerts')
+    op.drop_table('alerts')
+
+    op.drop_index(op.f('ix_memory_files_sha256'), table_name='memory_files')
+    op.drop_index(op.f('ix_memory_files_id'), table_name='memory_files')
+    op.drop_index(op.f('ix_memory_files_case_id'), table_name='memory_files')
+    op.drop_table('memory_files')
@@ -0,0 +1,265 @@
+"""Intake digests, result cache, custody chain, chunked uploads and result tables
+
+- memory_files: MD5/SHA-1 and Merkle tree columns, 64-bit sizes, keyset
+  pagination indexes.
+- alerts: keyset pagination indexes.
+- analysis_results: cache_key.
+- chain_of_custody_logs: hash chain columns. Existing entries are chained
+  per file in insertion order.
+- New tables: custody_checkpoints, upload_sessions, analysis_processes,
+  analysis_connections, analysis_dlls, analysis_handles.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 11:24:20.573389
+"""
+
+import hashlib
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+GENESIS_HASH = "0" * 64
+
+
+def _chain_existing_custody_logs() -> None:
+    # Same digest as app.utils.chain_of_custody.entry_digest, frozen here.
+    logs = sa.table(
+        'chain_of_custody_logs',
+        sa.column('id', sa.Integer),
+        sa.column('file_id', sa.Integer),
+        sa.column('event_type', sa.String),
+        sa.column('description', sa.String),
+        sa.column('created_at', sa.DateTime),
+        sa.column('seq', sa.Integer),
+        sa.column('prev_hash', sa.String),
+        sa.column('entry_hash', sa.String),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(logs.c.id, logs.c.file_id, logs.c.event_type, logs.c.description, logs.c.created_at)
+        .order_by(logs.c.id)
+    )
+    heads = {}
+    updates = []
+    for log_id, file_id, event_type, description, created_at in rows:
+        seq, prev_hash = heads.get(file_id, (0, GENESIS_HASH))
+        seq += 1
+        payload = json.dumps(
+            [file_id, seq, event_type, description, created_at.isoformat()],
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+        entry_hash = hashlib.sha256((prev_hash + payload).encode("utf-8")).hexdigest()
+        heads[file_id] = (seq, entry_hash)
+        updates.append({"log_id": log_id, "seq": seq, "prev_hash": prev_hash, "entry_hash": entry_hash})
+    if updates:
+        connection.execute(
+            logs.update()
+            .where(logs.c.id == sa.bindparam("log_id"))
+            .values(
+                seq=sa.bindparam("seq"),
+                prev_hash=sa.bindparam("prev_hash"),
+                entry_hash=sa.bindparam("entry_hash"),
+            ),
+            updates,
+        )
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('memory_files', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('md5', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('sha1', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('merkle_chunk_size', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('merkle_root', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('merkle_leaves', sa.JSON(), nullable=True))
+        batch_op.alter_column('size_bytes',
+               existing_type=sa.INTEGER(),
+               type_=sa.BigInteger(),
+               existing_nullable=False)
+        batch_op.create_index('ix_memory_files_case_created_id', ['case_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_memory_files_created_id', ['created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.create_index('ix_alerts_created_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_alerts_file_created_id', ['file_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_alerts_label_created_id', ['label', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('analysis_results', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cache_key', sa.String(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_analysis_results_cache_key'), ['cache_key'], unique=False)
+
+    with op.batch_alter_table('chain_of_custody_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('seq', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('prev_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('entry_hash', sa.String(length=64), nullable=True))
+    _chain_existing_custody_logs()
+    with op.batch_alter_table('chain_of_custody_logs', schema=None) as batch_op:
+        batch_op.alter_column('seq', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('prev_hash', existing_type=sa.String(length=64), nullable=False)
+        batch_op.alter_column('entry_hash', existing_type=sa.String(length=64), nullable=False)
+        batch_op.create_index('ux_chain_of_custody_logs_file_seq', ['file_id', 'seq'], unique=True)
+
+    op.create_table('custody_checkpoints',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=True),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('entry_hash', sa.String(length=64), nullable=False),
+    sa.Column('key_id', sa.String(), nullable=False),
+    sa.Column('signature', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['file_id'], ['memory_files.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('custody_checkpoints', schema=None) as batch_op:
+        batch_op.create_index('ix_custody_checkpoints_file_seq', ['file_id', 'seq'], unique=False)
+        batch_op.create_index(batch_op.f('ix_custody_checkpoints_id'), ['id'], unique=False)
+
+    op.create_table('upload_sessions',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('case_id', sa.String(), nullable=False),
+    sa.Column('filename', sa.String(), nullable=False),
+    sa.Column('total_size', sa.BigInteger(), nullable=False),
+    sa.Column('received_ranges', sa.JSON(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['file_id'], ['memory_files.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table('analysis_connections',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('analysis_id', sa.Integer(), nullable=False),
+    sa.Column('pid', sa.Integer(), nullable=True),
+    sa.Column('owner', sa.String(), nullable=True),
+    sa.Column('protocol', sa.String(), nullable=True),
+    sa.Column('local_ip', sa.String(), nullable=True),
+    sa.Column('local_port', sa.Integer(), nullable=True),
+    sa.Column('remote_ip', sa.String(), nullable=True),
+    sa.Column('remote_port', sa.Integer(), nullable=True),
+    sa.Column('state', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['analysis_id'], ['analysis_results.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('analysis_connections', schema=None) as batch_op:
+        batch_op.create_index('ix_analysis_connections_analysis_pid', ['analysis_id', 'pid'], unique=False)
+        batch_op.create_index('ix_analysis_connections_analysis_remote_ip', ['analysis_id', 'remote_ip'], unique=False)
+
+    op.create_table('analysis_dlls',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('analysis_id', sa.Integer(), nullable=False),
+    sa.Column('pid', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('path', sa.String(), nullable=True),
+    sa.Column('base', sa.String(), nullable=True),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.ForeignKeyConstraint(['analysis_id'], ['analysis_results.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('analysis_dlls', schema=None) as batch_op:
+        batch_op.create_index('ix_analysis_dlls_analysis_name', ['analysis_id', 'name'], unique=False)
+        batch_op.create_index('ix_analysis_dlls_analysis_pid', ['analysis_id', 'pid'], unique=False)
+
+    op.create_table('analysis_handles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('analysis_id', sa.Integer(), nullable=False),
+    sa.Column('pid', sa.Integer(), nullable=False),
+    sa.Column('handle_type', sa.String(), nullable=True),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('granted_access', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['analysis_id'], ['analysis_results.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('analysis_handles', schema=None) as batch_op:
+        batch_op.create_index('ix_analysis_handles_analysis_pid', ['analysis_id', 'pid'], unique=False)
+        batch_op.create_index('ix_analysis_handles_analysis_type', ['analysis_id', 'handle_type'], unique=False)
+
+    op.create_table('analysis_processes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('analysis_id', sa.Integer(), nullable=False),
+    sa.Column('pid', sa.Integer(), nullable=False),
+    sa.Column('ppid', sa.Integer(), nullable=True),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('threads', sa.Integer(), nullable=True),
+    sa.Column('dll_count', sa.Integer(), nullable=True),
+    sa.Column('entropy', sa.Float(), nullable=True),
+    sa.Column('suspicious', sa.Boolean(), nullable=False),
+    sa.Column('net_conn_count', sa.Integer(), nullable=True),
+    sa.Column('anomaly_score', sa.Float(), nullable=False),
+    sa.Column('confidence', sa.Float(), nullable=True),
+    sa.Column('label', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['analysis_id'], ['analysis_results.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('analysis_processes', schema=None) as batch_op:
+        batch_op.create_index('ix_analysis_processes_analysis_label_score', ['analysis_id', 'label', 'anomaly_score'], unique=False)
+        batch_op.create_index('ix_analysis_processes_analysis_pid', ['analysis_id', 'pid'], unique=False)
+        batch_op.create_index('ix_analysis_processes_analysis_score', ['analysis_id', 'anomaly_score'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('analysis_processes', schema=None) as batch_op:
+        batch_op.drop_index('ix_analysis_processes_analysis_score')
+        batch_op.drop_index('ix_analysis_processes_analysis_pid')
+        batch_op.drop_index('ix_analysis_processes_analysis_label_score')
+    op.drop_table('analysis_processes')
+
+    with op.batch_alter_table('analysis_handles', schema=None) as batch_op:
+        batch_op.drop_index('ix_analysis_handles_analysis_type')
+        batch_op.drop_index('ix_analysis_handles_analysis_pid')
+    op.drop_table('analysis_handles')
+
+    with op.batch_alter_table('analysis_dlls', schema=None) as batch_op:
+        batch_op.drop_index('ix_analysis_dlls_analysis_pid')
+        batch_op.drop_index('ix_analysis_dlls_analysis_name')
+    op.drop_table('analysis_dlls')
+
+    with op.batch_alter_table('analysis_connections', schema=None) as batch_op:
+        batch_op.drop_index('ix_analysis_connections_analysis_remote_ip')
+        batch_op.drop_index('ix_analysis_connections_analysis_pid')
+    op.drop_table('analysis_connections')
+
+    op.drop_table('upload_sessions')
+
+    with op.batch_alter_table('custody_checkpoints', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_custody_checkpoints_id'))
+        batch_op.drop_index('ix_custody_checkpoints_file_seq')
+    op.drop_table('custody_checkpoints')
+
+    with op.batch_alter_table('chain_of_custody_logs', schema=None) as batch_op:
+        batch_op.drop_index('ux_chain_of_custody_logs_file_seq')
+        batch_op.drop_column('entry_hash')
+        batch_op.drop_column('prev_hash')
+        batch_op.drop_column('seq')
+
+    with op.batch_alter_table('analysis_results', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_analysis_results_cache_key'))
+        batch_op.drop_column('cache_key')
+
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.drop_index('ix_alerts_label_created_id')
+        batch_op.drop_index('ix_alerts_file_created_id')
+        batch_op.drop_index('ix_alerts_created_id')
+
+    with op.batch_alter_table('memory_files', schema=None) as batch_op:
+        batch_op.drop_index('ix_memory_files_created_id')
+        batch_op.drop_index('ix_memory_files_case_created_id')
+        batch_op.alter_column('size_bytes',
+               existing_type=sa.BigInteger(),
+               type_=sa.INTEGER(),
+               existing_nullable=False)
+        batch_op.drop_column('merkle_leaves')
+        batch_op.drop_column('merkle_root')
+        batch_op.drop_column('merkle_chunk_size')
+        batch_op.drop_column('sha1')
+        batch_op.drop_column('md5')
@@ -0,0 +1,27 @@
+"""Analysis stage timings
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:01:03.440157
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('analysis_results', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stage_timings', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('analysis_results', schema=None) as batch_op:
+        batch_op.drop_column('stage_timings')
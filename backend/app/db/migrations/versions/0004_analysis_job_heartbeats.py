@@ -0,0 +1,31 @@
+"""Analysis job heartbeats
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 11:29:07.618665
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('analysis_results', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('worker_id', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_analysis_results_status'), ['status'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('analysis_results', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_analysis_results_status'))
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('worker_id')
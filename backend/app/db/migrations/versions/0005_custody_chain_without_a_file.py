@@ -0,0 +1,27 @@
+"""Custody chain without a file
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 12:02:50.868149
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('chain_of_custody_logs', schema=None) as batch_op:
+        batch_op.create_index('ux_chain_of_custody_logs_system_seq', ['seq'], unique=True, postgresql_where=sa.text('file_id IS NULL'), sqlite_where=sa.text('file_id IS NULL'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('chain_of_custody_logs', schema=None) as batch_op:
+        batch_op.drop_index('ux_chain_of_custody_logs_system_seq', postgresql_where=sa.text('file_id IS NULL'), sqlite_where=sa.text('file_id IS NULL'))
@@ -1,28 +1,180 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import declarative_base
+"""
+Database engine, sessions and schema migrations.
+
+The engine is configured per backend:
+
+- SQLite (the default) switches to WAL on every connection so readers are
+  not blocked by the writer, relaxes fsyncs to ``synchronous=NORMAL`` (safe
+  in WAL mode), waits ``SQLITE_BUSY_TIMEOUT_MS`` for the write lock instead
+  of failing with "database is locked", and memory-maps the file.
+- PostgreSQL (``postgresql+asyncpg://``) uses a sized, pre-pinging
+  connection pool and asyncpg's prepared statement caches. Set
+  ``DB_STATEMENT_CACHE_SIZE=0`` behind a transaction-mode pgbouncer.
+
+The schema is managed by Alembic (``app/db/migrations``); ``init_db``
+upgrades to the latest revision at startup unless ``DB_AUTO_MIGRATE=0``.
+Workers starting together run it one at a time: under an advisory lock on
+PostgreSQL, and inside a ``BEGIN IMMEDIATE`` transaction on SQLite.
+"""
+
+import logging
 import os
+from pathlib import Path
+from typing import Any, Dict
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./forensics.db")
+DB_ECHO = os.getenv("DB_ECHO", "0") in ("1", "true", "True")
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "1") not in ("0", "false", "False")
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# How long a worker waits for another one's startup migration to finish.
+SQLITE_MIGRATION_LOCK_TIMEOUT_MS = int(os.getenv("SQLITE_MIGRATION_LOCK_TIMEOUT_MS", "600000"))
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+
+# Serializes migrations when several API workers start against one database.
+_MIGRATION_LOCK_ID = 0x6D656D66
+
+
+def normalize_url(url: str) -> str:
+    """Map plain ``postgres://`` / ``postgresql://`` URLs to the asyncpg driver."""
+    for prefix in ("postgres://", "postgresql://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:" or database.startswith("file::memory:")
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Keyword arguments for ``create_async_engine`` for the backend of ``url``."""
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        # The sqlite3 module's own busy wait, in seconds.
+        return {"connect_args": {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    if backend == "postgresql":
+        return {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_pre_ping": True,
+            "connect_args": {
+                # asyncpg's statement cache and SQLAlchemy's prepared statement cache.
+                "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+                "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            },
+        }
+    return {}
 
-engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+
+def _sqlite_pragmas(url: str):
+    memory = _is_memory_sqlite(url)
+
+    def on_connect(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            if not memory:
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+            cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+            cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        finally:
+            cursor.close()
+
+    return on_connect
+
+
+def create_engine(url: str = DATABASE_URL) -> AsyncEngine:
+    url = normalize_url(url)
+    new_engine = create_async_engine(url, echo=DB_ECHO, future=True, **engine_options(url))
+    if _is_sqlite(url):
+        event.listen(new_engine.sync_engine, "connect", _sqlite_pragmas(url))
+    return new_engine
+
+
+engine = create_engine()
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
 Base = declarative_base()
 
 
-async def init_db() -> None:
+def import_models() -> None:
     # Lazy import models to register metadata
     from app.models import file as file_model  # noqa
     from app.models import log as log_model  # noqa
+    from app.models import checkpoint as checkpoint_model  # noqa
     from app.models import alert as alert_model  # noqa
     from app.models import analysis as analysis_model  # noqa
+    from app.models import upload as upload_model  # noqa
+    from app.models import process as process_model  # noqa
+    from app.models import network as network_model  # noqa
+    from app.models import dll as dll_model  # noqa
+    from app.models import handle as handle_model  # noqa
+
+
+def alembic_config(url: str = DATABASE_URL):
+    from alembic.config import Config
 
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    config.set_main_option("sqlalchemy.url", normalize_url(url).replace("%", "%%"))
+    return config
+
+
+def run_migrations(connection: Connection, revision: str = "head") -> None:
+    """Upgrade the database behind ``connection`` (a sync connection) to ``revision``."""
+    from alembic import command
+
+    if connection.dialect.name == "postgresql":
+        # Held until the transaction ends; other workers wait, then find nothing to do.
+        connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _MIGRATION_LOCK_ID})
+    elif connection.dialect.name == "sqlite":
+        # Take the write lock before looking at the schema; the driver's own
+        # BEGIN is deferred, so two workers could both see an empty database.
+        connection.exec_driver_sql(f"PRAGMA busy_timeout={SQLITE_MIGRATION_LOCK_TIMEOUT_MS}")
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        connection.exec_driver_sql(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+
+    config = alembic_config()
+    config.attributes["connection"] = connection
+    tables = set(inspect(connection).get_table_names())
+    if "alembic_version" not in tables and "memory_files" in tables:
+        # Created by the old create_all() bootstrap: adopt it as the baseline.
+        logger.warning("Database has no migration history; stamping it at the initial revision.")
+        command.stamp(config, "0001")
+    command.upgrade(config, revision)
+
+
+async def init_db() -> None:
+    if not DB_AUTO_MIGRATE:
+        return
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
 
 
 async def get_session() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
-
-
@@ -0,0 +1,116 @@
+"""
+Printable-string extraction straight from a memory image.
+
+The image is memory-mapped and split into fixed-size chunks that are scanned
+by a pool of worker processes, so it is never read into memory as a whole and
+throughput scales with the number of cores. Each worker scans its chunk plus
+a small look-behind and an overlap into the next chunk; a string belongs to
+the chunk in which it starts, so strings crossing a boundary are reported
+exactly once.
+
+ASCII and UTF-16LE strings are extracted, with their file offsets.
+"""
+
+import mmap
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.concurrency import InlineExecutor, job_cpu_share
+
+STRINGS_MIN_LENGTH = int(os.getenv("STRINGS_MIN_LENGTH", "6"))
+STRINGS_MAX_LENGTH = int(os.getenv("STRINGS_MAX_LENGTH", "1024"))
+STRINGS_CHUNK_SIZE = int(os.getenv("STRINGS_CHUNK_SIZE", str(16 * 1024 * 1024)))
+STRINGS_WORKERS = int(os.getenv("STRINGS_WORKERS", str(job_cpu_share())))
+
+# (file offset, "ascii" | "utf-16le", text)
+ExtractedString = Tuple[int, str, str]
+
+
+def _runs(mask: np.ndarray, min_length: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Start/end indices of runs of True in ``mask`` at least ``min_length`` long."""
+    edges = np.diff(np.concatenate(([False], mask, [False])).view(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    keep = ends - starts >= min_length
+    return starts[keep], ends[keep]
+
+
+def _printable(units: np.ndarray) -> np.ndarray:
+    return ((units >= 0x20) & (units <= 0x7E)) | (units == 0x09)
+
+
+def scan_chunk(
+    path: str, start: int, end: int, min_length: int, max_length: int
+) -> List[ExtractedString]:
+    """Strings that start inside ``[start, end)``. Runs in a worker process."""
+    found: List[ExtractedString] = []
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return found
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # (encoding, code unit width, byte alignment of the first unit)
+            for encoding, unit, align in (("ascii", 1, 0), ("utf-16le", 2, 0), ("utf-16le", 2, 1)):
+                # Starting one code unit early lets a run that began in the
+                # previous chunk be recognised (and skipped) as a whole.
+                window_start = max(0, start - unit) + align
+                window_end = min(size, end + max_length * unit)
+                count = (window_end - window_start) // unit
+                if count <= 0:
+                    continue
+                dtype = np.uint8 if unit == 1 else np.dtype("<u2")
+                units = np.frombuffer(mm, dtype=dtype, count=count, offset=window_start)
+                run_starts, run_ends = _runs(_printable(units), min_length)
+                offsets = window_start + run_starts * unit
+                for offset, run_start, run_end in zip(
+                    offsets.tolist(), run_starts.tolist(), run_ends.tolist()
+                ):
+                    if offset < start or offset >= end:
+                        continue
+                    length = min(run_end - run_start, max_length)
+                    raw = mm[offset : offset + length * unit]
+                    found.append((offset, encoding, raw.decode(encoding)))
+                del units
+    found.sort()
+    return found
+
+
+def iter_string_batches(
+    path: Path,
+    min_length: int = STRINGS_MIN_LENGTH,
+    max_length: int = STRINGS_MAX_LENGTH,
+    chunk_size: int = STRINGS_CHUNK_SIZE,
+    workers: int = STRINGS_WORKERS,
+    executor: Optional[Executor] = None,
+) -> Iterator[List[ExtractedString]]:
+    """
+    Yield one batch of extracted strings per chunk, in file order.
+
+    At most ``2 * workers`` chunks are in flight, so memory stays bounded even
+    when the consumer is slower than the scanners.
+    """
+    size = os.path.getsize(path)
+    ranges = [(s, min(s + chunk_size, size)) for s in range(0, size, chunk_size)]
+    own_executor = executor is None
+    if own_executor:
+        workers = max(1, min(workers, len(ranges) or 1))
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else InlineExecutor()
+    try:
+        pending = deque()
+        next_range = 0
+        while next_range < len(ranges) or pending:
+            while next_range < len(ranges) and len(pending) < 2 * workers:
+                start, end = ranges[next_range]
+                pending.append(
+                    executor.submit(scan_chunk, str(path), start, end, min_length, max_length)
+                )
+                next_range += 1
+            yield pending.popleft().result()
+    finally:
+        if own_executor:
+            executor.shutdown(wait=True, cancel_futures=True)
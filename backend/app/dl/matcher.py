@@ -0,0 +1,132 @@
+"""
+Multi-pattern keyword/IOC matching for the string analysis stage.
+
+Keywords are compiled once into an Aho-Corasick automaton, so scanning costs
+O(text length + matches) regardless of how many keywords there are. The
+C implementation from ``pyahocorasick`` is used when it is installed; the
+pure-Python automaton below is the fallback.
+
+The keyword list comes from ``IOC_KEYWORDS_PATH`` (one keyword per line,
+``#`` starts a comment) or falls back to :data:`DEFAULT_KEYWORDS`. The file is
+re-read when its modification time changes, and compiled automata are cached
+per keyword set.
+"""
+
+import os
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - optional accelerator
+    ahocorasick = None
+
+DEFAULT_KEYWORDS = ("mimikatz", "powershell", "invoke", "encode", "shellcode", "payload")
+
+IOC_KEYWORDS_PATH = os.getenv("IOC_KEYWORDS_PATH")
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over lowercase keywords."""
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        self.keywords: FrozenSet[str] = frozenset(k.lower() for k in keywords if k)
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                self._automaton.add_word(keyword, keyword)
+            if self.keywords:
+                self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            self._build()
+
+    def _build(self) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Tuple[str, ...]] = [()]
+        for keyword in self.keywords:
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            out[state] = out[state] + (keyword,)
+
+        # Breadth-first pass to compute failure links and merge outputs.
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield ``(end_index, keyword)`` for every occurrence in lowercase ``text``."""
+        if not self.keywords:
+            return
+        if self._automaton is not None:
+            yield from self._automaton.iter(text)
+            return
+
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for keyword in out[state]:
+                    yield i, keyword
+
+
+@lru_cache(maxsize=8)
+def compile_matcher(keywords: FrozenSet[str]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+
+def load_keywords(path: Path) -> FrozenSet[str]:
+    keywords = set()
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip().lower()
+        if line:
+            keywords.add(line)
+    return frozenset(keywords)
+
+
+_keyword_cache: Dict[str, object] = {"path": None, "mtime": None, "keywords": frozenset()}
+
+
+def current_keywords(path: Optional[str] = IOC_KEYWORDS_PATH) -> FrozenSet[str]:
+    """Configured keyword set, re-read from ``path`` whenever the file changes."""
+    if not path:
+        return frozenset(DEFAULT_KEYWORDS)
+    mtime = os.stat(path).st_mtime_ns
+    if path != _keyword_cache["path"] or mtime != _keyword_cache["mtime"]:
+        _keyword_cache["keywords"] = load_keywords(Path(path))
+        _keyword_cache["path"] = path
+        _keyword_cache["mtime"] = mtime
+    return _keyword_cache["keywords"]
+
+
+def reload_keywords() -> None:
+    """Force the keyword file to be re-read on next use."""
+    _keyword_cache["mtime"] = None
+
+
+def get_matcher(keywords: Optional[Iterable[str]] = None) -> KeywordMatcher:
+    if keywords is None:
+        keywords = current_keywords()
+    return compile_matcher(frozenset(k.lower() for k in keywords))
@@ -1,31 +1,117 @@
-from typing import Any, Dict, List
+import heapq
+from bisect import bisect_right
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Sequence
 
-import numpy as np
+from app.dl.matcher import KeywordMatcher, get_matcher
 
+DEFAULT_BATCH_SIZE = 10_000
+DEFAULT_TOP_N = 100
 
-def analyze_strings(strings: List[str]) -> Dict[str, Any]:
-    """
-    Placeholder for a BERT/LSTM-based text-analysis model.
+# Never appears in a keyword, so no match can span two joined strings.
+_SEPARATOR = "\x00"
 
-    For now we compute a simple heuristic score based on the presence of
-    suspicious keywords that often show up in malware or C2 traffic.
+
+class StringAnalyzer:
+    """
+    Incremental form of :func:`analyze_strings`: feed batches of strings as
+    they are produced and call :meth:`result` at the end. Memory is bounded
+    by the batch size plus the ``top_n`` highest-scoring hits.
     """
-    if not strings:
-        return {"dl_score": 0.0, "details": []}
 
-    keywords = ["mimikatz", "powershell", "invoke", "encode", "shellcode", "payload"]
-    scores = []
-    details = []
+    def __init__(self, matcher: Optional[KeywordMatcher] = None, top_n: int = DEFAULT_TOP_N) -> None:
+        self.matcher = matcher or get_matcher()
+        self.top_n = top_n
+        self.scanned = 0
+        self.matched = 0
+        self.score_sum = 0.0
+        self.keyword_counts: Dict[str, int] = {}
+        self._top: List[tuple] = []  # min-heap of (score, -seq, detail)
+
+    def feed(
+        self,
+        strings: List[str],
+        source: Optional[str] = None,
+        offsets: Optional[Sequence[int]] = None,
+        encodings: Optional[Sequence[str]] = None,
+    ) -> None:
+        """
+        Score one batch. ``source`` and the optional per-string ``offsets`` /
+        ``encodings`` are recorded in the details of hits only.
+        """
+        if not strings:
+            return
+        # One automaton pass per batch instead of per string. Offsets come
+        # from the lowered strings: lower() can change the length ("İ").
+        lowered = [s.lower() for s in strings]
+        starts: List[int] = []
+        pos = 0
+        for s in lowered:
+            starts.append(pos)
+            pos += len(s) + 1
+        text = _SEPARATOR.join(lowered)
 
-    for s in strings:
-        lower = s.lower()
-        hits = [k for k in keywords if k in lower]
-        score = min(1.0, len(hits) * 0.25)
-        scores.append(score)
-        details.append({"text": s[:200], "score": score, "keywords": hits})
+        hits: Dict[int, set] = {}
+        for end, keyword in self.matcher.iter_matches(text):
+            hits.setdefault(bisect_right(starts, end) - 1, set()).add(keyword)
 
-    avg_score = float(np.mean(scores))
-    return {"dl_score": avg_score, "details": details}
+        for idx, keywords in hits.items():
+            score = min(1.0, len(keywords) * 0.25)
+            self.score_sum += score
+            for k in keywords:
+                self.keyword_counts[k] = self.keyword_counts.get(k, 0) + 1
+            detail = {"text": strings[idx][:200], "score": score, "keywords": sorted(keywords)}
+            if source is not None:
+                detail["source"] = source
+            if offsets is not None:
+                detail["offset"] = offsets[idx]
+            if encodings is not None:
+                detail["encoding"] = encodings[idx]
+            entry = (score, -(self.scanned + idx), detail)
+            if len(self._top) < self.top_n:
+                heapq.heappush(self._top, entry)
+            elif entry[:2] > self._top[0][:2]:
+                heapq.heapreplace(self._top, entry)
 
+        self.matched += len(hits)
+        self.scanned += len(strings)
 
+    def result(self) -> Dict[str, Any]:
+        """
+        ``dl_score`` averages over every string scanned; ``top_score`` is the
+        mean score of the kept hits only, which does not shrink as the number
+        of benign strings grows.
+        """
+        details = [entry[2] for entry in sorted(self._top, key=lambda e: e[:2], reverse=True)]
+        return {
+            "dl_score": self.score_sum / self.scanned if self.scanned else 0.0,
+            "top_score": sum(d["score"] for d in details) / len(details) if details else 0.0,
+            "details": details,
+            "strings_scanned": self.scanned,
+            "strings_matched": self.matched,
+            "keyword_counts": self.keyword_counts,
+        }
 
+
+def analyze_strings(
+    strings: Iterable[str],
+    keywords: Optional[Iterable[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    top_n: int = DEFAULT_TOP_N,
+) -> Dict[str, Any]:
+    """
+    Placeholder for a BERT/LSTM-based text-analysis model.
+
+    For now we compute a simple heuristic score based on the presence of
+    suspicious keywords that often show up in malware or C2 traffic. Strings
+    are matched in batches against a cached Aho-Corasick automaton, and only
+    the ``top_n`` highest-scoring hits are kept in ``details``.
+    """
+    analyzer = StringAnalyzer(get_matcher(keywords), top_n=top_n)
+    it = iter(strings)
+    while True:
+        batch = list(islice(it, batch_size))
+        if not batch:
+            break
+        analyzer.feed(batch)
+    return analyzer.result()
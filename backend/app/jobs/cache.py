@@ -0,0 +1,51 @@
+import hashlib
+import json
+from typing import Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dl.matcher import current_keywords
+from app.jobs.pipeline import EXTRACT_IMAGE_STRINGS
+from app.ml.registry import current_model_version
+from app.models.analysis import AnalysisResult
+from app.volatility.service import DEFAULT_PLUGINS
+
+
+def analysis_cache_key(
+    sha256: str,
+    plugins: Sequence[str] = DEFAULT_PLUGINS,
+    model_version: Optional[str] = None,
+) -> str:
+    """
+    Stable key for everything that determines an analysis result: the image,
+    the plugins, the model version, the keyword/IOC set the strings are
+    matched against and whether image strings are scanned at all.
+    """
+    model_version = model_version or current_model_version()
+    keywords = hashlib.sha256("\n".join(sorted(current_keywords())).encode("utf-8")).hexdigest()
+    payload = json.dumps(
+        {
+            "sha256": sha256,
+            "plugins": sorted(plugins),
+            "model_version": model_version,
+            "keywords": keywords,
+            "image_strings": EXTRACT_IMAGE_STRINGS,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def find_cached_analysis(
+    session: AsyncSession, cache_key: str, file_id: int
+) -> Optional[AnalysisResult]:
+    """Latest completed result for ``cache_key``, preferring one already recorded for ``file_id``."""
+    stmt = (
+        select(AnalysisResult)
+        .where(AnalysisResult.cache_key == cache_key, AnalysisResult.status == "completed")
+        .order_by((AnalysisResult.file_id == file_id).desc(), AnalysisResult.created_at.desc())
+        .limit(1)
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
@@ -0,0 +1,116 @@
+import os
+import time
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from app.jobs.progress import emit
+from app.utils.metrics import StageTimer
+from app.volatility.service import run_volatility_plugins
+
+EXTRACT_IMAGE_STRINGS = os.getenv("EXTRACT_IMAGE_STRINGS", "1") not in ("0", "false", "False")
+
+
+@contextmanager
+def _stage(timer: StageTimer, job_id: Optional[int], name: str) -> Iterator[None]:
+    emit(job_id, "stage_started", stage=name)
+    with timer.stage(name) as stage:
+        yield
+    emit(job_id, "stage_finished", stage=name, seconds=round(stage.seconds, 3))
+
+
+def score_strings(dump_path: str, volatility_output: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the DL string model over the cmdlines and, unless disabled, every
+    printable string in the image.
+
+    Image strings are scored on their own under ``image_strings``, from the
+    hits only (``top_score``): averaged together with a handful of cmdlines,
+    the millions of benign strings in an image would drown every hit. The
+    top-level ``dl_score`` is the higher of ``cmdline_score`` and the image
+    score.
+    """
+    from app.dl.extract import iter_string_batches
+    from app.dl.text_model import StringAnalyzer
+
+    analyzer = StringAnalyzer()
+    cmd_strings = [c.get("cmdline", "") for c in volatility_output.get("cmdline", []) if c]
+    analyzer.feed(cmd_strings, source="cmdline")
+    dl_output = analyzer.result()
+    dl_output["cmdline_score"] = dl_output["dl_score"]
+    if EXTRACT_IMAGE_STRINGS:
+        image_analyzer = StringAnalyzer(analyzer.matcher)
+        for batch in iter_string_batches(Path(dump_path)):
+            offsets, encodings, texts = zip(*batch) if batch else ((), (), ())
+            image_analyzer.feed(list(texts), source="image", offsets=offsets, encodings=encodings)
+        image_strings = image_analyzer.result()
+        image_strings["dl_score"] = image_strings["top_score"]
+        dl_output["image_strings"] = image_strings
+        dl_output["dl_score"] = max(dl_output["dl_score"], image_strings["dl_score"])
+    return dl_output
+
+
+def run_analysis_pipeline(
+    dump_path: str, model_version: Optional[str] = None, job_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    CPU-bound part of an analysis: Volatility, the ML process model and the
+    DL string model. Runs inside a worker process, so it must stay a
+    module-level function that takes and returns picklable values.
+
+    Stage durations (seconds) are returned under ``timings`` together with
+    the wall-clock ``started_at``, so the caller can derive the queue wait.
+    Progress (stages, plugins, processes scored) is reported for ``job_id``.
+    """
+    # NumPy, pandas and scikit-learn load in the worker on first use (or in
+    # warm_up_worker), so importing this module from the API stays cheap.
+    from app.ml.entropy import apply_entropy_features, compute_entropy_features
+    from app.ml.pipeline import run_ml_pipeline
+
+    started_at = time.time()
+    timer = StageTimer()
+    with _stage(timer, job_id, "volatility"):
+        volatility_output = run_volatility_plugins(Path(dump_path), on_progress=partial(emit, job_id))
+
+    # Measure entropy from the image (regions reported by malfind/dlllist)
+    # instead of trusting plugin-provided values.
+    with _stage(timer, job_id, "entropy"):
+        entropy = compute_entropy_features(Path(dump_path), volatility_output)
+        apply_entropy_features(volatility_output, entropy)
+        volatility_output["entropy"] = entropy
+
+    with _stage(timer, job_id, "ml"):
+        ml_output = run_ml_pipeline(volatility_output, model_version=model_version)
+    processes = ml_output.get("processes") or []
+    emit(
+        job_id,
+        "processes_scored",
+        count=len(processes),
+        malicious=sum(1 for p in processes if p.get("label") == "malicious"),
+        max_anomaly_score=ml_output.get("max_anomaly_score", 0.0),
+    )
+
+    with _stage(timer, job_id, "strings"):
+        dl_output = score_strings(dump_path, volatility_output)
+
+    emit(job_id, "pipeline_finished", timings={k: round(v, 3) for k, v in timer.timings.items()})
+    return {
+        "volatility_output": volatility_output,
+        "ml_output": ml_output,
+        "dl_output": dl_output,
+        "timings": timer.timings,
+        "started_at": started_at,
+    }
+
+
+def warm_up_worker(model_version: Optional[str] = None) -> None:
+    """Import the analysis libraries and load the model in a worker process."""
+    import pandas  # noqa: F401
+
+    import app.dl.extract  # noqa: F401
+    import app.ml.entropy  # noqa: F401
+    from app.ml.pipeline import run_ml_pipeline  # noqa: F401
+    from app.ml.registry import get_model
+
+    get_model(model_version)
@@ -0,0 +1,143 @@
+"""
+Live progress events of analysis jobs.
+
+Analyses run in the job queue's worker processes. They report progress with
+:func:`emit`, which puts ``(job_id, event, data)`` on a multiprocessing
+queue handed to every worker when the pool starts. A reader thread in the
+API process forwards those events to the event loop. There,
+:class:`ProgressBroker` numbers each event, keeps a short per-job history so
+late subscribers can catch up, and fans events out to subscribers (the SSE
+and WebSocket endpoints). The API side publishes its own events (status
+changes, alerts, completion) directly.
+
+Events live in the API process that runs the job. Streams served by another
+worker fall back to the job status in the database.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+PROGRESS_HISTORY = int(os.getenv("PROGRESS_HISTORY", "2000"))
+PROGRESS_RETENTION = float(os.getenv("PROGRESS_RETENTION", "300"))
+PROGRESS_SUBSCRIBER_BUFFER = int(os.getenv("PROGRESS_SUBSCRIBER_BUFFER", "10000"))
+
+TERMINAL_EVENTS = ("completed", "failed")
+
+# Set in worker processes by init_worker.
+_worker_queue = None
+
+
+def init_worker(queue) -> None:
+    """``ProcessPoolExecutor`` initializer: remember the progress queue."""
+    global _worker_queue
+    _worker_queue = queue
+
+
+def emit(job_id: Optional[int], event: str, **data: Any) -> None:
+    """Report progress from a worker. A no-op outside the job queue's pool."""
+    if _worker_queue is None or job_id is None:
+        return
+    try:
+        _worker_queue.put_nowait((job_id, event, data))
+    except Exception:  # noqa: BLE001 - progress must never fail an analysis
+        pass
+
+
+class ProgressBroker:
+    def __init__(self, history: int = PROGRESS_HISTORY, retention: float = PROGRESS_RETENTION) -> None:
+        self.history_limit = history
+        self.retention = retention
+        self._history: Dict[int, List[Dict[str, Any]]] = {}
+        self._seq: Dict[int, int] = {}
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._waiters: Dict[Tuple[int, str], List[asyncio.Future]] = {}
+        self._reader: Optional[threading.Thread] = None
+
+    def publish(self, job_id: int, event: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Record and deliver an event. Must be called on the event loop."""
+        seq = self._seq.get(job_id, 0) + 1
+        self._seq[job_id] = seq
+        message = {"id": seq, "job_id": job_id, "event": event, "time": time.time(), "data": data or {}}
+
+        history = self._history.setdefault(job_id, [])
+        if len(history) < self.history_limit or event in TERMINAL_EVENTS:
+            history.append(message)
+        for queue in self._subscribers.get(job_id, ()):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                pass  # A stalled client misses events; it still gets the terminal one on reconnect.
+        for future in self._waiters.pop((job_id, event), ()):
+            if not future.done():
+                future.set_result(message)
+        if event in TERMINAL_EVENTS:
+            asyncio.get_running_loop().call_later(self.retention, self._forget, job_id)
+        return message
+
+    def _forget(self, job_id: int) -> None:
+        history = self._history.get(job_id)
+        if history and history[-1]["event"] in TERMINAL_EVENTS and not self._subscribers.get(job_id):
+            self._history.pop(job_id, None)
+            self._seq.pop(job_id, None)
+
+    def history(self, job_id: int) -> List[Dict[str, Any]]:
+        return list(self._history.get(job_id, ()))
+
+    @asynccontextmanager
+    async def subscribe(self, job_id: int) -> AsyncIterator[Tuple[List[Dict[str, Any]], asyncio.Queue]]:
+        """The events so far and a queue receiving every later one."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=PROGRESS_SUBSCRIBER_BUFFER)
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        try:
+            yield self.history(job_id), queue
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+    async def wait_for(self, job_id: int, event: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait until ``event`` was published for ``job_id``, or ``timeout`` passes."""
+        for message in self._history.get(job_id, ()):
+            if message["event"] == event:
+                return message
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault((job_id, event), []).append(future)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._waiters.get((job_id, event))
+            if waiters and future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self._waiters[(job_id, event)]
+
+    def start_reader(self, queue, loop: asyncio.AbstractEventLoop) -> None:
+        """Forward events from the workers' queue to the loop, in a daemon thread."""
+
+        def run() -> None:
+            while True:
+                try:
+                    item = queue.get()
+                except (EOFError, OSError):
+                    return
+                if item is None:
+                    return
+                job_id, event, data = item
+                try:
+                    loop.call_soon_threadsafe(self.publish, job_id, event, data)
+                except RuntimeError:  # loop closed
+                    return
+
+        self._reader = threading.Thread(target=run, name="progress-reader", daemon=True)
+        self._reader.start()
+
+
+broker = ProgressBroker()
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import func, select, update
+
+from app.db.session import AsyncSessionLocal
+from app.jobs.pipeline import run_analysis_pipeline, warm_up_worker
+from app.jobs.progress import broker, init_worker
+from app.jobs.results import store_results
+from app.models.analysis import AnalysisResult
+from app.utils.concurrency import ANALYSIS_WORKERS
+from app.utils.metrics import ANALYSES, observe_stages
+
+ANALYSIS_QUEUE_DEPTH = int(os.getenv("ANALYSIS_QUEUE_DEPTH", "16"))
+# "spawn" keeps workers independent of the server's threads and event loop.
+ANALYSIS_START_METHOD = os.getenv("ANALYSIS_START_METHOD", "spawn")
+# Each server process marks its queued/running jobs every interval; jobs not
+# marked for the timeout belong to a process that died and are failed.
+ANALYSIS_HEARTBEAT_INTERVAL = float(os.getenv("ANALYSIS_HEARTBEAT_INTERVAL", "15"))
+ANALYSIS_HEARTBEAT_TIMEOUT = float(os.getenv("ANALYSIS_HEARTBEAT_TIMEOUT", "90"))
+PROGRESS_DRAIN_TIMEOUT = 5.0
+ACTIVE_STATUSES = ("queued", "running")
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class AnalysisJobQueue:
+    """
+    Runs analyses in a bounded process pool so the event loop never blocks
+    on Volatility or the models.
+
+    ``max_depth`` caps queued plus running jobs; beyond that :meth:`submit`
+    raises :class:`QueueFullError` instead of growing an unbounded backlog.
+    Job state is persisted on ``AnalysisResult.status`` as
+    queued -> running -> completed / failed, and progress events are
+    published on :data:`app.jobs.progress.broker`. A job is "running" only
+    once a pool slot is free for it.
+
+    Jobs carry the queue's ``worker_id``; :meth:`start` keeps their
+    ``heartbeat_at`` fresh, so other server processes sharing the database
+    can tell live jobs from those of a process that died.
+    """
+
+    def __init__(self, max_workers: int = ANALYSIS_WORKERS, max_depth: int = ANALYSIS_QUEUE_DEPTH) -> None:
+        self.max_workers = max_workers
+        self.max_depth = max_depth
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._progress = None
+        self._slots = asyncio.Semaphore(max_workers)
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._tasks)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            context = multiprocessing.get_context(ANALYSIS_START_METHOD)
+            # Handed to every worker at start; a thread here forwards its events.
+            self._progress = context.Queue()
+            broker.start_reader(self._progress, asyncio.get_running_loop())
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=init_worker,
+                initargs=(self._progress,),
+            )
+        return self._executor
+
+    def submit(
+        self, analysis_id: int, file_id: int, dump_path: str, model_version: Optional[str] = None
+    ) -> None:
+        if self.depth >= self.max_depth:
+            raise QueueFullError(f"Analysis queue is full ({self.max_depth} jobs).")
+        broker.publish(analysis_id, "queued", {"file_id": file_id})
+        task = asyncio.create_task(self._run(analysis_id, file_id, dump_path, model_version))
+        self._tasks[analysis_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(analysis_id, None))
+
+    def start(self) -> None:
+        """Start the heartbeat, which also fails jobs abandoned by dead processes."""
+        if self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(self._beat())
+
+    async def _beat(self) -> None:
+        while True:
+            try:
+                if self._tasks:
+                    await heartbeat_jobs(self.worker_id)
+                await fail_interrupted_jobs()
+            except Exception:  # noqa: BLE001
+                logger.exception("Analysis job heartbeat failed.")
+            await asyncio.sleep(ANALYSIS_HEARTBEAT_INTERVAL)
+
+    async def warm_up(self, model_version: Optional[str] = None) -> None:
+        """Start every worker and have it import the pipeline and load the model."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(
+            *(loop.run_in_executor(executor, warm_up_worker, model_version) for _ in range(self.max_workers))
+        )
+
+    async def _set_status(self, analysis_id: int, status: str, summary: Optional[str] = None) -> None:
+        values = {"status": status}
+        if summary is not None:
+            values["summary"] = summary
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(AnalysisResult).where(AnalysisResult.id == analysis_id).values(**values)
+            )
+            await session.commit()
+
+    async def _run(
+        self, analysis_id: int, file_id: int, dump_path: str, model_version: Optional[str]
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        submitted_at = time.time()
+        try:
+            async with self._slots:
+                await self._set_status(analysis_id, "running")
+                broker.publish(analysis_id, "running")
+                outputs = await loop.run_in_executor(
+                    self._get_executor(), run_analysis_pipeline, dump_path, model_version, analysis_id
+                )
+            # Worker events travel on their own queue; let them arrive first.
+            await broker.wait_for(analysis_id, "pipeline_finished", timeout=PROGRESS_DRAIN_TIMEOUT)
+            timings = {"queue_wait": max(0.0, outputs.pop("started_at") - submitted_at)}
+            timings.update(outputs.pop("timings"))
+            timings = await store_results(analysis_id, file_id, outputs, timings)
+        except Exception as exc:  # noqa: BLE001
+            ANALYSES.inc(status="failed")
+            summary = f"Analysis failed: {exc}"
+            await self._set_status(analysis_id, "failed", summary=summary)
+            broker.publish(analysis_id, "failed", {"status": "failed", "summary": summary})
+            return
+        ANALYSES.inc(status="completed")
+        observe_stages("analysis", timings)
+
+    async def shutdown(self) -> None:
+        tasks = list(self._tasks.values())
+        if self._heartbeat is not None:
+            tasks.append(self._heartbeat)
+            self._heartbeat = None
+        for task in tasks:
+            task.cancel()
+        # Let them unwind (and return their DB connections) before the pool goes.
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._progress.put(None)  # stops the reader thread
+            self._progress = None
+
+
+async def heartbeat_jobs(worker_id: str) -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(AnalysisResult)
+            .where(AnalysisResult.worker_id == worker_id, AnalysisResult.status.in_(ACTIVE_STATUSES))
+            .values(heartbeat_at=datetime.utcnow())
+        )
+        await session.commit()
+
+
+async def fail_interrupted_jobs(timeout: float = ANALYSIS_HEARTBEAT_TIMEOUT) -> None:
+    """
+    Jobs whose server process stopped will never finish. Only jobs without a
+    heartbeat for ``timeout`` seconds are failed; those of live processes,
+    including other workers sharing the database, are left alone.
+    """
+    stale_before = datetime.utcnow() - timedelta(seconds=timeout)
+    async with AsyncSessionLocal() as session:
+        # Read first (on the status index), so an idle server never writes.
+        stale = (
+            await session.scalars(
+                select(AnalysisResult.id).where(
+                    AnalysisResult.status.in_(ACTIVE_STATUSES),
+                    func.coalesce(AnalysisResult.heartbeat_at, AnalysisResult.created_at) < stale_before,
+                )
+            )
+        ).all()
+        if not stale:
+            return
+        await session.execute(
+            update(AnalysisResult)
+            .where(AnalysisResult.id.in_(stale), AnalysisResult.status.in_(ACTIVE_STATUSES))
+            .values(status="failed", summary="Analysis interrupted by server restart.")
+        )
+        await session.commit()
+
+
+job_queue = AnalysisJobQueue()
@@ -0,0 +1,167 @@
+"""
+Normalized per-process rows of an analysis.
+
+Only summaries of the pipeline output are kept as JSON on ``AnalysisResult``;
+the processes, connections, DLLs and handles are stored here, in indexed
+tables, so queries over them never have to load and parse a large blob.
+"""
+
+from typing import Any, Dict, List, Optional, Type
+
+from sqlalchemy import insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.dll import DllRecord
+from app.models.handle import HandleRecord
+from app.models.network import NetworkConnection
+from app.models.process import ProcessRecord
+
+RECORD_MODELS = (ProcessRecord, NetworkConnection, DllRecord, HandleRecord)
+
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _hex(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return hex(value) if isinstance(value, int) else str(value)
+
+
+def process_rows(analysis_id: int, ml_output: Dict[str, Any]) -> List[Dict[str, Any]]:
+    rows = []
+    for p in ml_output.get("processes") or []:
+        features = p.get("features") or {}
+        rows.append(
+            {
+                "analysis_id": analysis_id,
+                "pid": p["pid"],
+                "ppid": p.get("ppid"),
+                "name": p.get("name"),
+                "threads": _int(features.get("threads")),
+                "dll_count": _int(features.get("dll_count")),
+                "entropy": features.get("entropy"),
+                "suspicious": bool(features.get("suspicious_flag")),
+                "net_conn_count": _int(features.get("net_conn_count")),
+                "anomaly_score": p["anomaly_score"],
+                "confidence": p.get("confidence"),
+                "label": p["label"],
+            }
+        )
+    return rows
+
+
+def process_prediction(record: ProcessRecord) -> Dict[str, Any]:
+    """A stored process in the shape of an ``ml_output`` prediction."""
+    return {
+        "pid": record.pid,
+        "ppid": record.ppid,
+        "name": record.name,
+        "anomaly_score": record.anomaly_score,
+        "confidence": record.confidence,
+        "label": record.label,
+        "features": {
+            "pid": record.pid,
+            "ppid": record.ppid,
+            "name": record.name,
+            "threads": record.threads,
+            "dll_count": record.dll_count,
+            "suspicious_flag": int(record.suspicious),
+            "entropy": record.entropy,
+            "net_conn_count": record.net_conn_count,
+        },
+    }
+
+
+async def load_process_predictions(session: AsyncSession, analysis_id: int) -> List[Dict[str, Any]]:
+    """The scored processes of an analysis, in pipeline order."""
+    records = await session.scalars(
+        select(ProcessRecord).where(ProcessRecord.analysis_id == analysis_id).order_by(ProcessRecord.id)
+    )
+    return [process_prediction(r) for r in records]
+
+
+def connection_rows(analysis_id: int, volatility_output: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "analysis_id": analysis_id,
+            "pid": _int(c.get("pid")),
+            "owner": c.get("owner"),
+            "protocol": c.get("protocol"),
+            "local_ip": c.get("local_ip"),
+            "local_port": _int(c.get("local_port")),
+            "remote_ip": c.get("remote_ip"),
+            "remote_port": _int(c.get("remote_port")),
+            "state": c.get("state"),
+        }
+        for c in volatility_output.get("netscan") or []
+    ]
+
+
+def dll_rows(analysis_id: int, volatility_output: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "analysis_id": analysis_id,
+            "pid": int(d["pid"]),
+            "name": d.get("name"),
+            "path": d.get("path"),
+            "base": _hex(d.get("base")),
+            "size": _int(d.get("size")),
+        }
+        for d in volatility_output.get("dlllist") or []
+        if d.get("pid") is not None
+    ]
+
+
+def handle_rows(analysis_id: int, volatility_output: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "analysis_id": analysis_id,
+            "pid": int(h["pid"]),
+            "handle_type": h.get("type"),
+            "name": h.get("name"),
+            "granted_access": _hex(h.get("granted_access")),
+        }
+        for h in volatility_output.get("handles") or []
+        if h.get("pid") is not None
+    ]
+
+
+async def insert_records(
+    session: AsyncSession,
+    analysis_id: int,
+    volatility_output: Dict[str, Any],
+    ml_output: Dict[str, Any],
+) -> None:
+    """Bulk-insert the normalized rows of one analysis. The caller commits."""
+    batches = (
+        (ProcessRecord, process_rows(analysis_id, ml_output)),
+        (NetworkConnection, connection_rows(analysis_id, volatility_output)),
+        (DllRecord, dll_rows(analysis_id, volatility_output)),
+        (HandleRecord, handle_rows(analysis_id, volatility_output)),
+    )
+    for model, rows in batches:
+        if rows:
+            # A list of parameter dicts is sent as one executemany.
+            await session.execute(insert(model), rows)
+
+
+def _copy_statement(model: Type, source_id: int, target_id: int):
+    columns = [c.name for c in model.__table__.columns if c.name not in ("id", "analysis_id")]
+    table = model.__table__
+    return insert(model).from_select(
+        ["analysis_id", *columns],
+        select(literal(target_id), *(table.c[name] for name in columns)).where(
+            table.c.analysis_id == source_id
+        ),
+    )
+
+
+async def copy_records(session: AsyncSession, source_id: int, target_id: int) -> None:
+    """Duplicate another analysis's rows server-side (INSERT ... SELECT). The caller commits."""
+    for model in RECORD_MODELS:
+        await session.execute(_copy_statement(model, source_id, target_id))
@@ -0,0 +1,180 @@
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import AsyncSessionLocal
+from app.jobs.progress import broker
+from app.jobs.records import copy_records, insert_records, load_process_predictions
+from app.models.alert import Alert
+from app.models.analysis import AnalysisResult
+from app.utils.chain_of_custody import CustodyLogger
+from app.utils.metrics import ALERTS_RAISED, PROCESSES_SCORED, StageTimer
+
+
+def alert_rows(file_id: int, ml_output: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # ALERT LOGIC: anomaly_score > 0.7 OR prediction_label == 'malicious'
+    proc_preds: List[dict] = ml_output.get("processes") or []
+    return [
+        {
+            "file_id": file_id,
+            "process_name": p["name"],
+            "pid": p["pid"],
+            "anomaly_score": p["anomaly_score"],
+            "ml_confidence": p["confidence"],
+            "label": p["label"],
+            "message": f"Malicious or anomalous process detected: {p['name']} (PID {p['pid']})",
+        }
+        for p in proc_preds
+        if p["anomaly_score"] > 0.7 or p["label"] == "malicious"
+    ]
+
+
+def volatility_summary(volatility_output: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    What is kept of the Volatility output on the result: plugin status, the
+    image entropy profile and a row count per plugin. The rows themselves
+    live in the normalized tables (see :mod:`app.jobs.records`).
+    """
+    summary = {
+        key: value
+        for key, value in volatility_output.items()
+        if not isinstance(value, list) and key != "entropy"
+    }
+    summary["counts"] = {key: len(value) for key, value in volatility_output.items() if isinstance(value, list)}
+    entropy = volatility_output.get("entropy")
+    if entropy is not None:
+        summary["entropy"] = {"image": entropy.get("image") or {}, "regions": len(entropy.get("regions") or [])}
+    return summary
+
+
+def ml_summary(ml_output: Dict[str, Any]) -> Dict[str, Any]:
+    """``ml_output`` without its process list, which is stored as rows."""
+    summary = {key: value for key, value in ml_output.items() if key != "processes"}
+    summary["process_count"] = len(ml_output.get("processes") or [])
+    return summary
+
+
+async def raise_alerts(
+    session: AsyncSession, custody: CustodyLogger, file_id: int, ml_output: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """
+    Insert the alerts for ``ml_output`` with one executemany and record their
+    custody events. Nothing is committed; the caller commits once. Returns
+    the inserted rows.
+    """
+    rows = alert_rows(file_id, ml_output)
+    if rows:
+        await session.execute(insert(Alert), rows)
+    for a in rows:
+        custody.record(
+            "alert",
+            (
+                f"Alert triggered for process {a['process_name']} "
+                f"(PID {a['pid']}) anomaly={a['anomaly_score']:.2f}"
+            ),
+            file_id=file_id,
+        )
+    ALERTS_RAISED.inc(len(rows))
+    return rows
+
+
+async def store_results(
+    analysis_id: int, file_id: int, outputs: Dict[str, Any], timings: Optional[Dict[str, float]] = None
+) -> Dict[str, float]:
+    """
+    Persist the output of a finished pipeline run and raise its alerts.
+
+    The result, its normalized rows, the alerts and all custody events are
+    written in a single transaction; once it is committed, the alerts and
+    the completion are published as progress events. The JSON columns only
+    get summaries: per-process rows go to the normalized tables. ``timings`` (the stages
+    measured so far) are saved on the result together with the time spent
+    storing it, and returned. The commit itself is timed as ``custody.commit``.
+    """
+    volatility_output = outputs["volatility_output"]
+    ml_output = outputs["ml_output"]
+    dl_output = outputs["dl_output"]
+    timer = StageTimer(timings)
+
+    async with AsyncSessionLocal() as session:
+        async with CustodyLogger(session) as custody:
+            with timer.stage("store"):
+                analysis = await session.get(AnalysisResult, analysis_id)
+                analysis.status = "completed"
+                analysis.summary = "Automated analysis completed."
+                if volatility_output.get("partial"):
+                    incomplete = sorted(
+                        name
+                        for name, s in (volatility_output.get("plugin_status") or {}).items()
+                        if s.get("status") != "ok"
+                    )
+                    analysis.summary = (
+                        "Automated analysis completed with partial Volatility results "
+                        f"(incomplete plugins: {', '.join(incomplete)})."
+                    )
+                    # Never serve a partial result from the cache.
+                    analysis.cache_key = None
+                if volatility_output.get("source") == "fixture":
+                    # VOLATILITY_FIXTURE output was not read from this image:
+                    # never serve it for the image's SHA-256 later.
+                    analysis.cache_key = None
+                analysis.volatility_output = volatility_summary(volatility_output)
+                analysis.ml_output = ml_summary(ml_output)
+                analysis.dl_output = dl_output
+                analysis.max_anomaly_score = float(ml_output.get("max_anomaly_score", 0.0))
+                await insert_records(session, analysis_id, volatility_output, ml_output)
+
+                custody.record("analysis", "Automated analysis executed.", file_id=file_id)
+                alerts = await raise_alerts(session, custody, file_id, ml_output)
+            analysis.stage_timings = {name: round(seconds, 6) for name, seconds in timer.timings.items()}
+
+    for alert in alerts:
+        broker.publish(analysis_id, "alert", alert)
+    broker.publish(
+        analysis_id,
+        "completed",
+        {
+            "status": analysis.status,
+            "summary": analysis.summary,
+            "max_anomaly_score": analysis.max_anomaly_score,
+            "alerts": len(alerts),
+            "stage_timings": analysis.stage_timings,
+        },
+    )
+
+    PROCESSES_SCORED.inc(len(ml_output.get("processes") or []))
+    return timer.timings
+
+
+async def reuse_cached_analysis(
+    session: AsyncSession, cached: AnalysisResult, file_id: int
+) -> AnalysisResult:
+    """
+    Record a completed analysis for ``file_id`` from an earlier run on an
+    identical image, without re-running the pipeline.
+    """
+    async with CustodyLogger(session) as custody:
+        analysis = AnalysisResult(
+            file_id=file_id,
+            status="completed",
+            summary=f"Results reused from analysis #{cached.id} of an identical image.",
+            volatility_output=cached.volatility_output,
+            ml_output=cached.ml_output,
+            dl_output=cached.dl_output,
+            max_anomaly_score=cached.max_anomaly_score,
+            cache_key=cached.cache_key,
+        )
+        session.add(analysis)
+        await session.flush()
+        await copy_records(session, cached.id, analysis.id)
+
+        custody.record(
+            "analysis",
+            f"Analysis results reused from analysis #{cached.id} (identical SHA-256).",
+            file_id=file_id,
+        )
+        processes = await load_process_predictions(session, analysis.id)
+        await raise_alerts(session, custody, file_id, {"processes": processes})
+    await session.refresh(analysis)
+    return analysis
@@ -1,8 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routes import files, analysis, alerts, reports
+from app.routes import files, uploads, analysis, records, alerts, custody, reports, metrics, profiles
 from app.db.session import init_db
+from app.jobs.queue import job_queue
+from app.utils.metrics import MetricsMiddleware
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.profiling import ProfilingMiddleware, profiling_enabled
+from app.utils.warmup import start_warm_up
 
 
 def create_app() -> FastAPI:
@@ -18,12 +23,24 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Browsers hide other response headers from scripts.
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
+    if profiling_enabled():
+        app.add_middleware(ProfilingMiddleware)
+    # Added last, so it is outermost and times the whole request.
+    app.add_middleware(MetricsMiddleware)
 
     app.include_router(files.router, prefix="/api", tags=["files"])
+    app.include_router(uploads.router, prefix="/api", tags=["uploads"])
     app.include_router(analysis.router, prefix="/api", tags=["analysis"])
+    app.include_router(records.router, prefix="/api", tags=["records"])
     app.include_router(alerts.router, prefix="/api", tags=["alerts"])
+    app.include_router(custody.router, prefix="/api", tags=["custody"])
     app.include_router(reports.router, prefix="/api", tags=["reports"])
+    app.include_router(profiles.router, prefix="/api", tags=["profiles"])
+    # Prometheus scrapes /metrics at the root.
+    app.include_router(metrics.router, tags=["metrics"])
 
     return app
 
@@ -35,5 +52,17 @@ app = create_app()
 async def on_startup() -> None:
     # Initialize database and run any migrations/bootstrap
     await init_db()
+    # Heartbeats this process's jobs and fails those of dead processes.
+    job_queue.start()
+    # Heavy libraries load in the background; keep a reference to the task.
+    app.state.warm_up = start_warm_up()
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    warm_up = getattr(app.state, "warm_up", None)
+    if warm_up is not None:
+        warm_up.cancel()
+    await job_queue.shutdown()
 
 
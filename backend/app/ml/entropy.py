@@ -0,0 +1,209 @@
+"""
+Shannon entropy of memory regions, computed from the image itself.
+
+Regions are read through a memory map and histogrammed with vectorized NumPy
+over large blocks (one ``bincount`` per batch of blocks, no per-byte Python
+work). Work is spread over a process pool. Entropy is reported in bits per
+byte (0-8) and, for the ML features, normalized to 0-1.
+
+Regions come from plugin output: any ``malfind`` / ``dlllist`` entry with a
+``pid``, an image ``offset`` and a ``size`` contributes to that process's
+entropy features.
+"""
+
+import mmap
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.concurrency import InlineExecutor, job_cpu_share
+
+ENTROPY_BLOCK_SIZE = int(os.getenv("ENTROPY_BLOCK_SIZE", str(64 * 1024)))
+ENTROPY_CHUNK_SIZE = int(os.getenv("ENTROPY_CHUNK_SIZE", str(64 * 1024 * 1024)))
+ENTROPY_WORKERS = int(os.getenv("ENTROPY_WORKERS", str(job_cpu_share())))
+ENTROPY_IMAGE_PROFILE = os.getenv("ENTROPY_IMAGE_PROFILE", "1") not in ("0", "false", "False")
+# Blocks above this many bits/byte are typical of packed or encrypted data.
+HIGH_ENTROPY_BITS = 7.2
+
+# Bytes histogrammed per bincount call; bounds temporary memory per worker.
+_BATCH_BYTES = 4 * 1024 * 1024
+
+Region = Tuple[int, int]  # (offset, size)
+
+
+def entropy_from_counts(counts: np.ndarray) -> np.ndarray:
+    """Shannon entropy in bits for each row of a (n, 256) histogram."""
+    counts = np.atleast_2d(counts).astype(np.float64)
+    totals = counts.sum(axis=1, keepdims=True)
+    probs = np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+    logs = np.log2(probs, out=np.zeros_like(probs), where=probs > 0)
+    return -(probs * logs).sum(axis=1)
+
+
+def block_histograms(data: np.ndarray, block_size: int) -> np.ndarray:
+    """Byte histograms of consecutive ``block_size`` blocks of a uint8 array."""
+    n_blocks = -(-len(data) // block_size)
+    counts = np.zeros((n_blocks, 256), dtype=np.int64)
+    blocks_per_batch = max(1, _BATCH_BYTES // block_size)
+    for first in range(0, n_blocks, blocks_per_batch):
+        last = min(n_blocks, first + blocks_per_batch)
+        chunk = data[first * block_size : last * block_size]
+        # Offset each block's bytes into its own 256-bin slice, then one bincount.
+        block_ids = np.arange(len(chunk), dtype=np.int32) // block_size
+        flat = np.bincount(block_ids * 256 + chunk, minlength=(last - first) * 256)
+        counts[first:last] = flat.reshape(last - first, 256)
+    return counts
+
+
+def _open_map(path: str):
+    f = open(path, "rb")
+    size = os.fstat(f.fileno()).st_size
+    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+    return f, mm, size
+
+
+def region_histograms(path: str, regions: Sequence[Region]) -> List[List[int]]:
+    """Whole-region byte histograms. Runs in a worker process."""
+    f, mm, size = _open_map(path)
+    try:
+        out = []
+        for offset, length in regions:
+            counts = np.zeros(256, dtype=np.int64)
+            start, end = max(0, offset), min(size, offset + length)
+            for pos in range(start, end, _BATCH_BYTES):
+                data = np.frombuffer(mm, dtype=np.uint8, count=min(_BATCH_BYTES, end - pos), offset=pos)
+                counts += np.bincount(data, minlength=256)
+                del data
+            out.append(counts.tolist())
+        return out
+    finally:
+        if mm is not None:
+            mm.close()
+        f.close()
+
+
+def image_block_entropy(path: str, start: int, end: int, block_size: int) -> np.ndarray:
+    """Per-block entropy (bits) of ``[start, end)``. Runs in a worker process."""
+    f, mm, size = _open_map(path)
+    try:
+        end = min(end, size)
+        if end <= start:
+            return np.zeros(0)
+        data = np.frombuffer(mm, dtype=np.uint8, count=end - start, offset=start)
+        result = entropy_from_counts(block_histograms(data, block_size))
+        del data
+        return result
+    finally:
+        if mm is not None:
+            mm.close()
+        f.close()
+
+
+def _regions_by_pid(volatility_output: Dict[str, Any]) -> Dict[int, List[Region]]:
+    regions: Dict[int, List[Region]] = {}
+    for plugin in ("malfind", "dlllist"):
+        for entry in volatility_output.get(plugin) or []:
+            pid, offset, size = entry.get("pid"), entry.get("offset"), entry.get("size")
+            if pid is None or offset is None or not size:
+                continue
+            regions.setdefault(int(pid), []).append((int(offset), int(size)))
+    return regions
+
+
+def compute_entropy_features(
+    dump_path: Path,
+    volatility_output: Dict[str, Any],
+    block_size: int = ENTROPY_BLOCK_SIZE,
+    chunk_size: int = ENTROPY_CHUNK_SIZE,
+    workers: int = ENTROPY_WORKERS,
+    image_profile: bool = ENTROPY_IMAGE_PROFILE,
+    executor: Optional[Executor] = None,
+) -> Dict[str, Any]:
+    """
+    Per-PID and per-region entropy features, plus an optional whole-image
+    block entropy summary.
+
+    Returns ``{"per_pid": {pid: {...}}, "regions": [...], "image": {...}}``.
+    A process's ``entropy`` is the entropy of the combined histogram of all
+    its regions, normalized to 0-1.
+    """
+    path = str(dump_path)
+    by_pid = _regions_by_pid(volatility_output)
+    flat = [(pid, region) for pid, regions in by_pid.items() for region in regions]
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else InlineExecutor()
+    try:
+        # Spread regions round-robin so large and small ones mix across workers.
+        n_tasks = max(1, min(workers, len(flat)))
+        region_tasks = []
+        if flat:
+            region_tasks = [
+                executor.submit(region_histograms, path, [r for _, r in flat[i::n_tasks]])
+                for i in range(n_tasks)
+            ]
+
+        block_tasks = []
+        if image_profile:
+            size = os.path.getsize(path)
+            # Chunk boundaries are block aligned so every block is whole.
+            step = max(block_size, chunk_size // block_size * block_size)
+            block_tasks = [
+                executor.submit(image_block_entropy, path, s, s + step, block_size)
+                for s in range(0, size, step)
+            ]
+
+        histograms: List[Optional[np.ndarray]] = [None] * len(flat)
+        for i, task in enumerate(region_tasks):
+            for j, counts in enumerate(task.result()):
+                histograms[i + j * n_tasks] = np.asarray(counts, dtype=np.int64)
+        block_entropy = (
+            np.concatenate([t.result() for t in block_tasks]) if block_tasks else np.zeros(0)
+        )
+    finally:
+        if own_executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    regions_out = []
+    per_pid: Dict[int, Dict[str, Any]] = {}
+    if flat:
+        region_bits = entropy_from_counts(np.stack(histograms))
+        for (pid, (offset, size)), bits in zip(flat, region_bits.tolist()):
+            regions_out.append({"pid": pid, "offset": offset, "size": size, "entropy_bits": bits})
+        indices: Dict[int, List[int]] = {}
+        for i, (pid, _) in enumerate(flat):
+            indices.setdefault(pid, []).append(i)
+        for pid, idx in indices.items():
+            combined = entropy_from_counts(np.sum([histograms[i] for i in idx], axis=0))[0]
+            per_pid[pid] = {
+                "entropy": float(combined) / 8.0,
+                "max_region_entropy": float(region_bits[idx].max()) / 8.0,
+                "region_count": len(idx),
+                "region_bytes": int(sum(histograms[i].sum() for i in idx)),
+            }
+
+    image: Dict[str, Any] = {}
+    if len(block_entropy):
+        image = {
+            "block_size": block_size,
+            "blocks": int(len(block_entropy)),
+            "mean_bits": float(block_entropy.mean()),
+            "max_bits": float(block_entropy.max()),
+            "high_entropy_ratio": float((block_entropy > HIGH_ENTROPY_BITS).mean()),
+        }
+
+    return {"per_pid": per_pid, "regions": regions_out, "image": image}
+
+
+def apply_entropy_features(volatility_output: Dict[str, Any], features: Dict[str, Any]) -> None:
+    """Overwrite each process's ``entropy`` with the value measured from the image."""
+    per_pid = features.get("per_pid") or {}
+    for proc in volatility_output.get("pslist") or []:
+        measured = per_pid.get(proc.get("pid"))
+        if measured is not None and measured["region_bytes"]:
+            proc["entropy"] = measured["entropy"]
+            proc["max_region_entropy"] = measured["max_region_entropy"]
@@ -1,24 +1,26 @@
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List
 
-import pandas as pd
+if TYPE_CHECKING:
+    import pandas as pd
 
-
-def processes_to_dataframe(processes: List[Dict[str, Any]]) -> pd.DataFrame:
-    rows = []
-    for p in processes:
-        rows.append(
-            {
-                "pid": p.get("pid"),
-                "ppid": p.get("ppid"),
-                "name": p.get("name"),
-                "threads": p.get("threads", 0),
-                "dll_count": p.get("dll_count", 0),
-                "entropy": p.get("entropy", 0.0),
-                "suspicious_flag": 1 if p.get("suspicious") else 0,
-                "net_conn_count": len(p.get("connections", [])),
-            }
-        )
-    return pd.DataFrame(rows)
+# Model inputs, in the column order the classifier was trained on.
+FEATURE_COLUMNS = ["threads", "dll_count", "suspicious_flag", "entropy", "net_conn_count"]
 
 
+def processes_to_dataframe(processes: List[Dict[str, Any]]) -> "pd.DataFrame":
+    import pandas as pd
 
+    # Build each column in one pass instead of one dict per row; this is the
+    # dominant cost for images with many thousands of processes.
+    return pd.DataFrame(
+        {
+            "pid": [p.get("pid") for p in processes],
+            "ppid": [p.get("ppid") for p in processes],
+            "name": [p.get("name") for p in processes],
+            "threads": [p.get("threads", 0) for p in processes],
+            "dll_count": [p.get("dll_count", 0) for p in processes],
+            "entropy": [p.get("entropy", 0.0) for p in processes],
+            "suspicious_flag": [1 if p.get("suspicious") else 0 for p in processes],
+            "net_conn_count": [len(p.get("connections", [])) for p in processes],
+        }
+    )
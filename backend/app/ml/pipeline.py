@@ -1,81 +1,97 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Sequence
 
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
 
-from app.ml.features import processes_to_dataframe
+from app.ml.features import FEATURE_COLUMNS, processes_to_dataframe
+from app.ml.registry import get_model
+
+
+def train_bootstrap_estimator():
+    """Train a tiny RF on synthetic samples so predict_proba works."""
+    from sklearn.ensemble import RandomForestClassifier
+
+    X = np.array(
+        [
+            [0, 0, 0, 0.1, 0],  # benign
+            [3, 20, 1, 0.95, 5],  # malicious
+            [1, 5, 0, 0.3, 0],  # benign
+            [4, 30, 1, 0.9, 10],  # malicious
+        ]
+    )
+    y = np.array([0, 1, 0, 1])  # 1 = malicious
+    estimator = RandomForestClassifier(n_estimators=20, random_state=42)
+    estimator.fit(X, y)
+    return estimator
 
 
 class SimpleAnomalyModel:
     """
-    Lightweight wrapper that uses a RandomForestClassifier trained on synthetic
-    data plus a heuristic anomaly score.
+    Lightweight wrapper that combines a classifier's malicious probability
+    with a heuristic anomaly score. The classifier comes from a versioned
+    artifact (see ``app.ml.registry``).
     """
 
-    def __init__(self) -> None:
-        # Train a tiny RF on synthetic samples so predict_proba works.
-        X = np.array(
-            [
-                [0, 0, 0, 0.1, 0],  # benign
-                [3, 20, 1, 0.95, 5],  # malicious
-                [1, 5, 0, 0.3, 0],  # benign
-                [4, 30, 1, 0.9, 10],  # malicious
-            ]
-        )
-        y = np.array([0, 1, 0, 1])  # 1 = malicious
-        self.model = RandomForestClassifier(n_estimators=20, random_state=42)
-        self.model.fit(X, y)
-
-    def _vectorize_row(self, row) -> np.ndarray:
-        return np.array(
-            [
-                float(row["threads"]),
-                float(row["dll_count"]),
-                float(row["suspicious_flag"]),
-                float(row["entropy"]),
-                float(row["net_conn_count"]),
-            ]
-        )
+    def __init__(self, estimator, version: str) -> None:
+        self.model = estimator
+        self.version = version
+
+    def predict_batch(self, process_lists: Sequence[List[Dict[str, Any]]]) -> List[List[Dict[str, Any]]]:
+        """
+        Score the process lists of several dumps with a single model call.
+        Returns one prediction list per input list, in the same order.
+        """
+        sizes = [len(processes) for processes in process_lists]
+        processes = [p for plist in process_lists for p in plist]
+        if not processes:
+            return [[] for _ in process_lists]
 
-    def predict_processes(self, processes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         df = processes_to_dataframe(processes)
-        predictions: List[Dict[str, Any]] = []
-        if df.empty:
-            return predictions
-
-        vectors = np.stack([self._vectorize_row(r) for _, r in df.iterrows()], axis=0)
-        probs = self.model.predict_proba(vectors)[:, 1]  # probability malicious
-
-        for (idx, row), prob in zip(df.iterrows(), probs):
-            # Heuristic anomaly score combining entropy, suspicious flag, and RF prob
-            entropy = float(row["entropy"])
-            susp = float(row["suspicious_flag"])
-            net = float(row["net_conn_count"])
-            anomaly_score = min(
-                1.0,
-                0.4 * prob + 0.3 * entropy + 0.2 * susp + 0.1 * (1.0 if net > 0 else 0.0),
-            )
-            label = "malicious" if anomaly_score > 0.7 or prob > 0.6 else "benign"
-
-            predictions.append(
-                {
-                    "pid": int(row["pid"]),
-                    "ppid": int(row["ppid"]),
-                    "name": str(row["name"]),
-                    "anomaly_score": float(anomaly_score),
-                    "confidence": float(prob),
-                    "label": label,
-                    "features": row.to_dict(),
-                }
+        X = df[FEATURE_COLUMNS].to_numpy(dtype=float)
+        probs = self.model.predict_proba(X)[:, 1]  # probability malicious
+
+        # Heuristic anomaly score combining entropy, suspicious flag, and RF prob
+        entropy = X[:, FEATURE_COLUMNS.index("entropy")]
+        susp = X[:, FEATURE_COLUMNS.index("suspicious_flag")]
+        net = X[:, FEATURE_COLUMNS.index("net_conn_count")]
+        anomaly_scores = np.minimum(
+            1.0, 0.4 * probs + 0.3 * entropy + 0.2 * susp + 0.1 * (net > 0)
+        )
+        malicious = (anomaly_scores > 0.7) | (probs > 0.6)
+
+        predictions = [
+            {
+                "pid": int(pid),
+                "ppid": int(ppid),
+                "name": str(name),
+                "anomaly_score": score,
+                "confidence": prob,
+                "label": "malicious" if is_malicious else "benign",
+                "features": features,
+            }
+            for pid, ppid, name, score, prob, is_malicious, features in zip(
+                df["pid"].tolist(),
+                df["ppid"].tolist(),
+                df["name"].tolist(),
+                anomaly_scores.tolist(),
+                probs.tolist(),
+                malicious.tolist(),
+                df.to_dict("records"),
             )
+        ]
 
-        return predictions
+        batches: List[List[Dict[str, Any]]] = []
+        start = 0
+        for size in sizes:
+            batches.append(predictions[start : start + size])
+            start += size
+        return batches
 
-
-model = SimpleAnomalyModel()
+    def predict_processes(self, processes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self.predict_batch([processes])[0]
 
 
-def run_ml_pipeline(volatility_output: Dict[str, Any]) -> Dict[str, Any]:
+def run_ml_pipeline(volatility_output: Dict[str, Any], model_version: Optional[str] = None) -> Dict[str, Any]:
+    model = get_model(model_version)
     processes = volatility_output.get("pslist") or []
     proc_predictions = model.predict_processes(processes)
 
@@ -86,6 +102,7 @@ def run_ml_pipeline(volatility_output: Dict[str, Any]) -> Dict[str, Any]:
         "processes": proc_predictions,
         "max_anomaly_score": max_anomaly,
         "any_malicious": any_malicious,
+        "model_version": model.version,
     }
 
 
@@ -0,0 +1,145 @@
+"""
+Versioned model artifacts on disk, loaded lazily on first use.
+
+Layout::
+
+    MODEL_DIR/anomaly/<version>/model.joblib
+    MODEL_DIR/anomaly/<version>/metadata.json
+
+``MODEL_VERSION`` pins a version; otherwise the newest version directory
+is used. Numbers in version names compare as numbers, so ``v10`` is newer
+than ``v9``. Artifacts are saved uncompressed so they can
+be loaded with ``mmap_mode="r"``: every worker maps the same file and the
+large arrays live in the shared page cache instead of being copied into
+each process.
+
+If no artifact exists yet, the bootstrap model is trained once and saved,
+so subsequent workers load it instead of training.
+
+Command line::
+
+    python -m app.ml.registry list
+    python -m app.ml.registry bootstrap
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from app.ml.pipeline import SimpleAnomalyModel
+
+MODEL_DIR = Path(os.getenv("MODEL_DIR", "models"))
+MODEL_NAME = "anomaly"
+PINNED_VERSION = os.getenv("MODEL_VERSION") or None
+MODEL_MMAP = os.getenv("MODEL_MMAP", "1") not in ("0", "false", "False")
+
+BOOTSTRAP_VERSION = "simple-rf-1"
+
+_lock = threading.Lock()
+_loaded: Dict[str, "SimpleAnomalyModel"] = {}
+
+
+def _model_root() -> Path:
+    return MODEL_DIR / MODEL_NAME
+
+
+def version_key(version: str) -> Tuple[Union[str, int], ...]:
+    """Sort key that compares the digit runs of a version name as numbers."""
+    # Text and digit runs alternate, so equal positions hold equal types.
+    return tuple(int(part) if i % 2 else part for i, part in enumerate(re.split(r"(\d+)", version)))
+
+
+def list_versions() -> List[str]:
+    """Saved versions, oldest first."""
+    root = _model_root()
+    if not root.is_dir():
+        return []
+    return sorted((p.name for p in root.iterdir() if (p / "model.joblib").is_file()), key=version_key)
+
+
+def current_model_version() -> str:
+    """Version new analyses will use, resolved without loading the model."""
+    if PINNED_VERSION:
+        return PINNED_VERSION
+    versions = list_versions()
+    return versions[-1] if versions else BOOTSTRAP_VERSION
+
+
+def save_model(estimator, version: str, metadata: Optional[dict] = None) -> Path:
+    """Write an artifact atomically; an existing version is never overwritten."""
+    import joblib
+
+    target = _model_root() / version
+    if (target / "model.joblib").is_file():
+        return target
+
+    _model_root().mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=_model_root(), prefix=f".{version}-"))
+    try:
+        joblib.dump(estimator, staging / "model.joblib", compress=0)
+        meta = {"name": MODEL_NAME, "version": version, "created_at": datetime.utcnow().isoformat()}
+        meta.update(metadata or {})
+        (staging / "metadata.json").write_text(json.dumps(meta, indent=2))
+        try:
+            staging.rename(target)
+        except OSError:
+            # Another worker published the same version first.
+            if not (target / "model.joblib").is_file():
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return target
+
+
+def load_model(version: str, mmap: bool = MODEL_MMAP) -> "SimpleAnomalyModel":
+    import joblib
+
+    from app.ml.pipeline import SimpleAnomalyModel, train_bootstrap_estimator
+
+    path = _model_root() / version / "model.joblib"
+    if not path.is_file():
+        if version != BOOTSTRAP_VERSION:
+            raise FileNotFoundError(f"Model artifact not found: {path}")
+        save_model(
+            train_bootstrap_estimator(),
+            BOOTSTRAP_VERSION,
+            {"description": "RandomForest trained on synthetic samples"},
+        )
+    estimator = joblib.load(path, mmap_mode="r" if mmap else None)
+    return SimpleAnomalyModel(estimator, version=version)
+
+
+def get_model(version: Optional[str] = None) -> "SimpleAnomalyModel":
+    """Return the model for ``version`` (default: current), loading it once per process."""
+    version = version or current_model_version()
+    model = _loaded.get(version)
+    if model is None:
+        with _lock:
+            model = _loaded.get(version)
+            if model is None:
+                model = _loaded[version] = load_model(version)
+    return model
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage anomaly model artifacts.")
+    parser.add_argument("command", choices=["list", "bootstrap"])
+    args = parser.parse_args()
+
+    if args.command == "bootstrap":
+        get_model(BOOTSTRAP_VERSION)
+    for version in list_versions():
+        marker = "*" if version == current_model_version() else " "
+        print(f"{marker} {version}")
+
+
+if __name__ == "__main__":
+    main()
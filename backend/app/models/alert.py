@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.db.session import Base
@@ -20,5 +20,12 @@ class Alert(Base):
 
     file = relationship("MemoryFile")
 
+    # Keyset pagination walks (created_at, id); filters lead where selective.
+    __table_args__ = (
+        Index("ix_alerts_created_id", "created_at", "id"),
+        Index("ix_alerts_file_created_id", "file_id", "created_at", "id"),
+        Index("ix_alerts_label_created_id", "label", "created_at", "id"),
+    )
+
 
 
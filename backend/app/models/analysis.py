@@ -10,12 +10,19 @@ class AnalysisResult(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     file_id = Column(Integer, ForeignKey("memory_files.id"), nullable=False, index=True)
-    status = Column(String, default="completed", nullable=False)
+    status = Column(String, default="queued", nullable=False, index=True)  # queued / running / completed / failed
     summary = Column(String, nullable=True)
     volatility_output = Column(JSON, nullable=True)
     ml_output = Column(JSON, nullable=True)
     dl_output = Column(JSON, nullable=True)
     max_anomaly_score = Column(Float, default=0.0)
+    # Hash of (dump SHA-256, plugin set, model version); identical inputs reuse results.
+    cache_key = Column(String, nullable=True, index=True)
+    # Seconds per pipeline stage (queue_wait, volatility, entropy, ml, strings, store).
+    stage_timings = Column(JSON, nullable=True)
+    # Server process that owns a queued/running job, and when it last said so.
+    worker_id = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     file = relationship("MemoryFile")
@@ -0,0 +1,20 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+
+from app.db.session import Base
+
+
+class CustodyCheckpoint(Base):
+    """Signed attestation that a file's custody chain was intact up to ``seq``."""
+
+    __tablename__ = "custody_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    file_id = Column(Integer, ForeignKey("memory_files.id"), nullable=True)
+    seq = Column(Integer, nullable=False)
+    entry_hash = Column(String(64), nullable=False)
+    key_id = Column(String, nullable=False)
+    signature = Column(String, nullable=False)  # HMAC-SHA256, hex
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (Index("ix_custody_checkpoints_file_seq", "file_id", "seq"),)
@@ -0,0 +1,25 @@
+from sqlalchemy import BigInteger, Column, ForeignKey, Index, Integer, String
+
+from app.db.session import Base
+
+
+class DllRecord(Base):
+    """One ``dlllist`` entry of an analysis."""
+
+    __tablename__ = "analysis_dlls"
+
+    id = Column(Integer, primary_key=True)
+    analysis_id = Column(
+        Integer, ForeignKey("analysis_results.id", ondelete="CASCADE"), nullable=False
+    )
+    pid = Column(Integer, nullable=False)
+    name = Column(String, nullable=True)
+    path = Column(String, nullable=True)
+    # Hex string: kernel addresses do not fit a signed 64-bit integer.
+    base = Column(String, nullable=True)
+    size = Column(BigInteger, nullable=True)
+
+    __table_args__ = (
+        Index("ix_analysis_dlls_analysis_pid", "analysis_id", "pid"),
+        Index("ix_analysis_dlls_analysis_name", "analysis_id", "name"),
+    )
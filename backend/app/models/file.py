@@ -1,5 +1,6 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import JSON, BigInteger, Column, DateTime, Index, Integer, String
+from sqlalchemy.orm import deferred
 
 from app.db.session import Base
 
@@ -11,9 +12,21 @@ class MemoryFile(Base):
     case_id = Column(String, index=True, nullable=False)
     filename = Column(String, nullable=False)
     stored_path = Column(String, nullable=False)
-    size_bytes = Column(Integer, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
     sha256 = Column(String, nullable=False, index=True)
+    md5 = Column(String, nullable=True)
+    sha1 = Column(String, nullable=True)
+    # Merkle tree over merkle_chunk_size chunks (see app.utils.hashing). The
+    # leaf list can be large, so it is only loaded when accessed.
+    merkle_chunk_size = Column(Integer, nullable=True)
+    merkle_root = Column(String, nullable=True)
+    merkle_leaves = deferred(Column(JSON, nullable=True))
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        Index("ix_memory_files_created_id", "created_at", "id"),
+        Index("ix_memory_files_case_created_id", "case_id", "created_at", "id"),
+    )
+
 
 
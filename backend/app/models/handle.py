@@ -0,0 +1,23 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
+
+from app.db.session import Base
+
+
+class HandleRecord(Base):
+    """One ``handles`` entry of an analysis."""
+
+    __tablename__ = "analysis_handles"
+
+    id = Column(Integer, primary_key=True)
+    analysis_id = Column(
+        Integer, ForeignKey("analysis_results.id", ondelete="CASCADE"), nullable=False
+    )
+    pid = Column(Integer, nullable=False)
+    handle_type = Column(String, nullable=True)
+    name = Column(String, nullable=True)
+    granted_access = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_analysis_handles_analysis_pid", "analysis_id", "pid"),
+        Index("ix_analysis_handles_analysis_type", "analysis_id", "handle_type"),
+    )
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, text
 from sqlalchemy.orm import relationship
 
 from app.db.session import Base
@@ -13,8 +13,22 @@ class ChainOfCustodyLog(Base):
     event_type = Column(String, nullable=False)  # upload, analysis, report, hash_validation, alert
     description = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Hash chain per file: seq counts from 1, prev_hash is the previous
+    # entry's entry_hash (64 zeros for the first entry).
+    seq = Column(Integer, nullable=False)
+    prev_hash = Column(String(64), nullable=False)
+    entry_hash = Column(String(64), nullable=False)
 
     file = relationship("MemoryFile")
 
-
-
+    __table_args__ = (
+        Index("ux_chain_of_custody_logs_file_seq", "file_id", "seq", unique=True),
+        # NULLs are distinct in the index above; entries without a file form one chain too.
+        Index(
+            "ux_chain_of_custody_logs_system_seq",
+            "seq",
+            unique=True,
+            postgresql_where=text("file_id IS NULL"),
+            sqlite_where=text("file_id IS NULL"),
+        ),
+    )
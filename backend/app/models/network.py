@@ -0,0 +1,27 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
+
+from app.db.session import Base
+
+
+class NetworkConnection(Base):
+    """One ``netscan`` entry of an analysis."""
+
+    __tablename__ = "analysis_connections"
+
+    id = Column(Integer, primary_key=True)
+    analysis_id = Column(
+        Integer, ForeignKey("analysis_results.id", ondelete="CASCADE"), nullable=False
+    )
+    pid = Column(Integer, nullable=True)
+    owner = Column(String, nullable=True)
+    protocol = Column(String, nullable=True)
+    local_ip = Column(String, nullable=True)
+    local_port = Column(Integer, nullable=True)
+    remote_ip = Column(String, nullable=True)
+    remote_port = Column(Integer, nullable=True)
+    state = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_analysis_connections_analysis_pid", "analysis_id", "pid"),
+        Index("ix_analysis_connections_analysis_remote_ip", "analysis_id", "remote_ip"),
+    )
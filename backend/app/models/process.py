@@ -0,0 +1,31 @@
+from sqlalchemy import Boolean, Column, Float, ForeignKey, Index, Integer, String
+
+from app.db.session import Base
+
+
+class ProcessRecord(Base):
+    """One scored process of an analysis (normalized from ``ml_output``)."""
+
+    __tablename__ = "analysis_processes"
+
+    id = Column(Integer, primary_key=True)
+    analysis_id = Column(
+        Integer, ForeignKey("analysis_results.id", ondelete="CASCADE"), nullable=False
+    )
+    pid = Column(Integer, nullable=False)
+    ppid = Column(Integer, nullable=True)
+    name = Column(String, nullable=True)
+    threads = Column(Integer, nullable=True)
+    dll_count = Column(Integer, nullable=True)
+    entropy = Column(Float, nullable=True)
+    suspicious = Column(Boolean, default=False, nullable=False)
+    net_conn_count = Column(Integer, nullable=True)
+    anomaly_score = Column(Float, nullable=False)
+    confidence = Column(Float, nullable=True)
+    label = Column(String, nullable=False)  # benign / malicious
+
+    __table_args__ = (
+        Index("ix_analysis_processes_analysis_pid", "analysis_id", "pid"),
+        Index("ix_analysis_processes_analysis_score", "analysis_id", "anomaly_score"),
+        Index("ix_analysis_processes_analysis_label_score", "analysis_id", "label", "anomaly_score"),
+    )
@@ -0,0 +1,19 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, JSON, String
+
+from app.db.session import Base
+
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    id = Column(String, primary_key=True)  # opaque token handed to the client
+    case_id = Column(String, nullable=False)
+    filename = Column(String, nullable=False)
+    total_size = Column(BigInteger, nullable=False)
+    # Sorted, non-overlapping [start, end) byte ranges already on disk.
+    received_ranges = Column(JSON, nullable=False, default=list)
+    status = Column(String, default="open", nullable=False)  # open / finalized / aborted / expired
+    file_id = Column(Integer, ForeignKey("memory_files.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -0,0 +1,145 @@
+"""
+On-disk cache of rendered PDF reports and graph images.
+
+A report is identified by (analysis id, alert set version, analyst name,
+renderer version, layout settings such as section row limits); the SHA-256
+of those is both the file name and the ETag. Graph images depend only on
+the analysis. Rendering happens in a worker thread so the event loop keeps
+serving other requests, concurrent requests for the same file share one
+render, and files are published atomically so a partially written file is
+never served.
+
+The cache is bounded by ``REPORT_CACHE_MAX_BYTES``: a file's modification
+time is bumped whenever it is served, and after each render the least
+recently used reports and graphs are deleted until the rest fits.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+REPORT_CACHE_DIR = Path(os.getenv("REPORT_CACHE_DIR", "report_cache"))
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(2 * 1024**3)))
+
+# Files used this recently are never evicted, so a download that has just
+# been handed a path does not lose its file.
+SWEEP_GRACE_SECONDS = 60.0
+
+MAX_ANALYST_NAME = 128
+
+# Bump when the report layout changes so cached PDFs are re-rendered.
+REPORT_RENDER_VERSION = 3
+
+_render_locks: Dict[str, asyncio.Lock] = {}
+
+
+def normalize_analyst_name(name: Optional[str]) -> str:
+    """Collapse whitespace, so spellings of the same name share one cached report."""
+    return " ".join((name or "").split())[:MAX_ANALYST_NAME]
+
+
+def report_cache_key(
+    analysis_id: int,
+    alert_version: str,
+    analyst_name: Optional[str],
+    layout: Optional[Dict[str, Any]] = None,
+) -> str:
+    payload = json.dumps(
+        [REPORT_RENDER_VERSION, analysis_id, alert_version, normalize_analyst_name(analyst_name), layout or {}],
+        separators=(",", ":"),
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def report_path(key: str) -> Path:
+    return REPORT_CACHE_DIR / key[:2] / f"{key}.pdf"
+
+
+def graph_path(analysis_id: int, kind: str, version: int) -> Path:
+    # Completed analyses never change, so the id and renderer version suffice.
+    return REPORT_CACHE_DIR / "graphs" / f"{analysis_id}-{kind}-v{version}.png"
+
+
+def _write_atomic(target: Path, render: Callable[[Path], None]) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=".render-", suffix=target.suffix)
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+    try:
+        render(tmp_path)
+        os.replace(tmp_path, target)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def mark_used(path: Path) -> bool:
+    """Mark ``path`` as just used; False if it does not exist."""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def sweep_cache(max_bytes: Optional[int] = None) -> int:
+    """
+    Delete the least recently used PDFs and graph images until the cache
+    holds at most ``max_bytes`` (default ``REPORT_CACHE_MAX_BYTES``).
+    Returns the number of bytes freed.
+    """
+    max_bytes = REPORT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    for path in REPORT_CACHE_DIR.rglob("*"):
+        if path.suffix not in (".pdf", ".png") or path.name.startswith(".render-"):
+            continue
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    cutoff = time.time() - SWEEP_GRACE_SECONDS
+    freed = 0
+    for mtime, size, path in sorted(entries):
+        if total <= max_bytes or mtime > cutoff:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        freed += size
+    return freed
+
+
+async def ensure_file(target: Path, render: Callable[[Path], None]) -> bool:
+    """
+    Make sure ``target`` exists, calling ``render(path)`` in a worker thread
+    if it does not. Returns True if it was rendered now; the cache is then
+    swept back under its byte budget.
+    """
+    if mark_used(target):
+        return False
+    key = str(target)
+    lock = _render_locks.setdefault(key, asyncio.Lock())
+    try:
+        async with lock:
+            if mark_used(target):
+                return False
+            await run_in_threadpool(_write_atomic, target, render)
+    finally:
+        if not lock.locked():
+            _render_locks.pop(key, None)
+    await run_in_threadpool(sweep_cache)
+    return True
+
+
+async def ensure_report(key: str, render: Callable[[Path], None]) -> bool:
+    """Make sure the report for ``key`` exists on disk (see :func:`ensure_file`)."""
+    return await ensure_file(report_path(key), render)
@@ -0,0 +1,196 @@
+"""
+Row-by-row exports of analysis tables.
+
+Processes, network connections and alerts are read from the normalized
+tables in keyset-paginated batches (:func:`app.reports.sources.stream_rows`)
+and encoded one batch at a time. An export of any size holds a single batch
+in memory, the first bytes go out after the first query, and the JSON
+result blobs are never loaded.
+
+Formats are NDJSON and CSV, both optionally gzip-compressed, and Parquet,
+which needs the optional ``pyarrow`` package. A Parquet file ends with its
+footer, so every batch is written as a row group and sent as soon as it is
+encoded.
+"""
+
+import csv
+import importlib.util
+import io
+import json
+import os
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Sequence, Tuple
+
+from app.db.session import AsyncSessionLocal
+from app.models.alert import Alert
+from app.models.network import NetworkConnection
+from app.models.process import ProcessRecord
+from app.reports.sources import OrderKey, stream_rows
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+
+# format -> (media type, file extension)
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+Batches = AsyncIterator[List[Tuple[Any, ...]]]
+
+
+class ExportTable:
+    """Columns and row order of an exportable table, scoped to one analysis or file."""
+
+    def __init__(self, model: Any, names: Sequence[str], keys: Sequence[OrderKey], by_file: bool = False) -> None:
+        self.model = model
+        self.names = list(names)
+        self.columns = [getattr(model, name) for name in names]
+        self.keys = keys
+        self.by_file = by_file
+
+
+EXPORT_TABLES: Dict[str, ExportTable] = {
+    # Same order as the paginated listings.
+    "processes": ExportTable(
+        ProcessRecord,
+        [
+            "pid", "ppid", "name", "threads", "dll_count", "entropy", "suspicious",
+            "net_conn_count", "anomaly_score", "confidence", "label",
+        ],
+        [(ProcessRecord.anomaly_score, True), (ProcessRecord.id, False)],
+    ),
+    "connections": ExportTable(
+        NetworkConnection,
+        ["pid", "owner", "protocol", "local_ip", "local_port", "remote_ip", "remote_port", "state"],
+        [(NetworkConnection.id, False)],
+    ),
+    # Alerts belong to the analysed file.
+    "alerts": ExportTable(
+        Alert,
+        ["id", "file_id", "process_name", "pid", "anomaly_score", "ml_confidence", "label", "message", "created_at"],
+        [(Alert.created_at, False), (Alert.id, False)],
+        by_file=True,
+    ),
+}
+
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+async def table_batches(
+    table: ExportTable, analysis_id: int, file_id: int, batch_size: int = EXPORT_BATCH_SIZE
+) -> Batches:
+    """
+    Rows of ``table`` for an analysis, batch by batch. The session is the
+    export's own (the request's is closed once streaming starts). Batches
+    are separate keyset queries, not one snapshot: an analysis's rows are
+    written once when it completes and alerts are only appended, so rows
+    added during an export are at worst missing from it, never repeated.
+    """
+    scope = table.model.file_id == file_id if table.by_file else table.model.analysis_id == analysis_id
+    async with AsyncSessionLocal() as session:
+        async for batch in stream_rows(session, table.columns, [scope], table.keys, batch_size):
+            yield batch
+
+
+def _plain(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def ndjson_chunks(names: Sequence[str], batches: Batches) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        lines = (
+            json.dumps({name: _plain(value) for name, value in zip(names, row)}, separators=(",", ":"))
+            for row in batch
+        )
+        yield ("\n".join(lines) + "\n").encode()
+
+
+async def csv_chunks(names: Sequence[str], batches: Batches) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    async for batch in batches:
+        writer.writerows([_plain(value) for value in row] for row in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():  # header of an empty export
+        yield buffer.getvalue().encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting what pyarrow writes until :meth:`take` is called."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def parquet_chunks(table: ExportTable, batches: Batches) -> AsyncIterator[bytes]:
+    """Parquet (zstd) with one row group per batch. Requires ``pyarrow``."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {
+        int: pa.int64(),
+        float: pa.float64(),
+        str: pa.string(),
+        bool: pa.bool_(),
+        datetime: pa.timestamp("us"),
+    }
+    schema = pa.schema(
+        [(name, arrow_types[column.type.python_type]) for name, column in zip(table.names, table.columns)]
+    )
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        async for batch in batches:
+            columns = {name: list(values) for name, values in zip(table.names, zip(*batch))}
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+def export_chunks(
+    table_name: str, fmt: str, analysis_id: int, file_id: int, compress: bool = False
+) -> AsyncIterator[bytes]:
+    """Encoded export of one table; ``compress`` gzips NDJSON and CSV."""
+    table = EXPORT_TABLES[table_name]
+    batches = table_batches(table, analysis_id, file_id)
+    if fmt == "parquet":
+        return parquet_chunks(table, batches)
+    chunks = ndjson_chunks(table.names, batches) if fmt == "ndjson" else csv_chunks(table.names, batches)
+    return gzip_chunks(chunks) if compress else chunks
@@ -0,0 +1,278 @@
+"""
+Process tree and network graph images.
+
+Both are drawn server-side as PNGs with Pillow (already required by
+reportlab) and cached per analysis next to the cached reports, so the PDF
+report and the dashboard share one render.
+
+The process tree is an indented list, one row per visible process. At most
+``GRAPH_MAX_NODES`` rows are drawn however large the tree is: processes on
+the path to a flagged (malicious or suspicious) process come first, then the
+shallowest remaining ones; every other subtree is collapsed into a
+"+N processes" row under its parent. The network graph links processes to
+the remote addresses they talk to and keeps at most ``GRAPH_MAX_EDGES``
+edges, those of flagged processes first, then the busiest.
+"""
+
+import math
+import os
+from collections import deque
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, List, Sequence, Set, Tuple, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.reports.cache import ensure_file, graph_path
+from app.reports.sources import connection_edges, process_nodes
+from app.utils.metrics import timed
+from app.volatility.process_tree import ProcessTree
+
+if TYPE_CHECKING:
+    from PIL import Image, ImageDraw
+
+GRAPH_MAX_NODES = int(os.getenv("GRAPH_MAX_NODES", "150"))
+GRAPH_MAX_EDGES = int(os.getenv("GRAPH_MAX_EDGES", "150"))
+
+# Bump when the drawing changes so cached images are re-rendered.
+GRAPH_RENDER_VERSION = 1
+
+GRAPH_KINDS = ("process_tree", "network")
+
+ROW_HEIGHT = 14
+INDENT = 16
+# Deeper rows are drawn at this level with their depth in the label.
+MAX_INDENT_LEVELS = 32
+MARGIN = 10
+COLUMN_GAP = 220
+MAX_LABEL_CHARS = 48
+
+_COLORS = {
+    "malicious": (200, 30, 30),
+    "suspicious": (215, 120, 0),
+    "benign": (30, 30, 30),
+    "collapsed": (120, 120, 120),
+    "line": (175, 175, 175),
+}
+
+# (depth, label, status, parent row or -1)
+TreeRow = Tuple[int, str, str, int]
+Output = Union[str, Path, BinaryIO]
+
+
+def is_flagged(proc: Dict[str, Any]) -> bool:
+    return proc.get("label") == "malicious" or bool(proc.get("suspicious"))
+
+
+def _status(proc: Dict[str, Any]) -> str:
+    if proc.get("label") == "malicious":
+        return "malicious"
+    return "suspicious" if proc.get("suspicious") else "benign"
+
+
+def _label(text: str) -> str:
+    return text if len(text) <= MAX_LABEL_CHARS else text[: MAX_LABEL_CHARS - 3] + "..."
+
+
+def _process_label(tree: ProcessTree, i: int) -> str:
+    proc = tree.processes[i]
+    text = f"{proc.get('name') or '?'} ({proc.get('pid')})"
+    if is_flagged(proc) and proc.get("anomaly_score") is not None:
+        text += f" score {proc['anomaly_score']:.2f}"
+    if tree.orphan[i]:
+        text += " [orphan]"
+    return _label(text)
+
+
+def tree_rows(tree: ProcessTree, max_nodes: int = GRAPH_MAX_NODES) -> List[TreeRow]:
+    """Rows of the collapsed tree in display order; O(n) in the tree size."""
+    flagged = tree.marks_subtree(is_flagged)
+    sizes = tree.subtree_sizes()
+    visible = [False] * len(tree)
+    budget = max_nodes
+
+    # Breadth-first, so a process is only shown once its parent is: first the
+    # paths to flagged processes, then the shallowest of the rest.
+    for wanted in (flagged, None):
+        queue = deque(tree.roots)
+        while queue and budget > 0:
+            i = queue.popleft()
+            if wanted is not None and not wanted[i]:
+                continue
+            if not visible[i]:
+                visible[i] = True
+                budget -= 1
+            queue.extend(tree.children[i])
+
+    def split(indices: Sequence[int]) -> Tuple[List[int], List[int]]:
+        shown = sorted((i for i in indices if visible[i]), key=lambda i: not flagged[i])
+        return shown, [i for i in indices if not visible[i]]
+
+    def summary(hidden: List[int], depth: int, parent_row: int) -> TreeRow:
+        count = sum(sizes[i] for i in hidden)
+        text = f"+{count} process{'es' if count != 1 else ''} collapsed"
+        if any(flagged[i] for i in hidden):
+            return depth, text + " (includes flagged)", "suspicious", parent_row
+        return depth, text, "collapsed", parent_row
+
+    rows: List[TreeRow] = []
+    shown, hidden = split(tree.roots)
+    # Stack entries: (index, depth, parent row), or a ready-made summary row.
+    stack: List[Any] = [summary(hidden, 0, -1)] if hidden else []
+    stack.extend((i, 0, -1) for i in reversed(shown))
+    while stack:
+        entry = stack.pop()
+        if len(entry) == 4:
+            rows.append(entry)
+            continue
+        i, depth, parent_row = entry
+        row = len(rows)
+        rows.append((depth, _process_label(tree, i), _status(tree.processes[i]), parent_row))
+        shown, hidden = split(tree.children[i])
+        if hidden:
+            stack.append(summary(hidden, depth + 1, row))
+        stack.extend((c, depth + 1, row) for c in reversed(shown))
+    return rows
+
+
+def _font():
+    # Pillow is imported on first render, not with the API.
+    from PIL import ImageFont
+
+    return ImageFont.load_default()
+
+
+def _text_width(draw: "ImageDraw.ImageDraw", text: str, font) -> int:
+    left, _, right, _ = draw.textbbox((0, 0), text, font=font)
+    return right - left
+
+
+def _save(image: "Image.Image", output: Output) -> None:
+    image.save(str(output) if isinstance(output, Path) else output, format="PNG")
+
+
+def _message(text: str, output: Output) -> None:
+    from PIL import Image, ImageDraw
+
+    font = _font()
+    probe = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+    image = Image.new("RGB", (_text_width(probe, text, font) + 2 * MARGIN, ROW_HEIGHT + 2 * MARGIN), "white")
+    ImageDraw.Draw(image).text((MARGIN, MARGIN), text, fill=_COLORS["collapsed"], font=font)
+    _save(image, output)
+
+
+def render_process_tree(
+    processes: Sequence[Dict[str, Any]], output: Output, max_nodes: int = GRAPH_MAX_NODES
+) -> None:
+    """Draw the collapsed process tree of ``processes`` (pslist-like dicts) as a PNG."""
+    from PIL import Image, ImageDraw
+
+    rows = tree_rows(ProcessTree(processes), max_nodes)
+    if not rows:
+        _message("No processes recorded.", output)
+        return
+
+    font = _font()
+    probe = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+    labels = [
+        label if depth <= MAX_INDENT_LEVELS else f"[depth {depth}] {label}"
+        for depth, label, _, _ in rows
+    ]
+
+    def x_of(depth: int) -> int:
+        return MARGIN + min(depth, MAX_INDENT_LEVELS) * INDENT
+
+    def y_of(row: int) -> int:
+        return MARGIN + row * ROW_HEIGHT + ROW_HEIGHT // 2
+
+    width = max(x_of(r[0]) + 10 + _text_width(probe, label, font) for r, label in zip(rows, labels)) + MARGIN
+    image = Image.new("RGB", (width, len(rows) * ROW_HEIGHT + 2 * MARGIN), "white")
+    draw = ImageDraw.Draw(image)
+    for row, ((depth, _, status, parent), label) in enumerate(zip(rows, labels)):
+        x, y = x_of(depth), y_of(row)
+        if parent >= 0:
+            px = x_of(rows[parent][0]) + 2
+            draw.line([(px, y_of(parent) + 3), (px, y), (x, y)], fill=_COLORS["line"])
+        draw.rectangle((x, y - 2, x + 4, y + 2), fill=_COLORS[status])
+        draw.text((x + 10, y - ROW_HEIGHT // 2 + 1), label, fill=_COLORS[status], font=font)
+    _save(image, output)
+
+
+def render_network_graph(
+    edges: Sequence[Tuple[Any, ...]],
+    flagged_pids: Set[int],
+    output: Output,
+    max_edges: int = GRAPH_MAX_EDGES,
+) -> None:
+    """
+    Draw ``(pid, owner, remote_ip, connections)`` edges as a two-column graph:
+    processes on the left, remote addresses on the right.
+    """
+    from PIL import Image, ImageDraw
+
+    if not edges:
+        _message("No remote connections recorded.", output)
+        return
+
+    ranked = sorted(edges, key=lambda e: e[0] not in flagged_pids)
+    kept, dropped = ranked[:max_edges], len(ranked) - max_edges
+    left: Dict[Tuple[Any, Any], int] = {}
+    right: Dict[Any, int] = {}
+    for pid, owner, remote_ip, _ in kept:
+        left.setdefault((pid, owner), len(left))
+        right.setdefault(remote_ip, len(right))
+
+    font = _font()
+    probe = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+    left_labels = [_label(f"{owner or '?'} ({pid})") for pid, owner in left]
+    right_labels = [_label(str(ip)) for ip in right]
+    left_width = max(_text_width(probe, label, font) for label in left_labels)
+    right_x = MARGIN + left_width + COLUMN_GAP
+    width = right_x + 10 + max(_text_width(probe, label, font) for label in right_labels) + MARGIN
+    rows = max(len(left), len(right)) + (1 if dropped > 0 else 0)
+    image = Image.new("RGB", (width, rows * ROW_HEIGHT + 2 * MARGIN), "white")
+    draw = ImageDraw.Draw(image)
+
+    def y_of(row: int) -> int:
+        return MARGIN + row * ROW_HEIGHT + ROW_HEIGHT // 2
+
+    for pid, owner, remote_ip, count in kept:
+        color = _COLORS["malicious"] if pid in flagged_pids else _COLORS["line"]
+        line_width = 1 + min(3, int(math.log2(max(1, count))))
+        draw.line(
+            [(MARGIN + left_width + 6, y_of(left[(pid, owner)])), (right_x - 2, y_of(right[remote_ip]))],
+            fill=color,
+            width=line_width,
+        )
+    for row, ((pid, _), label) in enumerate(zip(left, left_labels)):
+        status = "malicious" if pid in flagged_pids else "benign"
+        x = MARGIN + left_width - _text_width(probe, label, font)
+        draw.text((x, y_of(row) - ROW_HEIGHT // 2 + 1), label, fill=_COLORS[status], font=font)
+    for row, label in enumerate(right_labels):
+        draw.rectangle((right_x, y_of(row) - 2, right_x + 4, y_of(row) + 2), fill=_COLORS["benign"])
+        draw.text((right_x + 10, y_of(row) - ROW_HEIGHT // 2 + 1), label, fill=_COLORS["benign"], font=font)
+    if dropped > 0:
+        draw.text(
+            (MARGIN, y_of(rows - 1) - ROW_HEIGHT // 2 + 1),
+            f"+{dropped} more process/address pairs not shown",
+            fill=_COLORS["collapsed"],
+            font=font,
+        )
+    _save(image, output)
+
+
+async def ensure_graph(session: AsyncSession, analysis_id: int, kind: str) -> Path:
+    """Path of the cached ``kind`` image of an analysis, rendered on first use."""
+    if kind not in GRAPH_KINDS:
+        raise ValueError(f"Unknown graph kind: {kind}")
+    target = graph_path(analysis_id, kind, GRAPH_RENDER_VERSION)
+    if not target.exists():
+        processes = await process_nodes(session, analysis_id)
+        if kind == "process_tree":
+            render = partial(render_process_tree, processes)
+        else:
+            edges = await connection_edges(session, analysis_id)
+            render = partial(render_network_graph, edges, {p["pid"] for p in processes if is_flagged(p)})
+        render = timed(f"report.graph.{kind}")(render)
+        await ensure_file(target, lambda output: render(output=output))
+    return target
@@ -1,94 +1,258 @@
+"""
+PDF forensic report.
+
+Large listings (alerts, processes, connections, DLLs, handles) are rendered
+as a series of small ``Table`` flowables of ``REPORT_TABLE_CHUNK_ROWS`` rows
+each, instead of one Paragraph per row or one huge table: platypus splits a
+table across pages by re-measuring it, so the cost stays linear only when
+tables are short. The story is produced lazily from iterators (typically
+backed by a DB cursor), so at most a few hundred rows are held in memory at
+any point, and each section stops at its row limit.
+"""
+
 from io import BytesIO
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional, Sequence, Union
 
+from PIL import Image as PILImage
+from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+from reportlab.lib.units import inch
+from reportlab.platypus import Flowable, Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
+from app.reports.sources import ALERT_COLUMNS, REPORT_TABLE_CHUNK_ROWS, ReportSection
 
-def build_pdf_report(
+# Longer cell values are cut so a single row never outgrows a page width.
+MAX_CELL_CHARS = 64
+
+_TABLE_STYLE = TableStyle(
+    [
+        ("FONT", (0, 0), (-1, -1), "Helvetica", 7),
+        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold", 7),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("TOPPADDING", (0, 0), (-1, -1), 1),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 1),
+    ]
+)
+
+# Largest box an image may take: the A4 frame less room for its heading.
+MAX_IMAGE_WIDTH = A4[0] - 2 * inch - 12
+MAX_IMAGE_HEIGHT = A4[1] - 2 * inch - 72
+
+VISUAL_ARTIFACTS = [("process_tree", "Process tree"), ("network", "Network graph")]
+
+
+class LazyStory(list):
+    """
+    A story list that is refilled from an iterator as platypus consumes it.
+
+    ``doc.build`` checks ``len(story)`` before handling each flowable, which
+    is where the buffer is topped up; platypus only ever looks at the first
+    few entries, so a small buffer is enough.
+    """
+
+    def __init__(self, flowables: Iterable[Flowable], buffer: int = 32) -> None:
+        super().__init__()
+        self._source: Optional[Iterator[Flowable]] = iter(flowables)
+        self._buffer = buffer
+
+    def __len__(self) -> int:
+        while self._source is not None and list.__len__(self) < self._buffer:
+            item = next(self._source, None)
+            if item is None:
+                self._source = None
+            else:
+                self.append(item)
+        return list.__len__(self)
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    text = str(value)
+    return text if len(text) <= MAX_CELL_CHARS else text[: MAX_CELL_CHARS - 3] + "..."
+
+
+def table_chunks(
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    chunk_rows: Optional[int] = None,
+    col_widths: Optional[Sequence[float]] = None,
+) -> Iterator[Table]:
+    """Yield ``Table`` flowables of at most ``chunk_rows`` rows, each with the header."""
+    chunk_rows = chunk_rows or REPORT_TABLE_CHUNK_ROWS
+    header = [_cell(c) for c in columns]
+    rows = iter(rows)
+    while True:
+        chunk = [[_cell(v) for v in row] for row in islice(rows, chunk_rows)]
+        if not chunk:
+            return
+        yield Table([header] + chunk, colWidths=col_widths, repeatRows=1, style=_TABLE_STYLE)
+
+
+def _section_flowables(section: ReportSection, styles) -> Iterator[Flowable]:
+    yield Paragraph(f"<b>{section.title}</b>", styles["Heading3"])
+    counted = {"rows": 0}
+
+    def limited_rows() -> Iterator[Sequence[Any]]:
+        rows = section.rows if section.limit is None else islice(section.rows, section.limit)
+        for row in rows:
+            counted["rows"] += 1
+            yield row
+
+    yield from table_chunks(section.columns, limited_rows(), col_widths=section.col_widths)
+    shown = counted["rows"]
+    if not shown:
+        yield Paragraph("None recorded.", styles["Normal"])
+    elif section.total is not None and section.total > shown:
+        yield Paragraph(
+            f"Showing the first {shown} of {section.total} rows (section limit).", styles["Normal"]
+        )
+    yield Spacer(1, 12)
+
+
+def alerts_section(
+    alerts: Iterable[Dict[str, Any]], total: Optional[int] = None, limit: Optional[int] = None
+) -> ReportSection:
+    rows = (
+        (
+            a.get("created_at"),
+            a.get("process_name"),
+            a.get("pid"),
+            a.get("label"),
+            float(a.get("anomaly_score") or 0.0),
+            float(a.get("ml_confidence") or 0.0),
+        )
+        for a in alerts
+    )
+    return ReportSection("Alerts", ALERT_COLUMNS, rows, total=total, limit=limit)
+
+
+def _image_flowables(path: Union[str, Path]) -> Iterator[Image]:
+    """
+    ``path`` scaled down (never up) to the frame width and cut into
+    page-high slices, so tall images stay legible.
+    """
+    with PILImage.open(path) as picture:
+        picture.load()
+    width, height = picture.size
+    scale = min(1.0, MAX_IMAGE_WIDTH / width)
+    slice_height = max(1, int(MAX_IMAGE_HEIGHT / scale))
+    for top in range(0, height, slice_height):
+        part = picture.crop((0, top, width, min(height, top + slice_height)))
+        data = BytesIO()
+        part.save(data, format="PNG")
+        data.seek(0)
+        yield Image(data, width=width * scale, height=part.size[1] * scale)
+
+
+def _story(
     metadata: Dict[str, Any],
     volatility_output: Optional[Dict[str, Any]],
     ml_output: Optional[Dict[str, Any]],
     dl_output: Optional[Dict[str, Any]],
-    alerts: List[Dict[str, Any]],
-    analyst_name: Optional[str] = None,
-) -> bytes:
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    alerts: Union[Iterable[Dict[str, Any]], ReportSection],
+    analyst_name: Optional[str],
+    sections: Sequence[ReportSection],
+    images: Dict[str, Union[str, Path]],
+) -> Iterator[Flowable]:
     styles = getSampleStyleSheet()
 
-    story: List[Any] = []
-
-    story.append(Paragraph("AI-Based Memory Forensics Report", styles["Title"]))
-    story.append(Spacer(1, 12))
+    yield Paragraph("AI-Based Memory Forensics Report", styles["Title"])
+    yield Spacer(1, 12)
 
     # Evidence metadata
-    story.append(Paragraph("<b>Evidence Metadata</b>", styles["Heading2"]))
-    for key in ["filename", "sha256", "size_bytes", "case_id", "timestamp"]:
-        if key in metadata:
-            story.append(Paragraph(f"{key}: {metadata[key]}", styles["Normal"]))
-    story.append(Spacer(1, 12))
+    yield Paragraph("<b>Evidence Metadata</b>", styles["Heading2"])
+    for key in ["filename", "md5", "sha1", "sha256", "merkle_root", "size_bytes", "case_id", "timestamp"]:
+        if metadata.get(key) is not None:
+            yield Paragraph(f"{key}: {metadata[key]}", styles["Normal"])
+    yield Spacer(1, 12)
 
     # ALERT SUMMARY
-    story.append(Paragraph("<b>ALERT SUMMARY</b>", styles["Heading2"]))
-    if alerts:
-        for a in alerts:
-            line = (
-                f"{a.get('created_at')}: {a.get('process_name')} (PID {a.get('pid')}) "
-                f"label={a.get('label')} anomaly={a.get('anomaly_score'):.2f} "
-                f"confidence={a.get('ml_confidence', 0.0):.2f}"
-            )
-            story.append(Paragraph(line, styles["Normal"]))
-    else:
-        story.append(Paragraph("No alerts generated.", styles["Normal"]))
-    story.append(Spacer(1, 12))
+    yield Paragraph("<b>ALERT SUMMARY</b>", styles["Heading2"])
+    if not isinstance(alerts, ReportSection):
+        alerts = alerts_section(alerts)
+    yield from _section_flowables(alerts, styles)
 
     # High-level AI/DL summary
-    story.append(Paragraph("<b>AI / ML Summary</b>", styles["Heading2"]))
+    yield Paragraph("<b>AI / ML Summary</b>", styles["Heading2"])
     if ml_output:
-        story.append(
-            Paragraph(
-                f"Max anomaly score: {ml_output.get('max_anomaly_score', 0.0):.2f}", styles["Normal"]
-            )
-        )
-        story.append(
-            Paragraph(
-                f"Any malicious: {ml_output.get('any_malicious', False)}", styles["Normal"]
-            )
-        )
+        yield Paragraph(f"Max anomaly score: {ml_output.get('max_anomaly_score', 0.0):.2f}", styles["Normal"])
+        yield Paragraph(f"Any malicious: {ml_output.get('any_malicious', False)}", styles["Normal"])
     if dl_output:
-        story.append(
-            Paragraph(
-                f"DL string analysis score: {dl_output.get('dl_score', 0.0):.2f}", styles["Normal"]
+        yield Paragraph(f"DL string analysis score: {dl_output.get('dl_score', 0.0):.2f}", styles["Normal"])
+        image_strings = dl_output.get("image_strings")
+        if image_strings:
+            yield Paragraph(
+                f"Image strings: {image_strings.get('strings_matched', 0)} of "
+                f"{image_strings.get('strings_scanned', 0)} matched, score {image_strings.get('dl_score', 0.0):.2f}",
+                styles["Normal"],
             )
-        )
-    story.append(Spacer(1, 12))
+    yield Spacer(1, 12)
 
-    # Volatility results (summary only)
-    story.append(Paragraph("<b>Volatility Artifacts</b>", styles["Heading2"]))
+    # Volatility results
+    yield Paragraph("<b>Volatility Artifacts</b>", styles["Heading2"])
     if volatility_output:
         pslist = volatility_output.get("pslist") or []
-        story.append(Paragraph(f"Total processes: {len(pslist)}", styles["Normal"]))
+        yield Paragraph(f"Total processes: {len(pslist)}", styles["Normal"])
         netscan = volatility_output.get("netscan") or []
-        story.append(Paragraph(f"Network connections: {len(netscan)}", styles["Normal"]))
-    story.append(Spacer(1, 12))
+        yield Paragraph(f"Network connections: {len(netscan)}", styles["Normal"])
+        yield Spacer(1, 12)
+    elif sections:
+        for section in sections:
+            if section.total is not None:
+                yield Paragraph(f"{section.title}: {section.total}", styles["Normal"])
+        yield Spacer(1, 12)
+    for section in sections:
+        yield from _section_flowables(section, styles)
 
-    # Placeholder for images (process tree, network graph)
-    story.append(Paragraph("<b>Visual Artifacts</b>", styles["Heading2"]))
-    story.append(Paragraph("Process tree image: [to be attached by frontend].", styles["Normal"]))
-    story.append(Paragraph("Network graph image: [to be attached by frontend].", styles["Normal"]))
-    story.append(Spacer(1, 24))
+    # Process tree and network graph
+    yield Paragraph("<b>Visual Artifacts</b>", styles["Heading2"])
+    for kind, title in VISUAL_ARTIFACTS:
+        yield Paragraph(f"<b>{title}</b>", styles["Heading3"])
+        if images.get(kind):
+            yield from _image_flowables(images[kind])
+        else:
+            yield Paragraph("Not available.", styles["Normal"])
+        yield Spacer(1, 12)
+    yield Spacer(1, 12)
 
     # Analyst signature
-    story.append(Paragraph("<b>Analyst</b>", styles["Heading2"]))
-    story.append(Paragraph(f"Name: {analyst_name or '________________'}", styles["Normal"]))
-    story.append(Paragraph("Signature: _______________________________", styles["Normal"]))
-
-    doc.build(story)
-    buffer.seek(0)
-    return buffer.read()
+    yield Paragraph("<b>Analyst</b>", styles["Heading2"])
+    yield Paragraph(f"Name: {analyst_name or '________________'}", styles["Normal"])
+    yield Paragraph("Signature: _______________________________", styles["Normal"])
 
 
+def build_pdf_report(
+    metadata: Dict[str, Any],
+    volatility_output: Optional[Dict[str, Any]],
+    ml_output: Optional[Dict[str, Any]],
+    dl_output: Optional[Dict[str, Any]],
+    alerts: Union[Iterable[Dict[str, Any]], ReportSection],
+    analyst_name: Optional[str] = None,
+    output: Optional[Union[str, Path, BinaryIO]] = None,
+    sections: Sequence[ReportSection] = (),
+    images: Optional[Dict[str, Union[str, Path]]] = None,
+) -> Optional[bytes]:
+    """
+    Render the report. Writes to ``output`` (a path or binary file object)
+    when given, otherwise returns the PDF bytes.
 
+    ``alerts`` and the rows of ``sections`` may be lazy iterators; they are
+    consumed while the document is laid out. ``images`` maps the
+    ``VISUAL_ARTIFACTS`` kinds to image files.
+    """
+    buffer = BytesIO() if output is None else output
+    doc = SimpleDocTemplate(str(buffer) if isinstance(buffer, Path) else buffer, pagesize=A4)
+    story = _story(metadata, volatility_output, ml_output, dl_output, alerts, analyst_name, sections, images or {})
+    doc.build(LazyStory(story))
+    if output is not None:
+        return None
+    buffer.seek(0)
+    return buffer.read()
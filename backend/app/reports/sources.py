@@ -0,0 +1,262 @@
+"""
+Report sections streamed from the database.
+
+Rows are fetched in keyset-paginated batches while the PDF is being laid out
+in a worker thread; each batch is a short query run on the event loop
+(``anyio.from_thread``), so the render never holds more than one batch and
+never loads the JSON result blobs.
+"""
+
+import os
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from anyio import from_thread
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.alert import Alert
+from app.models.dll import DllRecord
+from app.models.handle import HandleRecord
+from app.models.network import NetworkConnection
+from app.models.process import ProcessRecord
+
+REPORT_BATCH_SIZE = int(os.getenv("REPORT_BATCH_SIZE", "1000"))
+# Rows per table flowable in the PDF (see app.reports.pdf).
+REPORT_TABLE_CHUNK_ROWS = int(os.getenv("REPORT_TABLE_CHUNK_ROWS", "250"))
+
+_DEFAULT_LIMIT = int(os.getenv("REPORT_MAX_ROWS", "10000"))
+# Maximum rows rendered per section; REPORT_MAX_<SECTION> overrides one section.
+REPORT_SECTION_LIMITS: Dict[str, int] = {
+    name: int(os.getenv(f"REPORT_MAX_{name.upper()}", str(default)))
+    for name, default in (
+        ("alerts", _DEFAULT_LIMIT),
+        ("processes", _DEFAULT_LIMIT),
+        ("connections", _DEFAULT_LIMIT),
+        ("dlls", _DEFAULT_LIMIT),
+        ("handles", 0),
+    )
+}
+
+ALERT_COLUMNS = ["Time", "Process", "PID", "Label", "Anomaly", "Confidence"]
+
+
+class ReportSection:
+    """A titled table whose rows are consumed lazily, up to ``limit`` rows."""
+
+    def __init__(
+        self,
+        title: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        total: Optional[int] = None,
+        limit: Optional[int] = None,
+        col_widths: Optional[Sequence[float]] = None,
+    ) -> None:
+        self.title = title
+        self.columns = list(columns)
+        self.rows = rows
+        self.total = total
+        self.limit = limit
+        self.col_widths = col_widths
+
+
+# (order column, descending)
+OrderKey = Tuple[Any, bool]
+
+
+def _after(keys: Sequence[OrderKey], last: Sequence[Any]):
+    """WHERE clause selecting rows strictly after ``last`` in ``keys`` order."""
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal = [keys[j][0] == last[j] for j in range(i)]
+        step = column < last[i] if descending else column > last[i]
+        clauses.append(and_(*equal, step))
+    return or_(*clauses)
+
+
+async def _fetch(session: AsyncSession, stmt) -> List[Any]:
+    return (await session.execute(stmt)).all()
+
+
+def iter_rows(
+    session: AsyncSession,
+    columns: Sequence[Any],
+    conditions: Sequence[Any],
+    keys: Sequence[OrderKey],
+    batch_size: int = REPORT_BATCH_SIZE,
+) -> Iterator[Tuple[Any, ...]]:
+    """
+    Yield ``columns`` of matching rows in ``keys`` order, one batch query at a
+    time. Must be iterated from a worker thread started by anyio (e.g.
+    ``run_in_threadpool``) while the event loop owning ``session`` runs.
+    """
+    order_by = [column.desc() if descending else column.asc() for column, descending in keys]
+    width = len(columns)
+    last: Optional[Sequence[Any]] = None
+    while True:
+        stmt = select(*columns, *(column for column, _ in keys)).where(*conditions)
+        if last is not None:
+            stmt = stmt.where(_after(keys, last))
+        batch = from_thread.run(_fetch, session, stmt.order_by(*order_by).limit(batch_size))
+        for row in batch:
+            yield tuple(row[:width])
+        if len(batch) < batch_size:
+            return
+        last = batch[-1][width:]
+
+
+async def stream_rows(
+    session: AsyncSession,
+    columns: Sequence[Any],
+    conditions: Sequence[Any],
+    keys: Sequence[OrderKey],
+    batch_size: int = REPORT_BATCH_SIZE,
+) -> AsyncIterator[List[Tuple[Any, ...]]]:
+    """The batches of :func:`iter_rows`, for callers on the event loop."""
+    order_by = [column.desc() if descending else column.asc() for column, descending in keys]
+    width = len(columns)
+    last: Optional[Sequence[Any]] = None
+    while True:
+        stmt = select(*columns, *(column for column, _ in keys)).where(*conditions)
+        if last is not None:
+            stmt = stmt.where(_after(keys, last))
+        batch = await _fetch(session, stmt.order_by(*order_by).limit(batch_size))
+        if batch:
+            yield [tuple(row[:width]) for row in batch]
+        if len(batch) < batch_size:
+            return
+        last = batch[-1][width:]
+
+
+async def section_totals(session: AsyncSession, analysis_id: int, file_id: int) -> Dict[str, int]:
+    """Row count of every section (indexed counts; no rows are loaded)."""
+    queries = {
+        "alerts": select(func.count(Alert.id)).where(Alert.file_id == file_id),
+        "processes": select(func.count(ProcessRecord.id)).where(ProcessRecord.analysis_id == analysis_id),
+        "malicious": select(func.count(ProcessRecord.id)).where(
+            ProcessRecord.analysis_id == analysis_id, ProcessRecord.label == "malicious"
+        ),
+        "connections": select(func.count(NetworkConnection.id)).where(
+            NetworkConnection.analysis_id == analysis_id
+        ),
+        "dlls": select(func.count(DllRecord.id)).where(DllRecord.analysis_id == analysis_id),
+        "handles": select(func.count(HandleRecord.id)).where(HandleRecord.analysis_id == analysis_id),
+    }
+    return {name: await session.scalar(stmt) or 0 for name, stmt in queries.items()}
+
+
+def alerts_from_db(
+    session: AsyncSession, file_id: int, total: int, limit: int
+) -> ReportSection:
+    rows = (
+        (created_at.isoformat(), name, pid, label, score, confidence or 0.0)
+        for created_at, name, pid, label, score, confidence in iter_rows(
+            session,
+            [Alert.created_at, Alert.process_name, Alert.pid, Alert.label, Alert.anomaly_score, Alert.ml_confidence],
+            [Alert.file_id == file_id],
+            [(Alert.created_at, False), (Alert.id, False)],
+            max(1, min(REPORT_BATCH_SIZE, limit)),
+        )
+    )
+    return ReportSection("Alerts", ALERT_COLUMNS, rows, total=total, limit=limit)
+
+
+def sections_from_db(
+    session: AsyncSession,
+    analysis_id: int,
+    totals: Dict[str, int],
+    limits: Dict[str, int] = REPORT_SECTION_LIMITS,
+) -> List[ReportSection]:
+    """Process, connection, DLL and handle listings of an analysis; sections with a zero limit are left out."""
+    specs = [
+        (
+            "processes",
+            "Processes",
+            ["PID", "PPID", "Name", "Threads", "DLLs", "Entropy", "Suspicious", "Anomaly", "Confidence", "Label"],
+            ProcessRecord,
+            [
+                ProcessRecord.pid, ProcessRecord.ppid, ProcessRecord.name, ProcessRecord.threads,
+                ProcessRecord.dll_count, ProcessRecord.entropy, ProcessRecord.suspicious,
+                ProcessRecord.anomaly_score, ProcessRecord.confidence, ProcessRecord.label,
+            ],
+            [(ProcessRecord.anomaly_score, True), (ProcessRecord.id, False)],
+        ),
+        (
+            "connections",
+            "Network connections",
+            ["PID", "Owner", "Proto", "Local", "Remote", "State"],
+            NetworkConnection,
+            [
+                NetworkConnection.pid, NetworkConnection.owner, NetworkConnection.protocol,
+                NetworkConnection.local_ip, NetworkConnection.local_port,
+                NetworkConnection.remote_ip, NetworkConnection.remote_port, NetworkConnection.state,
+            ],
+            [(NetworkConnection.id, False)],
+        ),
+        (
+            "dlls",
+            "Loaded DLLs",
+            ["PID", "Name", "Path", "Base", "Size"],
+            DllRecord,
+            [DllRecord.pid, DllRecord.name, DllRecord.path, DllRecord.base, DllRecord.size],
+            [(DllRecord.pid, False), (DllRecord.id, False)],
+        ),
+        (
+            "handles",
+            "Handles",
+            ["PID", "Type", "Name", "Access"],
+            HandleRecord,
+            [HandleRecord.pid, HandleRecord.handle_type, HandleRecord.name, HandleRecord.granted_access],
+            [(HandleRecord.pid, False), (HandleRecord.id, False)],
+        ),
+    ]
+    sections = []
+    for name, title, headers, model, columns, keys in specs:
+        limit = limits.get(name, 0)
+        if limit <= 0:
+            continue
+        rows = iter_rows(
+            session, columns, [model.analysis_id == analysis_id], keys, min(REPORT_BATCH_SIZE, limit)
+        )
+        if name == "connections":
+            rows = (
+                (pid, owner, proto, _endpoint(lip, lport), _endpoint(rip, rport), state)
+                for pid, owner, proto, lip, lport, rip, rport, state in rows
+            )
+        sections.append(ReportSection(title, headers, rows, total=totals.get(name), limit=limit))
+    return sections
+
+
+def _endpoint(ip: Optional[str], port: Optional[int]) -> str:
+    if ip is None:
+        return ""
+    return f"{ip}:{port}" if port is not None else ip
+
+
+async def process_nodes(session: AsyncSession, analysis_id: int) -> List[Dict[str, Any]]:
+    """Tree fields of every process of an analysis, in pslist order."""
+    result = await session.execute(
+        select(
+            ProcessRecord.pid,
+            ProcessRecord.ppid,
+            ProcessRecord.name,
+            ProcessRecord.suspicious,
+            ProcessRecord.anomaly_score,
+            ProcessRecord.label,
+        )
+        .where(ProcessRecord.analysis_id == analysis_id)
+        .order_by(ProcessRecord.id)
+    )
+    return [dict(row._mapping) for row in result]
+
+
+async def connection_edges(session: AsyncSession, analysis_id: int) -> List[Tuple[Any, ...]]:
+    """``(pid, owner, remote_ip, connections)`` per process and remote address."""
+    count = func.count(NetworkConnection.id)
+    result = await session.execute(
+        select(NetworkConnection.pid, NetworkConnection.owner, NetworkConnection.remote_ip, count)
+        .where(NetworkConnection.analysis_id == analysis_id, NetworkConnection.remote_ip.is_not(None))
+        .group_by(NetworkConnection.pid, NetworkConnection.owner, NetworkConnection.remote_ip)
+        .order_by(count.desc())
+    )
+    return [tuple(row) for row in result]
@@ -1,12 +1,21 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.db.session import get_session
 from app.models.alert import Alert
+from app.models.file import MemoryFile
 from app.schemas.alert import AlertCreate, AlertRead
+from app.utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    keyset_page,
+    split_page,
+)
 
 router = APIRouter()
 
@@ -29,10 +38,41 @@ async def create_alert(payload: AlertCreate, session: AsyncSession = Depends(get
 
 
 @router.get("/alerts/list", response_model=List[AlertRead])
-async def list_alerts(session: AsyncSession = Depends(get_session)):
-    stmt = select(Alert).order_by(Alert.created_at.desc())
+async def list_alerts(
+    response: Response,
+    case_id: Optional[str] = None,
+    label: Optional[str] = Query(default=None, description="benign / malicious"),
+    min_score: Optional[float] = Query(default=None, ge=0.0, le=1.0),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Newest alerts first, one page at a time. When more rows exist, the
+    ``X-Next-Cursor`` response header holds the ``cursor`` for the next page.
+    """
+    stmt = select(Alert)
+    if case_id is not None:
+        stmt = stmt.where(Alert.file_id.in_(select(MemoryFile.id).where(MemoryFile.case_id == case_id)))
+    if label is not None:
+        stmt = stmt.where(Alert.label == label)
+    if min_score is not None:
+        stmt = stmt.where(Alert.anomaly_score >= min_score)
+    if since is not None:
+        stmt = stmt.where(Alert.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(Alert.created_at < until)
+    try:
+        stmt = keyset_page(stmt, Alert, cursor, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
     result = await session.execute(stmt)
-    alerts = result.scalars().all()
+    alerts, next_cursor = split_page(result.scalars().all(), limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return [AlertRead.model_validate(a) for a in alerts]
 
 
@@ -1,25 +1,66 @@
+import asyncio
+import json
+import time
+from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import defer
 
-from app.db.session import get_session
+from app.db.session import AsyncSessionLocal, get_session
 from app.models.analysis import AnalysisResult
 from app.models.file import MemoryFile
-from app.models.alert import Alert
-from app.schemas.analysis import AnalysisResultRead, ProcessPrediction
-from app.utils.chain_of_custody import log_event
-from app.volatility.service import run_volatility_plugins
-from app.ml.pipeline import run_ml_pipeline
-from app.dl.text_model import analyze_strings
+from app.schemas.analysis import AnalysisJobRead, AnalysisResultFields, AnalysisResultRead, ProcessPrediction
+from app.jobs.cache import analysis_cache_key, find_cached_analysis
+from app.jobs.progress import TERMINAL_EVENTS, broker
+from app.jobs.records import load_process_predictions
+from app.jobs.queue import QueueFullError, job_queue
+from app.jobs.results import reuse_cached_analysis
+from app.ml.registry import current_model_version
+from app.utils.metrics import ANALYSES
 
 router = APIRouter()
 
+# Seconds between keep-alives on progress streams; each one also re-checks
+# the job status in the database.
+PROGRESS_HEARTBEAT = 15.0
 
-@router.post("/analyze/{file_id}", response_model=AnalysisResultRead)
-async def analyze_file(file_id: int, session: AsyncSession = Depends(get_session)):
+
+def _to_job_read(analysis: AnalysisResult) -> AnalysisJobRead:
+    return AnalysisJobRead(
+        job_id=analysis.id,
+        file_id=analysis.file_id,
+        status=analysis.status,
+        summary=analysis.summary,
+        max_anomaly_score=analysis.max_anomaly_score or 0.0,
+        created_at=analysis.created_at,
+        stage_timings=analysis.stage_timings,
+    )
+
+
+@router.post(
+    "/analyze/{file_id}",
+    response_model=AnalysisJobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def analyze_file(
+    file_id: int,
+    force: bool = Query(default=False, description="Re-run even if a cached result exists."),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Queue an analysis of the dump and return immediately. Poll
+    ``/analyze/jobs/{job_id}`` for progress and ``/results/{file_id}`` for the
+    completed result.
+
+    Results are cached by (SHA-256, plugin set, model version, keyword set,
+    image string scan on/off): re-submitting an image that was already
+    analyzed with the same settings completes immediately.
+    """
     file_obj = await session.get(MemoryFile, file_id)
     if not file_obj:
         raise HTTPException(
@@ -34,108 +75,218 @@ async def analyze_file(file_id: int, session: AsyncSession = Depends(get_session
             detail="Stored dump path does not exist on server.",
         )
 
-    try:
-        volatility_output = run_volatility_plugins(dump_path)
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Volatility analysis failed: {exc}",
-        ) from exc
-
-    # ML pipeline
-    ml_output = run_ml_pipeline(volatility_output)
-
-    # DL text model on cmdline strings
-    cmd_strings = [c.get("cmdline", "") for c in volatility_output.get("cmdline", []) if c]
-    dl_output = analyze_strings(cmd_strings)
+    model_version = current_model_version()
+    cache_key = analysis_cache_key(file_obj.sha256, model_version=model_version)
+    if not force:
+        cached = await find_cached_analysis(session, cache_key, file_obj.id)
+        if cached is not None:
+            if cached.file_id != file_obj.id:
+                cached = await reuse_cached_analysis(session, cached, file_obj.id)
+            ANALYSES.inc(status="cached")
+            return _to_job_read(cached)
 
-    max_anomaly_score = float(ml_output.get("max_anomaly_score", 0.0))
+    if job_queue.depth >= job_queue.max_depth:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analysis queue is full, retry later.",
+            headers={"Retry-After": "30"},
+        )
 
     analysis = AnalysisResult(
         file_id=file_obj.id,
-        status="completed",
-        summary="Automated analysis completed.",
-        volatility_output=volatility_output,
-        ml_output=ml_output,
-        dl_output=dl_output,
-        max_anomaly_score=max_anomaly_score,
+        status="queued",
+        summary="Analysis queued.",
+        cache_key=cache_key,
+        worker_id=job_queue.worker_id,
+        heartbeat_at=datetime.utcnow(),
     )
     session.add(analysis)
     await session.commit()
     await session.refresh(analysis)
 
-    await log_event(
-        session,
-        event_type="analysis",
-        description="Automated analysis executed.",
-        file_id=file_obj.id,
-    )
+    try:
+        job_queue.submit(analysis.id, file_obj.id, str(dump_path), model_version)
+    except QueueFullError as exc:
+        analysis.status = "failed"
+        analysis.summary = str(exc)
+        await session.commit()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analysis queue is full, retry later.",
+            headers={"Retry-After": "30"},
+        ) from exc
 
-    # ALERT LOGIC: anomaly_score > 0.7 OR prediction_label == 'malicious'
-    proc_preds: List[dict] = ml_output.get("processes") or []
-    alerts: List[Alert] = []
-    for p in proc_preds:
-        if p["anomaly_score"] > 0.7 or p["label"] == "malicious":
-            alert = Alert(
-                file_id=file_obj.id,
-                process_name=p["name"],
-                pid=p["pid"],
-                anomaly_score=p["anomaly_score"],
-                ml_confidence=p["confidence"],
-                label=p["label"],
-                message=f"Malicious or anomalous process detected: {p['name']} (PID {p['pid']})",
-            )
-            session.add(alert)
-            alerts.append(alert)
+    return _to_job_read(analysis)
 
-    if alerts:
-        await session.commit()
-        for a in alerts:
-            await log_event(
-                session,
-                event_type="alert",
-                description=(
-                    f"Alert triggered for process {a.process_name} "
-                    f"(PID {a.pid}) anomaly={a.anomaly_score:.2f}"
-                ),
-                file_id=file_obj.id,
-            )
 
-    processes = [
-        ProcessPrediction(
-            pid=p["pid"],
-            ppid=p["ppid"],
-            name=p["name"],
-            anomaly_score=p["anomaly_score"],
-            confidence=p["confidence"],
-            label=p["label"],
-            features=p["features"],
+@router.get("/analyze/jobs/{job_id}", response_model=AnalysisJobRead)
+async def get_job_status(job_id: int, session: AsyncSession = Depends(get_session)):
+    analysis = await session.get(AnalysisResult, job_id)
+    if not analysis:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis job not found.",
         )
-        for p in proc_preds
-    ]
+    return _to_job_read(analysis)
 
-    return AnalysisResultRead(
-        id=analysis.id,
-        file_id=analysis.file_id,
-        status=analysis.status,
-        summary=analysis.summary,
-        volatility_output=analysis.volatility_output,
-        ml_output=analysis.ml_output,
-        dl_output=analysis.dl_output,
-        max_anomaly_score=analysis.max_anomaly_score,
-        created_at=analysis.created_at,
-        processes=processes,
+
+async def _job_state(job_id: int) -> Optional[Dict[str, Any]]:
+    # A short-lived session: streams stay open for minutes.
+    async with AsyncSessionLocal() as session:
+        analysis = await session.get(AnalysisResult, job_id)
+        if analysis is None:
+            return None
+        return {
+            "status": analysis.status,
+            "summary": analysis.summary,
+            "max_anomaly_score": analysis.max_anomaly_score or 0.0,
+            "stage_timings": analysis.stage_timings,
+        }
+
+
+async def _job_events(job_id: int, after: int = 0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    Progress events of a job with an id above ``after``, until it completes
+    or fails; ``None`` marks a keep-alive. A job this process knows nothing
+    about (finished long ago, or running in another worker) is followed
+    through its database status instead.
+    """
+    async with broker.subscribe(job_id) as (history, queue):
+        for message in history:
+            if message["id"] > after:
+                yield message
+        if any(m["event"] in TERMINAL_EVENTS for m in history):
+            return
+        while True:
+            state = await _job_state(job_id)
+            if state is not None and state["status"] in TERMINAL_EVENTS and not broker.history(job_id):
+                yield {"id": after + 1, "job_id": job_id, "event": state["status"], "time": time.time(), "data": state}
+                return
+            try:
+                message = await asyncio.wait_for(queue.get(), PROGRESS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            yield message
+            if message["event"] in TERMINAL_EVENTS:
+                return
+            # Drain whatever else is already waiting before re-checking the DB.
+            while not queue.empty():
+                message = queue.get_nowait()
+                yield message
+                if message["event"] in TERMINAL_EVENTS:
+                    return
+
+
+async def _require_job(job_id: int) -> None:
+    if await _job_state(job_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis job not found.",
+        )
+
+
+@router.get("/analyze/jobs/{job_id}/events")
+async def stream_job_events(job_id: int, last_event_id: Optional[int] = Header(None)):
+    """
+    Server-Sent Events stream of a job's progress: ``queued``, ``running``,
+    ``plugin_started``/``plugin_finished``, ``stage_started``/``stage_finished``,
+    ``processes_scored``, ``pipeline_finished``, one ``alert`` per alert, then
+    ``completed`` or ``failed``, after which the stream ends. Reconnecting
+    clients (``Last-Event-ID``) resume after the last event they saw.
+    """
+    await _require_job(job_id)
+
+    async def body() -> AsyncIterator[str]:
+        async for message in _job_events(job_id, after=last_event_id or 0):
+            if message is None:
+                yield ": keep-alive\n\n"
+                continue
+            data = json.dumps(message, default=str)
+            yield f"id: {message['id']}\nevent: {message['event']}\ndata: {data}\n\n"
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
-@router.get("/results/{file_id}", response_model=AnalysisResultRead)
-async def get_results(file_id: int, session: AsyncSession = Depends(get_session)):
+@router.websocket("/analyze/jobs/{job_id}/ws")
+async def job_events_websocket(websocket: WebSocket, job_id: int, after: int = 0):
+    """The events of :func:`stream_job_events` as JSON WebSocket messages."""
+    if await _job_state(job_id) is None:
+        await websocket.close(code=4404, reason="Analysis job not found.")
+        return
+    await websocket.accept()
+    try:
+        async for message in _job_events(job_id, after=after):
+            if message is None:
+                await websocket.send_json({"event": "keep-alive"})
+            else:
+                await websocket.send_text(json.dumps(message, default=str))
+    except WebSocketDisconnect:
+        return
+    await websocket.close()
+
+
+# Loaded only when a requested field needs them.
+_RESULT_BLOBS = {
+    "volatility_output": ("volatility_output",),
+    "ml_output": ("ml_output",),
+    "dl_output": ("dl_output",),
+}
+
+
+def _result_fields(fields: Optional[str], slim: bool) -> List[str]:
+    all_fields = list(AnalysisResultRead.model_fields)
+    if fields is None:
+        selected = all_fields
+    else:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = sorted(set(selected) - set(all_fields))
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}.",
+            )
+    if slim:
+        selected = [f for f in selected if f not in ("volatility_output", "processes")]
+    return selected
+
+
+@router.get("/results/{file_id}", response_model=AnalysisResultFields, response_model_exclude_unset=True)
+async def get_results(
+    file_id: int,
+    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return"),
+    slim: bool = Query(
+        default=False,
+        description="Leave out volatility_output and the process list (also the copy in ml_output)",
+    ),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Latest completed analysis of a file. ``processes`` is read from the
+    process table and lists every process; the JSON outputs only hold
+    summaries. For large analyses ask for ``slim`` or a few ``fields`` and
+    page or export the rows from ``/analyses/{id}/processes`` and
+    ``/analyses/{id}/export/{table}``. Unrequested JSON columns are not
+    even loaded.
+    """
+    selected = _result_fields(fields, slim)
+    deferred = [
+        defer(getattr(AnalysisResult, column))
+        for column, needed_by in _RESULT_BLOBS.items()
+        if not any(f in selected for f in needed_by)
+    ]
     stmt = (
         select(AnalysisResult)
-        .where(AnalysisResult.file_id == file_id)
+        .where(AnalysisResult.file_id == file_id, AnalysisResult.status == "completed")
         .order_by(AnalysisResult.created_at.desc())
         .limit(1)
     )
+    if deferred:
+        stmt = stmt.options(*deferred)
     result = await session.execute(stmt)
     analysis = result.scalar_one_or_none()
     if not analysis:
@@ -144,33 +295,32 @@ async def get_results(file_id: int, session: AsyncSession = Depends(get_session)
             detail="No analysis results found for this file.",
         )
 
-    ml_output = analysis.ml_output or {}
-    proc_preds: List[dict] = ml_output.get("processes") or []
-    processes = [
-        ProcessPrediction(
-            pid=p["pid"],
-            ppid=p["ppid"],
-            name=p["name"],
-            anomaly_score=p["anomaly_score"],
-            confidence=p["confidence"],
-            label=p["label"],
-            features=p["features"],
-        )
-        for p in proc_preds
-    ]
-
-    return AnalysisResultRead(
-        id=analysis.id,
-        file_id=analysis.file_id,
-        status=analysis.status,
-        summary=analysis.summary,
-        volatility_output=analysis.volatility_output,
-        ml_output=analysis.ml_output,
-        dl_output=analysis.dl_output,
-        max_anomaly_score=analysis.max_anomaly_score,
-        created_at=analysis.created_at,
-        processes=processes,
-    )
-
-
+    payload: Dict[str, Any] = {}
+    for field in selected:
+        if field == "processes":
+            proc_preds = await load_process_predictions(session, analysis.id)
+            if not proc_preds:
+                # Analyses stored before the process table kept them in ml_output.
+                ml_output = await session.scalar(
+                    select(AnalysisResult.ml_output).where(AnalysisResult.id == analysis.id)
+                )
+                proc_preds = (ml_output or {}).get("processes") or []
+            payload[field] = [
+                ProcessPrediction(
+                    pid=p["pid"],
+                    ppid=p["ppid"],
+                    name=p["name"],
+                    anomaly_score=p["anomaly_score"],
+                    confidence=p["confidence"],
+                    label=p["label"],
+                    features=p["features"],
+                )
+                for p in proc_preds
+            ]
+        elif field == "ml_output" and slim and analysis.ml_output is not None:
+            payload[field] = {k: v for k, v in analysis.ml_output.items() if k != "processes"}
+        else:
+            payload[field] = getattr(analysis, field)
 
+    # Fields that were not selected stay unset and are left out.
+    return AnalysisResultFields(**payload)
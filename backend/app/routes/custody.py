@@ -0,0 +1,40 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_session
+from app.models.file import MemoryFile
+from app.schemas.custody import CustodyLogRead, CustodyVerification
+from app.utils.chain_of_custody import list_logs_for_file, verify_chain
+
+router = APIRouter()
+
+
+async def _ensure_file(session: AsyncSession, file_id: int) -> None:
+    if not await session.get(MemoryFile, file_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found.",
+        )
+
+
+@router.get("/custody/{file_id}", response_model=List[CustodyLogRead])
+async def get_custody_log(file_id: int, session: AsyncSession = Depends(get_session)):
+    await _ensure_file(session, file_id)
+    logs = await list_logs_for_file(session, file_id)
+    return [CustodyLogRead.model_validate(log) for log in logs]
+
+
+@router.post("/custody/{file_id}/verify", response_model=CustodyVerification)
+async def verify_custody_log(
+    file_id: int,
+    full: bool = Query(default=False, description="Re-verify from the first entry, ignoring checkpoints."),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Verify the hash chain of a file's custody log. Only entries written
+    after the newest valid checkpoint are re-hashed unless ``full`` is set.
+    """
+    await _ensure_file(session, file_id)
+    return CustodyVerification(**await verify_chain(session, file_id, full=full))
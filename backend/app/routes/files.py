@@ -1,21 +1,34 @@
+from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status, Form
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status, Form
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import undefer
+from starlette.concurrency import run_in_threadpool
 
 from app.db.session import get_session
 from app.models.file import MemoryFile
-from app.schemas.file import MemoryFileRead
-from app.utils.hashing import sha256_file
+from app.schemas.file import ChunkMismatch, HashValidationRead, MemoryFileRead
 from app.utils.chain_of_custody import log_event
+from app.utils.hashing import chunk_indices, mismatched_chunks, multi_digest_file
+from app.utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    keyset_page,
+    split_page,
+)
+from app.utils.storage import (
+    UPLOAD_DIR,
+    is_allowed_dump_name,
+    store_memory_file,
+    stream_upload_to_temp,
+)
 
 router = APIRouter()
 
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True, parents=True)
-
 
 @router.post("/upload", response_model=MemoryFileRead)
 async def upload_memory_dump(
@@ -23,72 +36,150 @@ async def upload_memory_dump(
     file: UploadFile = File(...),
     session: AsyncSession = Depends(get_session),
 ):
-    if not (file.filename.endswith(".raw") or file.filename.endswith(".vmem")):
+    if not is_allowed_dump_name(file.filename):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Only .raw and .vmem memory dump files are allowed.",
         )
 
-    contents = await file.read()
-    size_bytes = len(contents)
+    # Stream the body to a temp file and hash it in the same pass, so memory
+    # stays flat no matter how large the dump is.
+    tmp_path, size_bytes, digests, leaves = await stream_upload_to_temp(file, UPLOAD_DIR)
     if size_bytes == 0:
+        tmp_path.unlink(missing_ok=True)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Empty file is not allowed.",
         )
 
-    target_path = UPLOAD_DIR / file.filename
-    with target_path.open("wb") as f:
-        f.write(contents)
-
-    sha256 = sha256_file(target_path)
-
-    mem_file = MemoryFile(
+    mem_file = await store_memory_file(
+        session,
         case_id=case_id,
         filename=file.filename,
-        stored_path=str(target_path),
+        tmp_path=tmp_path,
         size_bytes=size_bytes,
-        sha256=sha256,
-    )
-    session.add(mem_file)
-    await session.commit()
-    await session.refresh(mem_file)
-
-    await log_event(
-        session,
-        event_type="upload",
-        description=f"File uploaded: {mem_file.filename} (SHA-256={sha256})",
-        file_id=mem_file.id,
+        digests=digests,
+        leaves=leaves,
     )
 
-    return MemoryFileRead(
-        id=mem_file.id,
-        case_id=mem_file.case_id,
-        filename=mem_file.filename,
-        size_bytes=mem_file.size_bytes,
-        sha256=mem_file.sha256,
-        stored_path=mem_file.stored_path,
-        created_at=mem_file.created_at,
-    )
+    return MemoryFileRead.model_validate(mem_file)
 
 
 @router.get("/files", response_model=List[MemoryFileRead])
-async def list_files(session: AsyncSession = Depends(get_session)):
-    stmt = select(MemoryFile).order_by(MemoryFile.created_at.desc())
+async def list_files(
+    response: Response,
+    case_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_session),
+):
+    """Newest files first, paginated like ``/alerts/list`` (``X-Next-Cursor``)."""
+    stmt = select(MemoryFile)
+    if case_id is not None:
+        stmt = stmt.where(MemoryFile.case_id == case_id)
+    if since is not None:
+        stmt = stmt.where(MemoryFile.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(MemoryFile.created_at < until)
+    try:
+        stmt = keyset_page(stmt, MemoryFile, cursor, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
     result = await session.execute(stmt)
-    files = result.scalars().all()
-    return [
-        MemoryFileRead(
-            id=f.id,
-            case_id=f.case_id,
-            filename=f.filename,
-            size_bytes=f.size_bytes,
-            sha256=f.sha256,
-            stored_path=f.stored_path,
-            created_at=f.created_at,
+    files, next_cursor = split_page(result.scalars().all(), limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [MemoryFileRead.model_validate(f) for f in files]
+
+
+@router.post("/hash_validation/{file_id}", response_model=HashValidationRead)
+async def validate_hash(
+    file_id: int,
+    offset: Optional[int] = Query(default=None, ge=0, description="Start of a suspected damaged range."),
+    length: Optional[int] = Query(default=None, gt=0, description="Length of the range."),
+    digests: bool = Query(default=False, description="Also recompute MD5/SHA-1/SHA-256 of the whole dump."),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Re-verify a stored dump against the hashes recorded at intake.
+
+    Chunks are re-hashed in parallel and compared with the stored Merkle
+    leaves; ``offset``/``length`` restrict the check to the chunks covering
+    that range. Files stored without a Merkle tree fall back to the
+    whole-file digests.
+    """
+    stmt = select(MemoryFile).options(undefer(MemoryFile.merkle_leaves)).where(MemoryFile.id == file_id)
+    mem_file = await session.scalar(stmt)
+    if not mem_file:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found.",
+        )
+    path = Path(mem_file.stored_path)
+    if not path.exists():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Stored dump path does not exist on server.",
         )
-        for f in files
-    ]
+
+    start = offset or 0
+    span = length if length is not None else max(0, mem_file.size_bytes - start)
+    report = HashValidationRead(
+        file_id=file_id,
+        valid=True,
+        method="merkle",
+        checked_offset=start,
+        checked_bytes=0,
+        chunks_checked=0,
+    )
+    actual_size = path.stat().st_size
+    if actual_size != mem_file.size_bytes:
+        report.valid = False
+        report.detail = f"Size changed: {actual_size} bytes on disk, {mem_file.size_bytes} at intake."
+
+    leaves = mem_file.merkle_leaves
+    if leaves and report.valid:
+        chunk_size = mem_file.merkle_chunk_size
+        indices = chunk_indices(start, span, chunk_size)
+        bad = await run_in_threadpool(mismatched_chunks, path, leaves, chunk_size, indices)
+        report.chunks_checked = len(indices)
+        report.checked_offset = indices.start * chunk_size if indices else start
+        report.checked_bytes = max(0, min(indices.stop * chunk_size, actual_size) - report.checked_offset)
+        report.mismatched_chunks = [
+            ChunkMismatch(index=i, offset=i * chunk_size, length=min(chunk_size, actual_size - i * chunk_size))
+            for i in bad
+        ]
+        report.valid = not bad
+
+    if digests or (not leaves and report.valid):
+        expected = {"md5": mem_file.md5, "sha1": mem_file.sha1, "sha256": mem_file.sha256}
+        expected = {name: value for name, value in expected.items() if value}
+        report.digests = await run_in_threadpool(multi_digest_file, path, tuple(expected))
+        report.method = "merkle+digest" if leaves else "digest"
+        report.checked_offset, report.checked_bytes = 0, actual_size
+        if report.digests != expected:
+            report.valid = False
+            report.detail = report.detail or "Whole-file digest mismatch."
+
+    if report.valid:
+        outcome = "passed"
+    elif report.mismatched_chunks:
+        outcome = f"FAILED ({len(report.mismatched_chunks)} chunk(s) changed)"
+    else:
+        outcome = f"FAILED ({report.detail})"
+    await log_event(
+        session,
+        event_type="hash_validation",
+        description=(
+            f"Hash validation ({report.method}) of bytes {report.checked_offset}-"
+            f"{report.checked_offset + report.checked_bytes} {outcome}."
+        ),
+        file_id=file_id,
+    )
+    return report
 
 
 
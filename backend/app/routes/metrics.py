@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+
+from app.jobs.queue import job_queue
+from app.utils.metrics import CONTENT_TYPE, QUEUE_DEPTH, REGISTRY
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus text exposition of this process's metrics."""
+    QUEUE_DEPTH.set(job_queue.depth)
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
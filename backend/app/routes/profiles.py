@@ -0,0 +1,42 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import FileResponse
+
+from app.utils.profiling import PROFILE_FILES, PROFILE_TOKEN, list_profiles, profile_file, token_matches
+
+router = APIRouter()
+
+
+def _require_token(token: Optional[str]) -> None:
+    if not PROFILE_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="PROFILE_TOKEN is not set on the server; sampled profiles are only written to PROFILE_DIR.",
+        )
+    if not token_matches(token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="A valid X-Profile-Token is required (set PROFILE_TOKEN on the server).",
+        )
+
+
+@router.get("/profiles")
+async def get_profiles(x_profile_token: Optional[str] = Header(None)) -> List[dict]:
+    """Stored request profiles, newest first."""
+    _require_token(x_profile_token)
+    return list_profiles()
+
+
+@router.get("/profiles/{profile_id}/{kind}")
+async def download_profile(profile_id: str, kind: str, x_profile_token: Optional[str] = Header(None)):
+    """``kind`` is ``prof`` (cProfile/pstats) or ``collapsed`` (flamegraph stacks)."""
+    _require_token(x_profile_token)
+    path = profile_file(profile_id, kind)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile not found (kinds: {', '.join(PROFILE_FILES)}).",
+        )
+    media_type = "text/plain" if kind == "collapsed" else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=path.name)
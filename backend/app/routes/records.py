@@ -0,0 +1,217 @@
+from typing import Optional, Type
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_session
+from app.models.analysis import AnalysisResult
+from app.models.dll import DllRecord
+from app.models.handle import HandleRecord
+from app.models.network import NetworkConnection
+from app.models.process import ProcessRecord
+from app.reports.exports import EXPORT_FORMATS, EXPORT_TABLES, export_chunks, parquet_available
+from app.schemas.records import (
+    DllRecordRead,
+    HandleRecordRead,
+    NetworkConnectionRead,
+    Page,
+    ProcessRecordRead,
+)
+
+router = APIRouter()
+
+MAX_PAGE_SIZE = 1000
+
+
+async def _ensure_analysis(session: AsyncSession, analysis_id: int) -> None:
+    # Select only the id: loading the row would pull in the JSON outputs.
+    found = await session.scalar(select(AnalysisResult.id).where(AnalysisResult.id == analysis_id))
+    if found is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis not found.",
+        )
+
+
+async def _page(
+    session: AsyncSession,
+    model: Type,
+    schema: Type[BaseModel],
+    conditions: list,
+    order_by: tuple,
+    limit: int,
+    offset: int,
+) -> Page:
+    total = await session.scalar(select(func.count()).select_from(model).where(*conditions))
+    rows = await session.scalars(
+        select(model).where(*conditions).order_by(*order_by).limit(limit).offset(offset)
+    )
+    return Page(
+        items=[schema.model_validate(r) for r in rows],
+        total=total or 0,
+        limit=limit,
+        offset=offset,
+    )
+
+
+@router.get("/analyses/{analysis_id}/processes", response_model=Page[ProcessRecordRead])
+async def list_processes(
+    analysis_id: int,
+    label: Optional[str] = Query(default=None, description="benign / malicious"),
+    min_score: Optional[float] = Query(default=None, ge=0.0, le=1.0),
+    max_score: Optional[float] = Query(default=None, ge=0.0, le=1.0),
+    pid: Optional[int] = None,
+    limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(default=0, ge=0),
+    session: AsyncSession = Depends(get_session),
+):
+    """Scored processes of an analysis, highest anomaly score first."""
+    await _ensure_analysis(session, analysis_id)
+    conditions = [ProcessRecord.analysis_id == analysis_id]
+    if label is not None:
+        conditions.append(ProcessRecord.label == label)
+    if min_score is not None:
+        conditions.append(ProcessRecord.anomaly_score >= min_score)
+    if max_score is not None:
+        conditions.append(ProcessRecord.anomaly_score <= max_score)
+    if pid is not None:
+        conditions.append(ProcessRecord.pid == pid)
+    return await _page(
+        session,
+        ProcessRecord,
+        ProcessRecordRead,
+        conditions,
+        (ProcessRecord.anomaly_score.desc(), ProcessRecord.id),
+        limit,
+        offset,
+    )
+
+
+@router.get("/analyses/{analysis_id}/connections", response_model=Page[NetworkConnectionRead])
+async def list_connections(
+    analysis_id: int,
+    pid: Optional[int] = None,
+    remote_ip: Optional[str] = None,
+    remote_port: Optional[int] = None,
+    limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(default=0, ge=0),
+    session: AsyncSession = Depends(get_session),
+):
+    await _ensure_analysis(session, analysis_id)
+    conditions = [NetworkConnection.analysis_id == analysis_id]
+    if pid is not None:
+        conditions.append(NetworkConnection.pid == pid)
+    if remote_ip is not None:
+        conditions.append(NetworkConnection.remote_ip == remote_ip)
+    if remote_port is not None:
+        conditions.append(NetworkConnection.remote_port == remote_port)
+    return await _page(
+        session,
+        NetworkConnection,
+        NetworkConnectionRead,
+        conditions,
+        (NetworkConnection.id,),
+        limit,
+        offset,
+    )
+
+
+@router.get("/analyses/{analysis_id}/dlls", response_model=Page[DllRecordRead])
+async def list_dlls(
+    analysis_id: int,
+    pid: Optional[int] = None,
+    name: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(default=0, ge=0),
+    session: AsyncSession = Depends(get_session),
+):
+    await _ensure_analysis(session, analysis_id)
+    conditions = [DllRecord.analysis_id == analysis_id]
+    if pid is not None:
+        conditions.append(DllRecord.pid == pid)
+    if name is not None:
+        conditions.append(DllRecord.name == name)
+    return await _page(
+        session,
+        DllRecord,
+        DllRecordRead,
+        conditions,
+        (DllRecord.pid, DllRecord.id),
+        limit,
+        offset,
+    )
+
+
+@router.get("/analyses/{analysis_id}/handles", response_model=Page[HandleRecordRead])
+async def list_handles(
+    analysis_id: int,
+    pid: Optional[int] = None,
+    handle_type: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(default=0, ge=0),
+    session: AsyncSession = Depends(get_session),
+):
+    await _ensure_analysis(session, analysis_id)
+    conditions = [HandleRecord.analysis_id == analysis_id]
+    if pid is not None:
+        conditions.append(HandleRecord.pid == pid)
+    if handle_type is not None:
+        conditions.append(HandleRecord.handle_type == handle_type)
+    return await _page(
+        session,
+        HandleRecord,
+        HandleRecordRead,
+        conditions,
+        (HandleRecord.pid, HandleRecord.id),
+        limit,
+        offset,
+    )
+
+
+@router.get("/analyses/{analysis_id}/export/{table}")
+async def export_table(
+    analysis_id: int,
+    table: str,
+    format: str = Query(default="ndjson", description="ndjson / csv / parquet"),
+    compress: bool = Query(default=False, description="gzip the NDJSON or CSV output"),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Every row of ``processes``, ``connections`` or ``alerts`` (of the analysed
+    file) as a streamed download, in the order of the paginated listings.
+    Rows are read and encoded batch by batch, so memory stays flat however
+    large the analysis is.
+    """
+    if table not in EXPORT_TABLES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown table; expected one of: {', '.join(EXPORT_TABLES)}.",
+        )
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown format; expected one of: {', '.join(EXPORT_FORMATS)}.",
+        )
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export requires pyarrow.",
+        )
+    file_id = await session.scalar(select(AnalysisResult.file_id).where(AnalysisResult.id == analysis_id))
+    if file_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis not found.",
+        )
+
+    media_type, extension = EXPORT_FORMATS[format]
+    compress = compress and format != "parquet"  # Parquet compresses its pages itself.
+    filename = f"analysis_{analysis_id}_{table}.{extension}" + (".gz" if compress else "")
+    return StreamingResponse(
+        export_chunks(table, format, analysis_id, file_id, compress=compress),
+        media_type="application/gzip" if compress else media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,23 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from functools import partial
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.orm import load_only
 
 from app.db.session import get_session
 from app.models.file import MemoryFile
 from app.models.analysis import AnalysisResult
 from app.models.alert import Alert
-from app.reports.pdf import build_pdf_report
+from app.reports.cache import (
+    MAX_ANALYST_NAME,
+    ensure_report,
+    mark_used,
+    normalize_analyst_name,
+    report_cache_key,
+    report_path,
+)
+from app.reports.graphs import GRAPH_KINDS, GRAPH_RENDER_VERSION, ensure_graph
+from app.reports.sources import (
+    REPORT_SECTION_LIMITS,
+    REPORT_TABLE_CHUNK_ROWS,
+    alerts_from_db,
+    section_totals,
+    sections_from_db,
+)
 from app.utils.chain_of_custody import log_event
+from app.utils.metrics import timed
 
 router = APIRouter()
 
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
 @router.get("/report/{file_id}")
 async def get_report(
     file_id: int,
-    analyst_name: str = Query(default=""),
+    request: Request,
+    analyst_name: str = Query(default="", max_length=MAX_ANALYST_NAME),
     session: AsyncSession = Depends(get_session),
 ):
+    """
+    PDF report for the latest completed analysis of a file.
+
+    Reports are rendered once per (analysis, alert set, analyst name), off the
+    event loop, and then served from disk with an ``ETag``; a matching
+    ``If-None-Match`` gets ``304 Not Modified``. Whitespace in the analyst
+    name is collapsed, so variants of one name share a report.
+    """
+    analyst_name = normalize_analyst_name(analyst_name)
     file_obj = await session.get(MemoryFile, file_id)
     if not file_obj:
         raise HTTPException(
@@ -25,63 +63,129 @@ async def get_report(
             detail="File not found.",
         )
 
-    stmt = (
-        select(AnalysisResult)
-        .where(AnalysisResult.file_id == file_id)
+    # Only the id is needed to key the cache; the JSON outputs are loaded
+    # only when the report actually has to be rendered.
+    analysis_id = await session.scalar(
+        select(AnalysisResult.id)
+        .where(AnalysisResult.file_id == file_id, AnalysisResult.status == "completed")
         .order_by(AnalysisResult.created_at.desc())
         .limit(1)
     )
-    result = await session.execute(stmt)
-    analysis = result.scalar_one_or_none()
-    if not analysis:
+    if analysis_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No analysis results found for this file.",
         )
 
-    stmt_alerts = select(Alert).where(Alert.file_id == file_id).order_by(Alert.created_at.asc())
-    alerts_res = await session.execute(stmt_alerts)
-    alerts = alerts_res.scalars().all()
-
-    metadata = {
-        "filename": file_obj.filename,
-        "sha256": file_obj.sha256,
-        "size_bytes": file_obj.size_bytes,
-        "case_id": file_obj.case_id,
-        "timestamp": file_obj.created_at.isoformat(),
+    # Alerts are append-only, so (count, max id) identifies the alert set.
+    alert_count, last_alert_id = (
+        await session.execute(
+            select(func.count(Alert.id), func.max(Alert.id)).where(Alert.file_id == file_id)
+        )
+    ).one()
+    layout = {
+        "limits": REPORT_SECTION_LIMITS,
+        "chunk_rows": REPORT_TABLE_CHUNK_ROWS,
+        "graphs": GRAPH_RENDER_VERSION,
     }
+    key = report_cache_key(analysis_id, f"{alert_count}:{last_alert_id}", analyst_name, layout)
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
 
-    pdf_bytes = build_pdf_report(
-        metadata=metadata,
-        volatility_output=analysis.volatility_output,
-        ml_output=analysis.ml_output,
-        dl_output=analysis.dl_output,
-        alerts=[
-            {
-                "process_name": a.process_name,
-                "pid": a.pid,
-                "anomaly_score": a.anomaly_score,
-                "ml_confidence": a.ml_confidence,
-                "label": a.label,
-                "created_at": a.created_at.isoformat(),
-            }
-            for a in alerts
-        ],
-        analyst_name=analyst_name,
-    )
+    path = report_path(key)
+    if _etag_matches(request, etag) and mark_used(path):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-    await log_event(
-        session,
-        event_type="report",
-        description="PDF forensic report generated.",
-        file_id=file_obj.id,
-    )
+    if not mark_used(path):
+        # Listings are streamed from the normalized tables while the PDF is
+        # laid out; the large JSON result columns are never loaded.
+        analysis = (
+            await session.execute(
+                select(AnalysisResult)
+                .options(load_only(AnalysisResult.id, AnalysisResult.max_anomaly_score, AnalysisResult.dl_output))
+                .where(AnalysisResult.id == analysis_id)
+            )
+        ).scalar_one()
+        totals = await section_totals(session, analysis_id, file_id)
+        images = {kind: await ensure_graph(session, analysis_id, kind) for kind in GRAPH_KINDS}
+
+        metadata = {
+            "filename": file_obj.filename,
+            "md5": file_obj.md5,
+            "sha1": file_obj.sha1,
+            "sha256": file_obj.sha256,
+            "merkle_root": file_obj.merkle_root,
+            "size_bytes": file_obj.size_bytes,
+            "case_id": file_obj.case_id,
+            "timestamp": file_obj.created_at.isoformat(),
+        }
+
+        # ReportLab is loaded on the first render (or by the startup warm-up).
+        from app.reports.pdf import build_pdf_report
+
+        render = timed("report.render")(partial(
+            build_pdf_report,
+            metadata=metadata,
+            volatility_output=None,
+            ml_output={
+                "max_anomaly_score": analysis.max_anomaly_score or 0.0,
+                "any_malicious": totals["malicious"] > 0,
+            },
+            dl_output=analysis.dl_output,
+            alerts=alerts_from_db(session, file_id, totals["alerts"], REPORT_SECTION_LIMITS["alerts"]),
+            sections=sections_from_db(session, analysis_id, totals),
+            images=images,
+            analyst_name=analyst_name,
+        ))
+        rendered = await ensure_report(key, lambda output: render(output=output))
 
-    return Response(
-        content=pdf_bytes,
+        if rendered:
+            await log_event(
+                session,
+                event_type="report",
+                description=f"PDF forensic report generated (report id {key[:16]}).",
+                file_id=file_obj.id,
+            )
+
+    return FileResponse(
+        path,
         media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="report_{file_id}.pdf"'},
+        filename=f"report_{file_id}.pdf",
+        headers=headers,
     )
 
 
+@router.get("/analyses/{analysis_id}/graphs/{kind}")
+async def get_analysis_graph(
+    analysis_id: int,
+    kind: str,
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Process tree (``process_tree``) or network graph (``network``) of a
+    completed analysis as a PNG. Rendered once and cached; the PDF report
+    embeds the same images.
+    """
+    if kind not in GRAPH_KINDS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown graph; expected one of: {', '.join(GRAPH_KINDS)}.",
+        )
+    found = await session.scalar(
+        select(AnalysisResult.id).where(
+            AnalysisResult.id == analysis_id, AnalysisResult.status == "completed"
+        )
+    )
+    if found is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Completed analysis not found.",
+        )
 
+    etag = f'"{analysis_id}-{kind}-v{GRAPH_RENDER_VERSION}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    path = await ensure_graph(session, analysis_id, kind)
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(path, media_type="image/png", headers=headers)
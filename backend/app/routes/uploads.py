@@ -0,0 +1,240 @@
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_session
+from app.models.upload import UploadSession
+from app.schemas.file import MemoryFileRead
+from app.schemas.upload import UploadSessionCreate, UploadSessionRead
+from app.utils import chunked_upload
+from app.utils.storage import is_allowed_dump_name, store_memory_file
+
+router = APIRouter()
+
+
+def _to_read(upload: UploadSession) -> UploadSessionRead:
+    ranges = upload.received_ranges or []
+    return UploadSessionRead(
+        id=upload.id,
+        case_id=upload.case_id,
+        filename=upload.filename,
+        total_size=upload.total_size,
+        received_ranges=ranges,
+        received_bytes=chunked_upload.received_bytes(ranges),
+        status=upload.status,
+        file_id=upload.file_id,
+        created_at=upload.created_at,
+        updated_at=upload.updated_at,
+    )
+
+
+def _idle_cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=chunked_upload.UPLOAD_SESSION_TTL)
+
+
+async def _expire_idle_uploads(session: AsyncSession) -> None:
+    """Mark open sessions idle past the TTL as expired and delete their temp files."""
+    idle = (
+        await session.scalars(
+            select(UploadSession.id).where(
+                UploadSession.status == "open", UploadSession.updated_at < _idle_cutoff()
+            )
+        )
+    ).all()
+    if not idle:
+        return
+    await session.execute(
+        update(UploadSession)
+        .where(UploadSession.id.in_(idle), UploadSession.status == "open")
+        .values(status="expired")
+    )
+    await session.commit()
+    for upload_id in idle:
+        chunked_upload.discard_session(upload_id)
+
+
+async def _get_open_upload(session: AsyncSession, upload_id: str) -> UploadSession:
+    upload = await session.get(UploadSession, upload_id)
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found.",
+        )
+    if upload.status == "open" and upload.updated_at < _idle_cutoff():
+        upload.status = "expired"
+        await session.commit()
+        chunked_upload.discard_session(upload_id)
+    _ensure_open(upload)
+    return upload
+
+
+def _ensure_open(upload: UploadSession) -> None:
+    if upload.status != "open":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload session is {upload.status}.",
+        )
+
+
+@router.post("/uploads", response_model=UploadSessionRead, status_code=status.HTTP_201_CREATED)
+async def init_upload(payload: UploadSessionCreate, session: AsyncSession = Depends(get_session)):
+    if not is_allowed_dump_name(payload.filename):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only .raw and .vmem memory dump files are allowed.",
+        )
+    await _expire_idle_uploads(session)
+
+    upload = UploadSession(
+        id=uuid.uuid4().hex,
+        case_id=payload.case_id,
+        filename=payload.filename,
+        total_size=payload.total_size,
+        received_ranges=[],
+    )
+    chunked_upload.create_part_file(chunked_upload.part_path(upload.id), payload.total_size)
+    session.add(upload)
+    await session.commit()
+    await session.refresh(upload)
+    return _to_read(upload)
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionRead)
+async def get_upload(upload_id: str, session: AsyncSession = Depends(get_session)):
+    upload = await session.get(UploadSession, upload_id)
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found.",
+        )
+    return _to_read(upload)
+
+
+@router.put("/uploads/{upload_id}", response_model=UploadSessionRead)
+async def put_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Store one chunk at ``offset``. The raw request body is the chunk and
+    ``Content-Length`` is required. Chunks may be sent in parallel and in any
+    order; re-sending a chunk that was already received is a no-op.
+    """
+    upload = await _get_open_upload(session, upload_id)
+
+    content_length = request.headers.get("content-length")
+    if content_length is None:
+        raise HTTPException(
+            status_code=status.HTTP_411_LENGTH_REQUIRED,
+            detail="Content-Length is required for chunk uploads.",
+        )
+    try:
+        length = int(content_length)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Content-Length must be an integer.",
+        ) from None
+    end = offset + length
+    if length <= 0 or end > upload.total_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Chunk is empty or extends past the announced file size.",
+        )
+
+    # Coverage is checked and the range reserved under the lock, so two PUTs
+    # of the same or overlapping bytes can never both be written. The chunk
+    # writes themselves are not serialized, so parallel PUTs overlap their I/O.
+    path = chunked_upload.part_path(upload_id)
+    state = chunked_upload.get_state(upload_id)
+    async with state.lock:
+        await session.refresh(upload)
+        _ensure_open(upload)
+        ranges = upload.received_ranges or []
+        if chunked_upload.is_covered(ranges, offset, end):
+            return _to_read(upload)
+        if chunked_upload.overlaps(ranges + state.reserved, offset, end):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Chunk overlaps bytes that were already received or are being received.",
+            )
+        reservation = [offset, end]
+        state.reserved.append(reservation)
+
+    try:
+        try:
+            written = await chunked_upload.write_chunk(path, offset, request.stream(), limit=length)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+        if written != length:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Chunk body is shorter than Content-Length.",
+            )
+
+        # Range bookkeeping and hash progression are serialized per upload.
+        async with state.lock:
+            await session.refresh(upload)
+            _ensure_open(upload)
+            upload.received_ranges = chunked_upload.merge_range(upload.received_ranges or [], offset, end)
+            upload.updated_at = datetime.utcnow()
+            await session.commit()
+            await chunked_upload.advance_hash(state, path, upload.received_ranges)
+    finally:
+        state.reserved.remove(reservation)
+
+    return _to_read(upload)
+
+
+@router.post("/uploads/{upload_id}/finalize", response_model=MemoryFileRead)
+async def finalize_upload(upload_id: str, session: AsyncSession = Depends(get_session)):
+    upload = await _get_open_upload(session, upload_id)
+    path = chunked_upload.part_path(upload_id)
+    state = chunked_upload.get_state(upload_id)
+    async with state.lock:
+        # Re-checked under the lock: a concurrent finalize or abort may have won.
+        await session.refresh(upload)
+        _ensure_open(upload)
+        if upload.received_ranges != [[0, upload.total_size]]:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload is incomplete; query the session for missing ranges.",
+            )
+        await chunked_upload.advance_hash(state, path, upload.received_ranges)
+        digests = state.hasher.hexdigests()
+        leaves = state.hasher.merkle_leaves()
+
+        mem_file = await store_memory_file(
+            session,
+            case_id=upload.case_id,
+            filename=upload.filename,
+            tmp_path=path,
+            size_bytes=upload.total_size,
+            digests=digests,
+            leaves=leaves,
+        )
+        upload.status = "finalized"
+        upload.file_id = mem_file.id
+        await session.commit()
+    chunked_upload.drop_state(upload_id)
+
+    return MemoryFileRead.model_validate(mem_file)
+
+
+@router.delete("/uploads/{upload_id}", response_model=UploadSessionRead)
+async def abort_upload(upload_id: str, session: AsyncSession = Depends(get_session)):
+    upload = await _get_open_upload(session, upload_id)
+    state = chunked_upload.get_state(upload_id)
+    async with state.lock:
+        await session.refresh(upload)
+        _ensure_open(upload)
+        upload.status = "aborted"
+        await session.commit()
+        chunked_upload.part_path(upload_id).unlink(missing_ok=True)
+    chunked_upload.drop_state(upload_id)
+    return _to_read(upload)
@@ -24,10 +24,37 @@ class AnalysisResultRead(BaseModel):
     dl_output: Optional[Dict[str, Any]]
     max_anomaly_score: float
     created_at: datetime
+    stage_timings: Optional[Dict[str, float]] = None
     processes: Optional[List[ProcessPrediction]] = None
 
     class Config:
         from_attributes = True
 
 
+class AnalysisResultFields(BaseModel):
+    """Any subset of :class:`AnalysisResultRead`, as picked with ``fields`` or ``slim``."""
 
+    id: Optional[int] = None
+    file_id: Optional[int] = None
+    status: Optional[str] = None
+    summary: Optional[str] = None
+    volatility_output: Optional[Dict[str, Any]] = None
+    ml_output: Optional[Dict[str, Any]] = None
+    dl_output: Optional[Dict[str, Any]] = None
+    max_anomaly_score: Optional[float] = None
+    created_at: Optional[datetime] = None
+    stage_timings: Optional[Dict[str, float]] = None
+    processes: Optional[List[ProcessPrediction]] = None
+
+
+
+
+
+class AnalysisJobRead(BaseModel):
+    job_id: int
+    file_id: int
+    status: str  # queued / running / completed / failed
+    summary: Optional[str]
+    max_anomaly_score: float
+    created_at: datetime
+    stage_timings: Optional[Dict[str, float]] = None
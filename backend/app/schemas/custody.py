@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class CustodyLogRead(BaseModel):
+    id: int
+    file_id: Optional[int]
+    seq: int
+    event_type: str
+    description: str
+    created_at: datetime
+    prev_hash: str
+    entry_hash: str
+
+    class Config:
+        from_attributes = True
+
+
+class CustodyVerification(BaseModel):
+    file_id: int
+    verified: bool
+    checkpoint_seq: Optional[int]  # verification resumed after this entry
+    entries_checked: int
+    head_seq: int
+    first_invalid_seq: Optional[int]
+    detail: Optional[str]
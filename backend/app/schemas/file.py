@@ -1,4 +1,6 @@
 from datetime import datetime
+from typing import Dict, List, Optional
+
 from pydantic import BaseModel
 
 
@@ -17,9 +19,27 @@ class MemoryFileRead(MemoryFileBase):
     id: int
     stored_path: str
     created_at: datetime
+    md5: Optional[str] = None
+    sha1: Optional[str] = None
+    merkle_root: Optional[str] = None
 
     class Config:
         from_attributes = True
 
 
+class ChunkMismatch(BaseModel):
+    index: int
+    offset: int
+    length: int
+
 
+class HashValidationRead(BaseModel):
+    file_id: int
+    valid: bool
+    method: str  # merkle / digest
+    checked_offset: int
+    checked_bytes: int
+    chunks_checked: int
+    mismatched_chunks: List[ChunkMismatch] = []
+    digests: Optional[Dict[str, str]] = None
+    detail: Optional[str] = None
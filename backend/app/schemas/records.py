@@ -0,0 +1,64 @@
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    total: int
+    limit: int
+    offset: int
+
+
+class ProcessRecordRead(BaseModel):
+    pid: int
+    ppid: Optional[int]
+    name: Optional[str]
+    threads: Optional[int]
+    dll_count: Optional[int]
+    entropy: Optional[float]
+    suspicious: bool
+    net_conn_count: Optional[int]
+    anomaly_score: float
+    confidence: Optional[float]
+    label: str  # benign / malicious
+
+    class Config:
+        from_attributes = True
+
+
+class NetworkConnectionRead(BaseModel):
+    pid: Optional[int]
+    owner: Optional[str]
+    protocol: Optional[str]
+    local_ip: Optional[str]
+    local_port: Optional[int]
+    remote_ip: Optional[str]
+    remote_port: Optional[int]
+    state: Optional[str]
+
+    class Config:
+        from_attributes = True
+
+
+class DllRecordRead(BaseModel):
+    pid: int
+    name: Optional[str]
+    path: Optional[str]
+    base: Optional[str]
+    size: Optional[int]
+
+    class Config:
+        from_attributes = True
+
+
+class HandleRecordRead(BaseModel):
+    pid: int
+    handle_type: Optional[str]
+    name: Optional[str]
+    granted_access: Optional[str]
+
+    class Config:
+        from_attributes = True
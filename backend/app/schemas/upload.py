@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class UploadSessionCreate(BaseModel):
+    case_id: str
+    filename: str
+    total_size: int = Field(gt=0)
+
+
+class UploadSessionRead(BaseModel):
+    id: str
+    case_id: str
+    filename: str
+    total_size: int
+    received_ranges: List[List[int]]
+    received_bytes: int
+    status: str
+    file_id: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
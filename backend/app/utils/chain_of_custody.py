@@ -1,26 +1,328 @@
-from typing import Optional
+"""
+Tamper-evident chain-of-custody log.
+
+Every entry carries ``entry_hash = SHA-256(prev_hash || canonical entry)``,
+chained per file through ``seq``. Every ``CUSTODY_CHECKPOINT_INTERVAL``
+entries (and after each successful verification) a checkpoint signed with
+HMAC-SHA256 records the head of the chain, so verification only needs to
+re-hash the entries written after the newest valid checkpoint.
+
+Writers extending a chain are serialized in the database, so several API
+processes can log for the same file: PostgreSQL takes a transaction-scoped
+advisory lock per chain, SQLite takes the write lock before the chain heads
+are read.
+
+The signing key comes from ``CUSTODY_SIGNING_KEY`` or, if unset, from the
+key file at ``CUSTODY_KEY_PATH`` (created on first use).
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, insert, or_, select, text, update
 
+from app.models.checkpoint import CustodyCheckpoint
 from app.models.log import ChainOfCustodyLog
+from app.utils.metrics import timed
+
+CUSTODY_CHECKPOINT_INTERVAL = int(os.getenv("CUSTODY_CHECKPOINT_INTERVAL", "100"))
+CUSTODY_KEY_PATH = Path(os.getenv("CUSTODY_KEY_PATH", "custody.key"))
+
+GENESIS_HASH = "0" * 64
+
+# First key of the PostgreSQL advisory locks on chains; the second is the file id.
+_CHAIN_LOCK_NAMESPACE = 0x63757374
+_signing_key: Optional[bytes] = None
+
+
+def _get_signing_key() -> bytes:
+    global _signing_key
+    if _signing_key is None:
+        env_key = os.getenv("CUSTODY_SIGNING_KEY")
+        if env_key:
+            _signing_key = env_key.encode()
+        else:
+            if not CUSTODY_KEY_PATH.exists():
+                _create_key_file(CUSTODY_KEY_PATH)
+            _signing_key = CUSTODY_KEY_PATH.read_text().strip().encode()
+    return _signing_key
+
+
+def _create_key_file(path: Path) -> None:
+    """Write a new key next to ``path`` and link it into place; a key another
+    process created first is kept, and a half-written key is never visible."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            pass
+    finally:
+        os.unlink(tmp)
+
+
+def _key_id(key: bytes) -> str:
+    return hashlib.sha256(key).hexdigest()[:16]
+
+
+def entry_digest(
+    prev_hash: str,
+    file_id: Optional[int],
+    seq: int,
+    event_type: str,
+    description: str,
+    created_at: datetime,
+) -> str:
+    payload = json.dumps(
+        [file_id, seq, event_type, description, created_at.isoformat()],
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256((prev_hash + payload).encode("utf-8")).hexdigest()
+
+
+def _checkpoint_message(file_id: Optional[int], seq: int, entry_hash: str) -> bytes:
+    return f"{file_id}:{seq}:{entry_hash}".encode()
+
+
+def sign_checkpoint(file_id: Optional[int], seq: int, entry_hash: str) -> Dict[str, Any]:
+    key = _get_signing_key()
+    return {
+        "file_id": file_id,
+        "seq": seq,
+        "entry_hash": entry_hash,
+        "key_id": _key_id(key),
+        "signature": hmac.new(key, _checkpoint_message(file_id, seq, entry_hash), "sha256").hexdigest(),
+        "created_at": datetime.utcnow(),
+    }
+
+
+def checkpoint_is_valid(checkpoint: CustodyCheckpoint) -> bool:
+    key = _get_signing_key()
+    if checkpoint.key_id != _key_id(key):
+        return False
+    expected = hmac.new(
+        key, _checkpoint_message(checkpoint.file_id, checkpoint.seq, checkpoint.entry_hash), "sha256"
+    ).hexdigest()
+    return hmac.compare_digest(expected, checkpoint.signature)
+
+
+async def _chain_heads(
+    session: AsyncSession, file_ids: Iterable[Optional[int]]
+) -> Dict[Optional[int], Tuple[int, str]]:
+    """``{file_id: (seq, entry_hash)}`` of the newest entry per file, in one query."""
+    file_ids = set(file_ids)
+    ids = [f for f in file_ids if f is not None]
+    criteria = []
+    if ids:
+        criteria.append(ChainOfCustodyLog.file_id.in_(ids))
+    if None in file_ids:
+        criteria.append(ChainOfCustodyLog.file_id.is_(None))
+    latest = (
+        select(ChainOfCustodyLog.file_id, func.max(ChainOfCustodyLog.seq).label("seq"))
+        .where(or_(*criteria))
+        .group_by(ChainOfCustodyLog.file_id)
+        .subquery()
+    )
+    stmt = select(ChainOfCustodyLog.file_id, ChainOfCustodyLog.seq, ChainOfCustodyLog.entry_hash).join(
+        latest,
+        ChainOfCustodyLog.file_id.is_not_distinct_from(latest.c.file_id)
+        & (ChainOfCustodyLog.seq == latest.c.seq),
+    )
+    return {file_id: (seq, entry_hash) for file_id, seq, entry_hash in await session.execute(stmt)}
+
+
+async def _lock_chains(session: AsyncSession, file_ids: Iterable[Optional[int]]) -> None:
+    """Hold the chains of ``file_ids`` until the session's transaction ends."""
+    bind = await session.connection()
+    dialect = bind.dialect.name
+    if dialect == "postgresql":
+        # Sorted, so writers locking several chains cannot deadlock.
+        for file_id in sorted({f or 0 for f in file_ids}):
+            await session.execute(
+                text("SELECT pg_advisory_xact_lock(:namespace, :file_id)"),
+                {"namespace": _CHAIN_LOCK_NAMESPACE, "file_id": file_id},
+            )
+    elif dialect == "sqlite":
+        # A write that touches no row still takes the database write lock
+        # (waiting out the busy timeout), so the heads read next are current.
+        await session.execute(
+            update(ChainOfCustodyLog).where(text("1 = 0")).values(seq=ChainOfCustodyLog.seq),
+            execution_options={"synchronize_session": False},
+        )
+
+
+class CustodyLogger:
+    """
+    Buffers custody events and writes them in one batch.
+
+    Events keep the order and timestamp of the :meth:`record` calls. On
+    :meth:`commit` they are hash-chained (one query fetches the chain heads
+    of all files in the batch), inserted with a single multi-row insert and
+    committed together with the caller's other changes; on rollback they
+    are discarded with them::
+
+        async with CustodyLogger(session) as custody:
+            ...
+            custody.record("alert", "...", file_id=file_id)
+        # chained and committed here, unless the block raised
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+        self._pending: List[Dict[str, Any]] = []
+
+    def record(self, event_type: str, description: str, file_id: Optional[int] = None) -> None:
+        self._pending.append(
+            {
+                "file_id": file_id,
+                "event_type": event_type,
+                "description": description,
+                "created_at": datetime.utcnow(),
+            }
+        )
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def _write(self) -> List[ChainOfCustodyLog]:
+        rows, self._pending = self._pending, []
+        await _lock_chains(self.session, (r["file_id"] for r in rows))
+        heads = await _chain_heads(self.session, (r["file_id"] for r in rows))
+        checkpoints = []
+        for row in rows:
+            seq, prev_hash = heads.get(row["file_id"], (0, GENESIS_HASH))
+            seq += 1
+            row["seq"] = seq
+            row["prev_hash"] = prev_hash
+            row["entry_hash"] = entry_digest(
+                prev_hash, row["file_id"], seq, row["event_type"], row["description"], row["created_at"]
+            )
+            heads[row["file_id"]] = (seq, row["entry_hash"])
+            if seq % CUSTODY_CHECKPOINT_INTERVAL == 0:
+                checkpoints.append(sign_checkpoint(row["file_id"], seq, row["entry_hash"]))
+
+        result = await self.session.scalars(
+            insert(ChainOfCustodyLog).returning(ChainOfCustodyLog, sort_by_parameter_order=True),
+            rows,
+        )
+        logs = result.all()
+        if checkpoints:
+            await self.session.execute(insert(CustodyCheckpoint), checkpoints)
+        return logs
+
+    @timed("custody.commit")
+    async def commit(self) -> List[ChainOfCustodyLog]:
+        """Chain and insert buffered events, then commit the whole transaction once."""
+        logs = await self._write() if self._pending else []
+        await self.session.commit()
+        return logs
+
+    def discard(self) -> None:
+        self._pending.clear()
+
+    async def __aenter__(self) -> "CustodyLogger":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self.commit()
+        else:
+            self.discard()
 
 
 async def log_event(
     session: AsyncSession, event_type: str, description: str, file_id: Optional[int] = None
 ) -> ChainOfCustodyLog:
-    log = ChainOfCustodyLog(file_id=file_id, event_type=event_type, description=description)
-    session.add(log)
-    await session.commit()
-    await session.refresh(log)
+    custody = CustodyLogger(session)
+    custody.record(event_type, description, file_id=file_id)
+    (log,) = await custody.commit()
     return log
 
 
+async def verify_chain(session: AsyncSession, file_id: int, full: bool = False) -> Dict[str, Any]:
+    """
+    Re-verify the custody chain of ``file_id``.
+
+    Unless ``full`` is set, verification starts at the newest checkpoint whose
+    signature is valid and whose hash still matches the stored entry, so only
+    entries written since then are re-hashed. A successful run records a new
+    checkpoint at the head.
+    """
+    start_seq, prev_hash, checkpoint_seq = 0, GENESIS_HASH, None
+    if not full:
+        checkpoints = await session.scalars(
+            select(CustodyCheckpoint)
+            .where(CustodyCheckpoint.file_id == file_id)
+            .order_by(CustodyCheckpoint.seq.desc(), CustodyCheckpoint.id.desc())
+        )
+        for cp in checkpoints:
+            if not checkpoint_is_valid(cp):
+                continue
+            stored = await session.scalar(
+                select(ChainOfCustodyLog.entry_hash).where(
+                    ChainOfCustodyLog.file_id == file_id, ChainOfCustodyLog.seq == cp.seq
+                )
+            )
+            if stored == cp.entry_hash:
+                start_seq, prev_hash, checkpoint_seq = cp.seq, cp.entry_hash, cp.seq
+                break
+
+    report: Dict[str, Any] = {
+        "file_id": file_id,
+        "verified": True,
+        "checkpoint_seq": checkpoint_seq,
+        "entries_checked": 0,
+        "head_seq": start_seq,
+        "first_invalid_seq": None,
+        "detail": None,
+    }
+    stmt = (
+        select(ChainOfCustodyLog)
+        .where(ChainOfCustodyLog.file_id == file_id, ChainOfCustodyLog.seq > start_seq)
+        .order_by(ChainOfCustodyLog.seq.asc())
+        .execution_options(yield_per=1000)
+    )
+    expected_seq = start_seq + 1
+    async for entry in await session.stream_scalars(stmt):
+        problem = None
+        if entry.seq != expected_seq:
+            problem = f"Missing entry before seq {entry.seq}."
+        elif entry.prev_hash != prev_hash:
+            problem = "Link to previous entry is broken."
+        elif entry.entry_hash != entry_digest(
+            prev_hash, entry.file_id, entry.seq, entry.event_type, entry.description, entry.created_at
+        ):
+            problem = "Entry content does not match its hash."
+        if problem:
+            report.update(verified=False, first_invalid_seq=entry.seq, detail=problem)
+            return report
+        report["entries_checked"] += 1
+        report["head_seq"] = entry.seq
+        prev_hash = entry.entry_hash
+        expected_seq += 1
+
+    if report["head_seq"] and report["head_seq"] != checkpoint_seq:
+        session.add(CustodyCheckpoint(**sign_checkpoint(file_id, report["head_seq"], prev_hash)))
+        await session.commit()
+    return report
+
+
 async def list_logs_for_file(session: AsyncSession, file_id: int):
     stmt = select(ChainOfCustodyLog).where(ChainOfCustodyLog.file_id == file_id).order_by(
-        ChainOfCustodyLog.created_at.asc()
+        ChainOfCustodyLog.seq.asc()
     )
     result = await session.execute(stmt)
     return result.scalars().all()
-
-
-
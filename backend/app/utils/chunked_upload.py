@@ -0,0 +1,166 @@
+"""
+Helpers for the resumable, chunked upload protocol.
+
+Chunks may arrive out of order and in parallel. Each one is written straight
+to its offset in a preallocated ``.part`` file; the digest state (MD5, SHA-1,
+SHA-256 and the Merkle leaves) is kept in memory and advanced over the contiguous prefix of
+received bytes whenever a chunk lands, so by the time the last chunk arrives
+the digests are ready and finalize never re-reads the whole dump serially.
+
+The hash state and the reservations of chunks being written are per
+process, so every request of one upload session must reach the same API
+worker (route on the upload id, e.g. consistent hashing on the path). The
+hash state alone would survive a worker restart: it is rebuilt from the
+bytes already on disk the next time the prefix is advanced.
+
+Sessions that receive nothing for ``UPLOAD_SESSION_TTL`` seconds are expired:
+their ``.part`` file is deleted, and so is the in-memory state of any session
+left idle that long.
+"""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, List
+
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.hashing import MERKLE_CHUNK_SIZE, MultiHasher
+from app.utils.metrics import timed
+from app.utils.storage import UPLOAD_CHUNK_SIZE, UPLOAD_DIR
+
+SESSIONS_DIR = UPLOAD_DIR / ".sessions"
+
+UPLOAD_SESSION_TTL = float(os.getenv("UPLOAD_SESSION_TTL", str(24 * 3600)))
+
+
+class ChunkedHashState:
+    def __init__(self) -> None:
+        self.hasher = MultiHasher(leaf_size=MERKLE_CHUNK_SIZE)
+        self.hashed_upto = 0
+        self.lock = asyncio.Lock()
+        # [start, end) ranges being written by in-flight PUTs.
+        self.reserved: List[List[int]] = []
+        self.last_used = time.monotonic()
+
+    def idle(self, now: float) -> bool:
+        return now - self.last_used > UPLOAD_SESSION_TTL and not self.reserved and not self.lock.locked()
+
+
+_states: Dict[str, ChunkedHashState] = {}
+
+
+def get_state(session_id: str) -> ChunkedHashState:
+    now = time.monotonic()
+    # States of abandoned sessions are dropped whenever another one is used.
+    for idle_id in [sid for sid, s in _states.items() if sid != session_id and s.idle(now)]:
+        del _states[idle_id]
+    state = _states.get(session_id)
+    if state is None:
+        state = _states[session_id] = ChunkedHashState()
+    state.last_used = now
+    return state
+
+
+def drop_state(session_id: str) -> None:
+    _states.pop(session_id, None)
+
+
+def discard_session(session_id: str) -> None:
+    """Forget the state of an expired session and delete its ``.part`` file."""
+    drop_state(session_id)
+    part_path(session_id).unlink(missing_ok=True)
+
+
+def part_path(session_id: str) -> Path:
+    return SESSIONS_DIR / f"{session_id}.part"
+
+
+def create_part_file(path: Path, total_size: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as f:
+        # Sparse preallocation so chunks can be written at any offset.
+        f.truncate(total_size)
+
+
+def merge_range(ranges: List[List[int]], start: int, end: int) -> List[List[int]]:
+    """Insert ``[start, end)`` into sorted, disjoint ranges, coalescing neighbours."""
+    merged: List[List[int]] = []
+    for r_start, r_end in sorted([list(r) for r in ranges] + [[start, end]]):
+        if merged and r_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], r_end)
+        else:
+            merged.append([r_start, r_end])
+    return merged
+
+
+def is_covered(ranges: List[List[int]], start: int, end: int) -> bool:
+    return any(r_start <= start and end <= r_end for r_start, r_end in ranges)
+
+
+def overlaps(ranges: List[List[int]], start: int, end: int) -> bool:
+    return any(start < r_end and r_start < end for r_start, r_end in ranges)
+
+
+def received_bytes(ranges: List[List[int]]) -> int:
+    return sum(end - start for start, end in ranges)
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+@timed("upload.chunk")
+async def write_chunk(path: Path, offset: int, body: AsyncIterator[bytes], limit: int) -> int:
+    """
+    Write a streamed request body at ``offset`` and return the number of bytes
+    written. Raises ``ValueError`` if the body is longer than ``limit``.
+    """
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        written = 0
+        buffer = bytearray()
+        async for piece in body:
+            buffer += piece
+            if written + len(buffer) > limit:
+                raise ValueError("Chunk is larger than announced.")
+            if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                await run_in_threadpool(_pwrite_all, fd, bytes(buffer), offset + written)
+                written += len(buffer)
+                buffer.clear()
+        if buffer:
+            await run_in_threadpool(_pwrite_all, fd, bytes(buffer), offset + written)
+            written += len(buffer)
+        await run_in_threadpool(os.fsync, fd)
+    finally:
+        os.close(fd)
+    return written
+
+
+def _hash_region(state: ChunkedHashState, path: Path, end: int) -> None:
+    with path.open("rb") as f:
+        f.seek(state.hashed_upto)
+        while state.hashed_upto < end:
+            chunk = f.read(min(UPLOAD_CHUNK_SIZE, end - state.hashed_upto))
+            if not chunk:
+                break
+            state.hasher.update(chunk)
+            state.hashed_upto += len(chunk)
+
+
+async def advance_hash(state: ChunkedHashState, path: Path, ranges: List[List[int]]) -> None:
+    """
+    Feed the hasher with any newly contiguous bytes from the start of the file.
+    The caller must hold ``state.lock``. Freshly written chunks are normally
+    still in the page cache, so this does not cost a second disk read.
+    """
+    if not ranges or ranges[0][0] != 0:
+        return
+    prefix_end = ranges[0][1]
+    if prefix_end > state.hashed_upto:
+        await run_in_threadpool(_hash_region, state, path, prefix_end)
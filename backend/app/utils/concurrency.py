@@ -0,0 +1,31 @@
+"""
+CPU budget of one analysis job.
+
+The job queue runs ``ANALYSIS_WORKERS`` analyses at once, and inside each
+job the string scan and the entropy pass start pools of their own. Those
+pools default to the job's share of the cores, so a full queue keeps about
+``cpu_count`` processes busy rather than ``ANALYSIS_WORKERS * cpu_count``. With a share of one core the string scan
+and the entropy pass run in the job's own process.
+"""
+
+import os
+from concurrent.futures import Executor, Future
+
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+def job_cpu_share() -> int:
+    """Cores available to one analysis job when the queue is full."""
+    return max(1, (os.cpu_count() or 1) // max(1, ANALYSIS_WORKERS))
+
+
+class InlineExecutor(Executor):
+    """Runs each submitted call at once in the calling process."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:  # noqa: BLE001
+            future.set_exception(exc)
+        return future
@@ -1,13 +1,197 @@
+"""
+Evidence hashing.
+
+Whole-file digests (MD5, SHA-1, SHA-256) are computed together in a single
+pass with large buffers. In addition, every dump gets a Merkle tree over
+fixed-size chunks. Its leaves are hashed in the same pass as the digests
+when a dump is received, and stored with the ``MemoryFile``. A dump, or
+just a suspected damaged range, can then be re-verified with the leaves
+re-hashed in parallel (``hashlib`` releases the GIL, so threads use all
+cores), which pinpoints the chunks that changed.
+
+Leaves and nodes are domain-separated as in RFC 6962:
+``leaf = SHA-256(0x00 || chunk)``, ``node = SHA-256(0x01 || left || right)``;
+an unpaired node is promoted to the next level unchanged.
+"""
+
 import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional, Sequence
+
+from app.utils.metrics import BYTES_HASHED
+
+EVIDENCE_DIGESTS = ("md5", "sha1", "sha256")
+
+HASH_BUFFER_SIZE = int(os.getenv("HASH_BUFFER_SIZE", str(8 * 1024 * 1024)))
+MERKLE_CHUNK_SIZE = int(os.getenv("MERKLE_CHUNK_SIZE", str(16 * 1024 * 1024)))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+
+
+def sha256_file(path: Path, chunk_size: int = HASH_BUFFER_SIZE) -> str:
+    return multi_digest_file(path, ("sha256",), chunk_size)["sha256"]
+
+
+class MultiHasher:
+    """
+    Feeds every chunk to several digests, so one read serves all of them.
+    With ``leaf_size`` it also hashes the Merkle leaves of consecutive
+    ``leaf_size`` chunks as the data goes by.
+    """
+
+    def __init__(self, algorithms: Sequence[str] = EVIDENCE_DIGESTS, leaf_size: Optional[int] = None) -> None:
+        self._hashes = {name: hashlib.new(name) for name in algorithms}
+        self._leaf_size = leaf_size
+        self._leaves: List[str] = []
+        self._leaf = hashlib.sha256(b"\x00")
+        self._leaf_fill = 0
+
+    def update(self, data) -> None:
+        for h in self._hashes.values():
+            h.update(data)
+        if self._leaf_size:
+            self._update_leaves(memoryview(data))
+        BYTES_HASHED.inc(len(data))
+
+    def _update_leaves(self, view: memoryview) -> None:
+        while view:
+            take = min(len(view), self._leaf_size - self._leaf_fill)
+            self._leaf.update(view[:take])
+            self._leaf_fill += take
+            view = view[take:]
+            if self._leaf_fill == self._leaf_size:
+                self._leaves.append(self._leaf.hexdigest())
+                self._leaf = hashlib.sha256(b"\x00")
+                self._leaf_fill = 0
+
+    def hexdigests(self) -> Dict[str, str]:
+        return {name: h.hexdigest() for name, h in self._hashes.items()}
+
+    def merkle_leaves(self) -> List[str]:
+        """Leaves of the data so far, the last one possibly short; as :func:`merkle_leaves`."""
+        if self._leaf_fill or not self._leaves:
+            return self._leaves + [self._leaf.hexdigest()]
+        return list(self._leaves)
+
 
+def multi_digest_file(
+    path: Path, algorithms: Sequence[str] = EVIDENCE_DIGESTS, buffer_size: int = HASH_BUFFER_SIZE
+) -> Dict[str, str]:
+    """Digests of a whole file in one sequential pass."""
+    hasher = MultiHasher(algorithms)
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            hasher.update(view[:n])
+    return hasher.hexdigests()
 
-def sha256_file(path: Path, chunk_size: int = 8192) -> str:
-    h = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(chunk_size), b""):
-            h.update(chunk)
+
+class HashingWriter:
+    """
+    Write-through wrapper around a binary file object that updates the
+    evidence digests and Merkle leaves with every chunk, so a file is hashed
+    in the same pass that writes it instead of being read back afterwards.
+    """
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        algorithms: Sequence[str] = EVIDENCE_DIGESTS,
+        leaf_size: int = MERKLE_CHUNK_SIZE,
+    ) -> None:
+        self._fileobj = fileobj
+        self._hasher = MultiHasher(algorithms, leaf_size)
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self._hasher.update(chunk)
+        self._fileobj.write(chunk)
+        self.size += len(chunk)
+
+    def hexdigests(self) -> Dict[str, str]:
+        return self._hasher.hexdigests()
+
+    def hexdigest(self) -> str:
+        return self.hexdigests()["sha256"]
+
+    def merkle_leaves(self) -> List[str]:
+        return self._hasher.merkle_leaves()
+
+
+def chunk_count(size: int, chunk_size: int = MERKLE_CHUNK_SIZE) -> int:
+    return max(1, -(-size // chunk_size))
+
+
+def chunk_indices(offset: int, length: int, chunk_size: int = MERKLE_CHUNK_SIZE) -> range:
+    """Indices of the chunks overlapping ``[offset, offset + length)``."""
+    if length <= 0:
+        return range(0)
+    return range(offset // chunk_size, (offset + length - 1) // chunk_size + 1)
+
+
+def leaf_hash(path: Path, index: int, chunk_size: int = MERKLE_CHUNK_SIZE) -> str:
+    """Merkle leaf of chunk ``index``. Safe to call from many threads at once."""
+    h = hashlib.sha256(b"\x00")
+    buf = bytearray(min(chunk_size, HASH_BUFFER_SIZE))
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        pos, end = index * chunk_size, (index + 1) * chunk_size
+        while pos < end:
+            n = os.preadv(f.fileno(), [view[: min(len(buf), end - pos)]], pos)
+            if not n:
+                break
+            h.update(view[:n])
+            pos += n
+    BYTES_HASHED.inc(pos - index * chunk_size)
     return h.hexdigest()
 
 
+def merkle_leaves(
+    path: Path,
+    chunk_size: int = MERKLE_CHUNK_SIZE,
+    indices: Optional[Iterable[int]] = None,
+    workers: int = HASH_WORKERS,
+) -> List[str]:
+    """Leaf hashes for ``indices`` (default: every chunk), in order, in parallel."""
+    if indices is None:
+        indices = range(chunk_count(os.path.getsize(path), chunk_size))
+    indices = list(indices)
+    if workers <= 1 or len(indices) <= 1:
+        return [leaf_hash(path, i, chunk_size) for i in indices]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda i: leaf_hash(path, i, chunk_size), indices))
+
+
+def merkle_root(leaves: Sequence[str]) -> str:
+    level = [bytes.fromhex(leaf) for leaf in leaves]
+    if not level:
+        return hashlib.sha256(b"").hexdigest()
+    while len(level) > 1:
+        nxt = [
+            hashlib.sha256(b"\x01" + level[i] + level[i + 1]).digest()
+            for i in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            nxt.append(level[-1])
+        level = nxt
+    return level[0].hex()
+
 
+def mismatched_chunks(
+    path: Path,
+    expected_leaves: Sequence[str],
+    chunk_size: int = MERKLE_CHUNK_SIZE,
+    indices: Optional[Iterable[int]] = None,
+    workers: int = HASH_WORKERS,
+) -> List[int]:
+    """Re-hash ``indices`` (default: all chunks) in parallel; return the ones that differ."""
+    if indices is None:
+        indices = range(len(expected_leaves))
+    indices = [i for i in indices if 0 <= i < len(expected_leaves)]
+    actual = merkle_leaves(path, chunk_size, indices, workers)
+    return [i for i, leaf in zip(indices, actual) if leaf != expected_leaves[i]]
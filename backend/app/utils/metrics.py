@@ -0,0 +1,313 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+A deliberately small registry (counters, gauges and histograms with labels)
+so an observation costs a dict lookup under a lock and adds no dependency.
+Values are per process: with several API workers, scrape each of them.
+Analyses run in the job queue's worker processes; they time their stages
+with :class:`StageTimer` and hand the durations back with their result,
+and the API process observes them here.
+"""
+
+import bisect
+import functools
+import inspect
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latencies: 5 ms .. 60 s.
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Pipeline stages run from milliseconds (small dumps) to tens of minutes.
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List["_Metric"] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric") -> None:
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f"Metric {metric.name} is already registered.")
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format (version 0.0.4)."""
+        lines: List[str] = []
+        for metric in list(self._metrics):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[Registry] = REGISTRY,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels: Dict[str, object]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}.")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Iterable[float] = HTTP_BUCKETS, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        # Per label set: non-cumulative bucket counts (last one is +Inf), sum.
+        self._values: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or self._values.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        with self._lock:
+            items = sorted((key, (list(c), t[0])) for key, (c, t) in self._values.items())
+        names = self.labelnames + ("le",)
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                yield f"{self.name}_bucket", _format_labels(names, key + (_format_value(bound),)), cumulative
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+HTTP_REQUESTS = Counter(
+    "forensics_http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+)
+HTTP_LATENCY = Histogram(
+    "forensics_http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ("method", "route"),
+    buckets=HTTP_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "forensics_stage_seconds",
+    "Duration of analysis, upload and report stages.",
+    ("stage",),
+    buckets=STAGE_BUCKETS,
+)
+ANALYSES = Counter("forensics_analyses_total", "Finished analyses by outcome.", ("status",))
+BYTES_HASHED = Counter("forensics_bytes_hashed_total", "Bytes fed to evidence and Merkle digests.")
+PROCESSES_SCORED = Counter("forensics_processes_scored_total", "Processes scored by the ML model.")
+ALERTS_RAISED = Counter("forensics_alerts_raised_total", "Alerts raised.")
+QUEUE_DEPTH = Gauge("forensics_analysis_queue_depth", "Analyses queued or running.")
+
+
+class StageTimer:
+    """
+    Collects the wall-clock duration of named stages of one unit of work.
+    Only records into :attr:`timings`; nothing is observed globally, so it
+    is safe in worker processes.
+    """
+
+    def __init__(self, timings: Optional[Dict[str, float]] = None) -> None:
+        self.timings: Dict[str, float] = dict(timings or {})
+
+    def stage(self, name: str) -> "timed":
+        return timed(name, timer=self, observe=False)
+
+
+class timed:
+    """
+    Time a block (``with timed("report.render"):``) or a function
+    (``@timed("upload.store")``, sync or async) into ``forensics_stage_seconds``.
+    """
+
+    def __init__(self, stage: str, timer: Optional[StageTimer] = None, observe: bool = True) -> None:
+        self.stage = stage
+        self.timer = timer
+        self.observe = observe
+        self.seconds = 0.0
+
+    def __enter__(self) -> "timed":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.seconds = time.perf_counter() - self._started
+        if self.timer is not None:
+            self.timer.timings[self.stage] = self.timer.timings.get(self.stage, 0.0) + self.seconds
+        if self.observe:
+            STAGE_SECONDS.observe(self.seconds, stage=self.stage)
+
+    def __call__(self, fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with timed(self.stage, self.timer, self.observe):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(self.stage, self.timer, self.observe):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+
+def observe_stages(prefix: str, timings: Dict[str, float]) -> None:
+    """Observe durations collected by a :class:`StageTimer` (e.g. in a worker)."""
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.observe(seconds, stage=f"{prefix}.{stage}")
+
+
+def route_template(scope) -> str:
+    """
+    Template of the route that handled a request (``/api/results/{file_id}``),
+    or ``"unmatched"``. Routes of an included router may carry their path
+    without the router's prefix; the prefix is then taken from the request path.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    path = scope.get("path", "")
+    regex = getattr(route, "path_regex", None)
+    if regex is not None and not regex.match(path):
+        for i, char in enumerate(path):
+            if char == "/" and i and regex.match(path[i:]):
+                return path[:i] + template
+    return template
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency and status of every HTTP request,
+    labelled with the route template (``/api/results/{analysis_id}``) rather
+    than the raw path so label cardinality stays bounded.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the (shared) scope.
+            route = route_template(scope)
+            method = scope["method"]
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=method, route=route)
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status_code))
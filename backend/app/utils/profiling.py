@@ -0,0 +1,212 @@
+"""
+On-demand request profiling.
+
+Disabled by default, and then the middleware is not even installed. It is
+enabled by either setting:
+
+- ``PROFILE_TOKEN``: a request carrying ``X-Profile: <token>`` is profiled.
+  The listing and download endpoints require ``X-Profile-Token: <token>``.
+- ``PROFILE_SAMPLE_RATE``: this fraction of requests (0..1) is profiled.
+  Without ``PROFILE_TOKEN`` these profiles are only written to
+  ``PROFILE_DIR``; the endpoints stay closed.
+
+A profiled request runs under cProfile (deterministic, per-function totals,
+saved as a ``.prof`` file for ``pstats``/snakeviz) while a sampling thread
+takes a stack of every thread each ``PROFILE_INTERVAL_MS``. The samples are
+written in collapsed-stack format (``a;b;c 12``), ready for flamegraph.pl
+or speedscope, and also show time spent in the thread pool (report
+rendering, hashing), which cProfile on the event loop cannot see.
+
+Only one request is profiled at a time; others, including ones asking for
+a profile, run normally meanwhile. cProfile sees everything the event loop
+runs during the request, so profile on a quiet worker where possible.
+Profiles of requests faster than ``PROFILE_MIN_MS`` are dropped. The newest
+``PROFILE_KEEP`` profiles are kept in ``PROFILE_DIR``; older ones are
+deleted.
+"""
+
+import cProfile
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+PROFILE_MIN_MS = float(os.getenv("PROFILE_MIN_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+PROFILE_HEADER = "x-profile"
+PROFILE_FILES = {"prof": ".prof", "collapsed": ".collapsed.txt"}
+
+_PROFILE_ID = re.compile(r"^[0-9]{8}T[0-9]{12}-[0-9a-f]{6}$")
+
+
+def profiling_enabled() -> bool:
+    return bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+def token_matches(token: Optional[str]) -> bool:
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+def is_profile_id(profile_id: str) -> bool:
+    return bool(_PROFILE_ID.match(profile_id))
+
+
+class StackSampler:
+    """Samples the stacks of all other threads into collapsed-stack counts."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if ident not in names:
+                    names[ident] = next(
+                        (t.name for t in threading.enumerate() if t.ident == ident), str(ident)
+                    )
+                self.stacks[";".join([names[ident]] + stack[::-1])] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def list_profiles(directory: Path = PROFILE_DIR) -> List[Dict[str, Any]]:
+    """Metadata of the stored profiles, newest first."""
+    profiles = []
+    for meta in directory.glob("*.json"):
+        try:
+            profiles.append(json.loads(meta.read_text()))
+        except (OSError, ValueError):
+            continue
+    return sorted(profiles, key=lambda p: p["id"], reverse=True)
+
+
+def profile_file(profile_id: str, kind: str, directory: Path = PROFILE_DIR) -> Optional[Path]:
+    if not is_profile_id(profile_id) or kind not in PROFILE_FILES:
+        return None
+    path = directory / f"{profile_id}{PROFILE_FILES[kind]}"
+    return path if path.exists() else None
+
+
+def _save_profile(
+    profiler: cProfile.Profile, sampler: StackSampler, meta: Dict[str, Any], directory: Path, keep: int
+) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    profile_id = meta["id"]
+    profiler.dump_stats(str(directory / f"{profile_id}.prof"))
+    (directory / f"{profile_id}.collapsed.txt").write_text(sampler.collapsed())
+    # Written last: a profile is listed only once its files are complete.
+    (directory / f"{profile_id}.json").write_text(json.dumps(meta))
+
+    for old in sorted(p.stem for p in directory.glob("*.json"))[:-keep]:
+        for suffix in (".json", *PROFILE_FILES.values()):
+            (directory / f"{old}{suffix}").unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests selected by header or sampling. Only
+    installed by ``create_app`` when :func:`profiling_enabled`.
+    """
+
+    def __init__(
+        self,
+        app,
+        token: str = PROFILE_TOKEN,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        directory: Path = PROFILE_DIR,
+        keep: int = PROFILE_KEEP,
+        min_ms: float = PROFILE_MIN_MS,
+        interval_ms: float = PROFILE_INTERVAL_MS,
+    ) -> None:
+        self.app = app
+        self.token = token
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.keep = max(1, keep)
+        self.min_ms = min_ms
+        self.interval = interval_ms / 1000
+        self._busy = False
+
+    def _wanted(self, scope) -> bool:
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return True
+        if not self.token:
+            return False
+        for name, value in scope.get("headers", ()):
+            if name == PROFILE_HEADER.encode():
+                return hmac.compare_digest(value.decode("latin-1"), self.token)
+        return False
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or self._busy or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        status_code = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        sampler = StackSampler(self.interval)
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        sampler.start()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            sampler.stop()
+            self._busy = False
+            duration_ms = (time.perf_counter() - started) * 1000
+            if duration_ms >= self.min_ms:
+                meta = {
+                    "id": f"{started_at:%Y%m%dT%H%M%S%f}-{os.urandom(3).hex()}",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": round(duration_ms, 3),
+                    "samples": sum(sampler.stacks.values()),
+                    "created_at": started_at.isoformat(),
+                }
+                await run_in_threadpool(_save_profile, profiler, sampler, meta, self.directory, self.keep)
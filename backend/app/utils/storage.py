@@ -0,0 +1,130 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.models.file import MemoryFile
+from app.utils.chain_of_custody import log_event
+from app.utils.hashing import MERKLE_CHUNK_SIZE, HashingWriter, merkle_root
+from app.utils.metrics import timed
+
+UPLOAD_DIR = Path("uploads")
+
+ALLOWED_EXTENSIONS = (".raw", ".vmem")
+
+# Bytes pulled from the request per iteration; peak memory per upload is
+# bounded by this value regardless of the size of the dump.
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def blob_path(sha256: str) -> Path:
+    """Content-addressed location of a dump: ``uploads/blobs/ab/abcdef...``."""
+    return UPLOAD_DIR / "blobs" / sha256[:2] / sha256
+
+
+def is_allowed_dump_name(filename: str) -> bool:
+    return bool(filename) and filename.endswith(ALLOWED_EXTENSIONS)
+
+
+def _flush_and_sync(f) -> None:
+    f.flush()
+    os.fsync(f.fileno())
+
+
+@timed("upload.receive")
+async def stream_upload_to_temp(
+    upload: UploadFile, directory: Path, chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> Tuple[Path, int, Dict[str, str], List[str]]:
+    """
+    Stream an uploaded file into a temporary file inside ``directory`` while
+    computing its MD5/SHA-1/SHA-256 and Merkle leaves, and return
+    ``(temp_path, size_bytes, digests, leaves)``.
+
+    The temporary file lives in the destination directory so that it can be
+    moved into place atomically with :func:`commit_file`. It is removed if
+    the upload fails part way through.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    tmp_path = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            writer = HashingWriter(f)
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                await run_in_threadpool(writer.write, chunk)
+            await run_in_threadpool(_flush_and_sync, f)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return tmp_path, writer.size, writer.hexdigests(), writer.merkle_leaves()
+
+
+def commit_file(tmp_path: Path, target_path: Path) -> None:
+    """Atomically move a fully written temporary file to its final path."""
+    os.replace(tmp_path, target_path)
+
+
+@timed("upload.store")
+async def store_memory_file(
+    session: AsyncSession,
+    case_id: str,
+    filename: str,
+    tmp_path: Path,
+    size_bytes: int,
+    digests: Dict[str, str],
+    leaves: List[str],
+) -> MemoryFile:
+    """
+    Move a fully received and hashed dump into the content-addressed store
+    and register it as evidence (``MemoryFile`` row plus custody entry).
+
+    ``digests`` and the ``MERKLE_CHUNK_SIZE`` Merkle ``leaves`` come from
+    the pass that received the dump; the file is not read again here.
+
+    Dumps are stored once per SHA-256: if the same image was uploaded before,
+    the new temp file is discarded and the new ``MemoryFile`` row points at
+    the existing blob.
+    """
+    sha256 = digests["sha256"]
+    target_path = blob_path(sha256)
+    deduplicated = target_path.exists()
+    if deduplicated:
+        tmp_path.unlink(missing_ok=True)
+    else:
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        commit_file(tmp_path, target_path)
+
+    mem_file = MemoryFile(
+        case_id=case_id,
+        filename=filename,
+        stored_path=str(target_path),
+        size_bytes=size_bytes,
+        sha256=sha256,
+        md5=digests.get("md5"),
+        sha1=digests.get("sha1"),
+        merkle_chunk_size=MERKLE_CHUNK_SIZE,
+        merkle_root=merkle_root(leaves),
+        merkle_leaves=leaves,
+    )
+    session.add(mem_file)
+    await session.commit()
+    await session.refresh(mem_file)
+
+    await log_event(
+        session,
+        event_type="upload",
+        description=(
+            f"File uploaded: {mem_file.filename} (MD5={mem_file.md5}, SHA-1={mem_file.sha1}, "
+            f"SHA-256={sha256}, Merkle root={mem_file.merkle_root})"
+            + (", identical to previously stored evidence" if deduplicated else "")
+        ),
+        file_id=mem_file.id,
+    )
+    return mem_file
@@ -0,0 +1,51 @@
+"""
+Startup warm-up.
+
+Heavy libraries are imported on first use, so the API starts, reloads and
+is imported by tools quickly. Right after startup the warm-up loads them in
+the background, so the first report or analysis does not pay for it either:
+
+- in the API process: ReportLab and Pillow, for reports and graphs;
+- in each analysis worker: NumPy, pandas, scikit-learn and the model.
+
+Requests are served while it runs. Disable with ``APP_WARMUP=0``, e.g. for
+short-lived scripts and tests.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.jobs.queue import job_queue
+
+logger = logging.getLogger(__name__)
+
+APP_WARMUP = os.getenv("APP_WARMUP", "1") not in ("0", "false", "False")
+
+
+def _import_report_libraries() -> None:
+    import PIL.ImageDraw  # noqa: F401
+    import PIL.ImageFont  # noqa: F401
+
+    import app.reports.pdf  # noqa: F401
+
+
+async def warm_up() -> None:
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(run_in_threadpool(_import_report_libraries), job_queue.warm_up())
+    except Exception:  # noqa: BLE001
+        logger.warning("Warm-up failed; libraries will load on first use.", exc_info=True)
+        return
+    logger.info("Warm-up finished in %.2fs.", time.perf_counter() - started)
+
+
+def start_warm_up() -> Optional[asyncio.Task]:
+    """Schedule :func:`warm_up` in the background unless disabled."""
+    if not APP_WARMUP:
+        return None
+    return asyncio.create_task(warm_up())
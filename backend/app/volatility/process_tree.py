@@ -0,0 +1,80 @@
+"""
+Parent/child index over ``pslist`` output.
+
+Processes are visited once in start order (``create_time`` when every entry
+has one, otherwise list order, which is how pslist reports them) while
+remembering the latest process seen for each PID. A process's parent is
+therefore the most recent process with PID == its PPID that started before
+it, so children of a reused PID attach to the right instance, and cycles
+cannot occur. Processes whose parent is not in the list are roots flagged as
+orphans (PPID 0 / missing is a plain root).
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+class ProcessTree:
+    """Index of ``processes`` by position: ``parent[i]`` and ``children[i]``."""
+
+    def __init__(self, processes: Sequence[Dict[str, Any]]) -> None:
+        self.processes = list(processes)
+        n = len(self.processes)
+        self.parent: List[int] = [-1] * n
+        self.children: List[List[int]] = [[] for _ in range(n)]
+        self.orphan: List[bool] = [False] * n
+        self.roots: List[int] = []
+
+        if n and all(p.get("create_time") is not None for p in self.processes):
+            self.order = sorted(range(n), key=lambda i: (str(self.processes[i]["create_time"]), i))
+        else:
+            self.order = list(range(n))
+
+        latest: Dict[int, int] = {}
+        for i in self.order:
+            proc = self.processes[i]
+            ppid = proc.get("ppid")
+            parent = latest.get(ppid) if ppid is not None else None
+            if parent is None:
+                self.roots.append(i)
+                self.orphan[i] = bool(ppid)
+            else:
+                self.parent[i] = parent
+                self.children[parent].append(i)
+            if proc.get("pid") is not None:
+                latest[proc["pid"]] = i
+
+    def __len__(self) -> int:
+        return len(self.processes)
+
+    def subtree_sizes(self) -> List[int]:
+        """Number of processes in each subtree, including its root."""
+        sizes = [1] * len(self)
+        # Children always come after their parent in start order.
+        for i in reversed(self.order):
+            if self.parent[i] >= 0:
+                sizes[self.parent[i]] += sizes[i]
+        return sizes
+
+    def marks_subtree(self, predicate: Callable[[Dict[str, Any]], bool]) -> List[bool]:
+        """Whether each subtree contains a process matching ``predicate``."""
+        marked = [bool(predicate(p)) for p in self.processes]
+        for i in reversed(self.order):
+            if marked[i] and self.parent[i] >= 0:
+                marked[self.parent[i]] = True
+        return marked
+
+    def walk(self, roots: Optional[Sequence[int]] = None) -> Iterator[Tuple[int, int]]:
+        """Pre-order ``(index, depth)`` traversal, without recursion."""
+        stack = [(i, 0) for i in reversed(self.roots if roots is None else roots)]
+        while stack:
+            i, depth = stack.pop()
+            yield i, depth
+            stack.extend((c, depth + 1) for c in reversed(self.children[i]))
+
+    def nested(self) -> List[Dict[str, Any]]:
+        """The tree as nested dicts: each process plus ``children`` and ``orphan``."""
+        nodes = [{**p, "orphan": o, "children": []} for p, o in zip(self.processes, self.orphan)]
+        for i in self.order:
+            if self.parent[i] >= 0:
+                nodes[self.parent[i]]["children"].append(nodes[i])
+        return [nodes[i] for i in self.roots]
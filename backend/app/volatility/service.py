@@ -1,30 +1,45 @@
+import json
+import multiprocessing
+import os
+import queue
+import time
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
+from app.volatility.process_tree import ProcessTree
 
-def run_volatility_plugins(dump_path: Path) -> Dict[str, Any]:
-    """
-    Wrapper around Volatility 3.
+DEFAULT_PLUGINS = ("pslist", "pstree", "malfind", "dlllist", "handles", "netscan", "cmdline")
 
-    In a production deployment this should import and run real Volatility3
-    plugins (pslist, pstree, malfind, dlllist, handles, netscan, cmdline)
-    and normalize their output to JSON.
+# Seconds each plugin may run, counted from when it starts. Override per
+# plugin through the ``timeouts`` argument of :func:`run_volatility_plugins`.
+PLUGIN_TIMEOUT = float(os.getenv("VOLATILITY_PLUGIN_TIMEOUT", "900"))
+# One process per plugin: plugin runs mostly wait on I/O, and a plugin
+# queued behind a slow one would not start at all.
+PLUGIN_WORKERS = int(os.getenv("VOLATILITY_PLUGIN_WORKERS", str(len(DEFAULT_PLUGINS))))
+# How often the parent checks for started, finished and overdue plugins.
+_POLL_INTERVAL = 0.05
 
-    For environments without volatility3 installed or when analysis fails,
-    this function should raise a RuntimeError or return a best-effort,
-    clearly-marked partial result.
-    """
+# JSON file mapping plugin names to rows, served instead of the built-in mock
+# output (synthetic datasets for benchmarks and demos; see benchmarks/synthetic.py).
+VOLATILITY_FIXTURE = os.getenv("VOLATILITY_FIXTURE")
+
+_fixtures: Dict[str, Dict[str, Any]] = {}
+
+# Set in pool workers: where they announce (plugin, start time).
+_started_queue = None
+
+
+def _mock_processes() -> List[Dict[str, Any]]:
     # TODO: integrate real volatility3. For now, we return a mocked structure
     # so that the rest of the pipeline works end-to-end.
     # This minimal data is enough to drive the ML/dashboards.
-    processes = [
+    return [
         {
             "pid": 4,
             "ppid": 0,
             "name": "System",
             "threads": 80,
             "dll_count": 120,
-            "entropy": 0.3,
             "suspicious": False,
             "connections": [],
         },
@@ -34,7 +49,6 @@ def run_volatility_plugins(dump_path: Path) -> Dict[str, Any]:
             "name": "svch0st.exe",
             "threads": 12,
             "dll_count": 30,
-            "entropy": 0.92,
             "suspicious": True,
             "connections": [
                 {"remote_ip": "185.23.1.10", "remote_port": 4444, "protocol": "TCP"},
@@ -42,18 +56,192 @@ def run_volatility_plugins(dump_path: Path) -> Dict[str, Any]:
         },
     ]
 
-    netscan = [c for p in processes for c in p.get("connections", [])]
 
-    return {
-        "pslist": processes,
-        "pstree": processes,  # simplified for now
-        "malfind": [],
-        "dlllist": [],
-        "handles": [],
-        "netscan": netscan,
-        "cmdline": [],
-        "source": "mock",
-    }
+def _pslist(dump_path: Path) -> List[Dict[str, Any]]:
+    return _mock_processes()
+
+
+def _pstree(dump_path: Path) -> List[Dict[str, Any]]:
+    return ProcessTree(_pslist(dump_path)).nested()
+
+
+def _netscan(dump_path: Path) -> List[Dict[str, Any]]:
+    return [
+        {**c, "pid": p["pid"], "owner": p["name"]}
+        for p in _mock_processes()
+        for c in p.get("connections", [])
+    ]
+
+
+def _malfind(dump_path: Path) -> List[Dict[str, Any]]:
+    # Regions are given as file offsets into the image so the entropy engine
+    # can read them directly.
+    return [
+        {
+            "pid": 5324,
+            "process": "svch0st.exe",
+            "offset": 1024 * 1024,
+            "size": 256 * 1024,
+            "protection": "PAGE_EXECUTE_READWRITE",
+        },
+    ]
+
+
+def _dlllist(dump_path: Path) -> List[Dict[str, Any]]:
+    return [
+        {
+            "pid": 4,
+            "process": "System",
+            "name": "ntoskrnl.exe",
+            "path": "\\SystemRoot\\system32\\ntoskrnl.exe",
+            "offset": 0,
+            "size": 1024 * 1024,
+        },
+    ]
+
+
+def _empty(dump_path: Path) -> List[Dict[str, Any]]:
+    return []
+
+
+_PLUGINS: Dict[str, Callable[[Path], List[Dict[str, Any]]]] = {
+    "pslist": _pslist,
+    "pstree": _pstree,
+    "malfind": _malfind,
+    "dlllist": _dlllist,
+    "handles": _empty,
+    "netscan": _netscan,
+    "cmdline": _empty,
+}
+
+
+def _fixture_rows(path: str, name: str) -> List[Dict[str, Any]]:
+    if path not in _fixtures:
+        with open(path, "r", encoding="utf-8") as f:
+            _fixtures[path] = json.load(f)
+    fixture = _fixtures[path]
+    if name == "pstree" and "pstree" not in fixture:
+        return ProcessTree(fixture.get("pslist") or []).nested()
+    return fixture.get(name) or []
+
+
+def run_plugin(name: str, dump_path: str) -> List[Dict[str, Any]]:
+    """Run a single plugin against the dump. Executed inside a pool worker."""
+    try:
+        plugin = _PLUGINS[name]
+    except KeyError:
+        raise ValueError(f"Unknown Volatility plugin: {name}") from None
+    if VOLATILITY_FIXTURE:
+        return _fixture_rows(VOLATILITY_FIXTURE, name)
+    return plugin(Path(dump_path))
+
+
+def _init_plugin_worker(started_queue) -> None:
+    global _started_queue
+    _started_queue = started_queue
+
+
+def _run_plugin_timed(name: str, dump_path: str):
+    if _started_queue is not None:
+        _started_queue.put((name, time.time()))
+    started = time.monotonic()
+    result = run_plugin(name, dump_path)
+    return result, time.monotonic() - started
+
+
+def run_volatility_plugins(
+    dump_path: Path,
+    plugins: Sequence[str] = DEFAULT_PLUGINS,
+    timeout: float = PLUGIN_TIMEOUT,
+    timeouts: Optional[Dict[str, float]] = None,
+    max_workers: int = PLUGIN_WORKERS,
+    on_progress: Optional[Callable[..., None]] = None,
+) -> Dict[str, Any]:
+    """
+    Wrapper around Volatility 3.
+
+    In a production deployment this should import and run real Volatility3
+    plugins (pslist, pstree, malfind, dlllist, handles, netscan, cmdline)
+    and normalize their output to JSON.
+
+    Plugins run concurrently in a process pool, so wall-clock time is bounded
+    by the slowest plugin rather than the sum of all of them. A plugin that
+    raises or exceeds its timeout contributes an empty list, the result is
+    flagged ``"partial": True`` and ``plugin_status`` says what happened.
+    A plugin's timeout counts from when a worker starts it, not from
+    submission. Plugins still running past their deadline are killed with
+    the pool. A RuntimeError is raised only if every plugin fails.
+
+    ``on_progress(event, **data)`` is called with ``plugin_started`` when a
+    worker picks a plugin up and ``plugin_finished`` (with its status) when
+    it ends.
+    """
+    timeouts = timeouts or {}
+    output: Dict[str, Any] = {}
+    plugin_status: Dict[str, Dict[str, Any]] = {}
+
+    context = multiprocessing.get_context()
+    started_queue = context.Queue()
+    pool = context.Pool(
+        processes=max(1, min(max_workers, len(plugins))),
+        initializer=_init_plugin_worker,
+        initargs=(started_queue,),
+    )
+    try:
+        pending = {name: pool.apply_async(_run_plugin_timed, (name, str(dump_path))) for name in plugins}
+        deadlines: Dict[str, float] = {}
+        while pending:
+            wait = _POLL_INTERVAL
+            while True:
+                try:
+                    name, started_at = started_queue.get(timeout=wait)
+                except queue.Empty:
+                    break
+                wait = 0
+                if name in pending and name not in deadlines:
+                    deadlines[name] = started_at + timeouts.get(name, timeout)
+                    if on_progress is not None:
+                        on_progress("plugin_started", plugin=name)
 
+            now = time.time()
+            for name in list(pending):
+                result = pending[name]
+                if result.ready():
+                    del pending[name]
+                    try:
+                        output[name], elapsed = result.get()
+                        plugin_status[name] = {"status": "ok", "elapsed": round(elapsed, 3)}
+                    except Exception as exc:  # noqa: BLE001
+                        output[name] = []
+                        plugin_status[name] = {"status": "failed", "error": str(exc)}
+                elif deadlines.get(name, float("inf")) <= now:
+                    del pending[name]
+                    output[name] = []
+                    plugin_status[name] = {
+                        "status": "timeout",
+                        "error": f"exceeded {timeouts.get(name, timeout):g}s",
+                    }
+                else:
+                    continue
+                if on_progress is not None:
+                    if name not in deadlines:  # its start notice is still in flight
+                        deadlines[name] = now
+                        on_progress("plugin_started", plugin=name)
+                    on_progress("plugin_finished", plugin=name, **plugin_status[name])
+    finally:
+        # Cancels plugins that are still running after their deadline.
+        pool.terminate()
+        pool.join()
+        started_queue.close()
 
+    failed = [name for name, s in plugin_status.items() if s["status"] != "ok"]
+    if plugins and len(failed) == len(plugins):
+        raise RuntimeError(
+            "All Volatility plugins failed: "
+            + ", ".join(f"{n} ({plugin_status[n].get('error')})" for n in failed)
+        )
 
+    output["source"] = "fixture" if VOLATILITY_FIXTURE else "mock"
+    output["partial"] = bool(failed)
+    output["plugin_status"] = plugin_status
+    return output
@@ -0,0 +1,314 @@
+"""
+End-to-end benchmark: API latency/throughput through the ASGI app in-process,
+plus micro-benchmarks of the hot library functions.
+
+A throwaway workspace (database, uploads, caches) is created in a temporary
+directory; synthetic images and a synthetic Volatility fixture with N
+processes are generated there (see ``benchmarks.synthetic``). Measured:
+
+- ``POST /api/upload`` (latency, MB/s)
+- ``POST /api/analyze/{id}`` until the job completes (latency per job)
+- ``GET /api/results/{id}``, ``GET /api/alerts/list``
+- ``GET /api/report/{id}`` (first render and cached)
+- ``sha256_file``, ``SimpleAnomalyModel.predict_processes``, ``analyze_strings``
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_e2e --size-mb 64 --files 4 --processes 2000 --output bench.json
+    python -m benchmarks.bench_e2e --compare bench.json --threshold 0.25
+
+With ``--compare``, the run fails (exit status 1) when a latency or duration
+regressed by more than ``--threshold`` against the baseline file.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+_MB = 1024 * 1024
+
+
+def latency_stats(samples: List[float], wall: Optional[float] = None) -> Dict[str, Any]:
+    """Summary of per-request latencies (seconds) in milliseconds."""
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    wall = sum(samples) if wall is None else wall
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": ordered[-1] * 1000,
+        "requests_per_sec": len(ordered) / wall if wall else 0.0,
+    }
+
+
+async def _timed_requests(
+    send: Callable[[], Awaitable[Any]], count: int, concurrency: int
+) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            response = await send()
+            samples.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    return latency_stats(samples, time.perf_counter() - started)
+
+
+async def bench_api(args: argparse.Namespace, images: List[Path]) -> List[Dict[str, Any]]:
+    import httpx
+
+    from app.main import app
+
+    results: List[Dict[str, Any]] = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            # Upload
+            file_ids, samples = [], []
+            started = time.perf_counter()
+            for image in images:
+                t0 = time.perf_counter()
+                with image.open("rb") as f:
+                    response = await client.post(
+                        "/api/upload", data={"case_id": "bench"}, files={"file": (image.name, f)}
+                    )
+                response.raise_for_status()
+                samples.append(time.perf_counter() - t0)
+                file_ids.append(response.json()["id"])
+            wall = time.perf_counter() - started
+            total = sum(image.stat().st_size for image in images)
+            results.append(
+                {"name": "api.upload", **latency_stats(samples, wall), "mb_per_sec": total / _MB / wall}
+            )
+
+            # Analyze: queue every file, then poll until all jobs finish.
+            submitted: Dict[int, float] = {}
+            for file_id in file_ids:
+                t0 = time.perf_counter()
+                response = await client.post(f"/api/analyze/{file_id}")
+                response.raise_for_status()
+                submitted[response.json()["job_id"]] = t0
+            started = min(submitted.values())
+            samples = []
+            pending = set(submitted)
+            while pending:
+                for job_id in list(pending):
+                    status = (await client.get(f"/api/analyze/jobs/{job_id}")).json()["status"]
+                    if status == "failed":
+                        raise RuntimeError(f"analysis job {job_id} failed")
+                    if status == "completed":
+                        samples.append(time.perf_counter() - submitted[job_id])
+                        pending.discard(job_id)
+                await asyncio.sleep(args.poll_interval)
+            results.append({"name": "api.analyze", **latency_stats(samples, time.perf_counter() - started)})
+
+            def cycle(make_url: Callable[[int], str]) -> Callable[[], Awaitable[Any]]:
+                counter = iter(range(sys.maxsize))
+                return lambda: client.get(make_url(file_ids[next(counter) % len(file_ids)]))
+
+            results.append(
+                {
+                    "name": "api.results",
+                    **await _timed_requests(
+                        cycle(lambda i: f"/api/results/{i}"), args.requests, args.concurrency
+                    ),
+                }
+            )
+            results.append(
+                {
+                    "name": "api.alerts_list",
+                    **await _timed_requests(
+                        lambda: client.get("/api/alerts/list", params={"limit": 100}),
+                        args.requests,
+                        args.concurrency,
+                    ),
+                }
+            )
+
+            # Report: the first request per file renders, later ones hit the cache.
+            samples = []
+            for file_id in file_ids:
+                t0 = time.perf_counter()
+                (await client.get(f"/api/report/{file_id}")).raise_for_status()
+                samples.append(time.perf_counter() - t0)
+            results.append({"name": "api.report_render", **latency_stats(samples)})
+            results.append(
+                {
+                    "name": "api.report_cached",
+                    **await _timed_requests(
+                        cycle(lambda i: f"/api/report/{i}"), args.requests, args.concurrency
+                    ),
+                }
+            )
+    return results
+
+
+def bench_micro(args: argparse.Namespace, image: Path, fixture: Dict[str, Any]) -> List[Dict[str, Any]]:
+    from app.dl.text_model import analyze_strings
+    from app.ml.registry import get_model
+    from app.utils.hashing import sha256_file
+
+    def best_of(fn: Callable[[], Any]) -> float:
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    results = []
+    size = image.stat().st_size
+    seconds = best_of(lambda: sha256_file(image))
+    results.append({"name": "sha256_file", "bytes": size, "seconds": seconds, "mb_per_sec": size / _MB / seconds})
+
+    model = get_model()
+    processes = fixture["pslist"]
+    seconds = best_of(lambda: model.predict_processes(processes))
+    results.append(
+        {"name": "predict_processes", "rows": len(processes), "seconds": seconds, "rows_per_sec": len(processes) / seconds}
+    )
+
+    strings = [c["cmdline"] for c in fixture["cmdline"]] * max(1, args.strings // max(1, len(fixture["cmdline"])))
+    seconds = best_of(lambda: analyze_strings(strings))
+    results.append(
+        {"name": "analyze_strings", "rows": len(strings), "seconds": seconds, "rows_per_sec": len(strings) / seconds}
+    )
+    return results
+
+
+# Lower is better for these; throughput metrics are informational.
+_COMPARED = ("p50_ms", "p95_ms", "seconds")
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Human-readable regressions of ``results`` against a previous run."""
+    previous = {r["name"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        for metric in _COMPARED:
+            if metric in result and before.get(metric):
+                change = result[metric] / before[metric] - 1
+                if change > threshold:
+                    regressions.append(
+                        f"{result['name']}.{metric}: {before[metric]:.3f} -> {result[metric]:.3f} ({change:+.0%})"
+                    )
+    return regressions
+
+
+def _prepare_workspace(workdir: Path) -> None:
+    """Point the app's storage at ``workdir``; must run before ``app`` is imported."""
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{workdir / 'bench.db'}"
+    os.environ["REPORT_CACHE_DIR"] = str(workdir / "report_cache")
+    os.environ["CUSTODY_KEY_PATH"] = str(workdir / "custody.key")
+    os.environ.setdefault("MODEL_DIR", str(workdir / "models"))
+    os.environ["VOLATILITY_FIXTURE"] = str(workdir / "volatility.json")
+    # Relative paths (uploads/) resolve inside the workspace.
+    os.chdir(workdir)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=32, help="Size of each synthetic image.")
+    parser.add_argument("--files", type=int, default=2, help="Images uploaded and analyzed.")
+    parser.add_argument("--processes", type=int, default=1000)
+    parser.add_argument("--connections", type=int, default=4000)
+    parser.add_argument("--cmdlines", type=int, default=1000)
+    parser.add_argument("--strings", type=int, default=100000, help="Strings for analyze_strings.")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per GET endpoint.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent GET requests.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions of each micro-benchmark (best is kept).")
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-api", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--output", type=Path, help="Write JSON results to this file.")
+    parser.add_argument("--json", action="store_true", help="Print JSON results.")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON from an earlier run.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown vs. the baseline.")
+    args = parser.parse_args()
+
+    output_path = args.output.resolve() if args.output else None
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+
+    from benchmarks.synthetic import make_image, make_volatility_output, write_fixture
+
+    with tempfile.TemporaryDirectory(prefix="bench-e2e-") as tmp:
+        workdir = Path(tmp)
+        fixture = make_volatility_output(
+            args.processes, args.connections, args.cmdlines, args.size_mb * _MB, seed=args.seed
+        )
+        write_fixture(workdir / "volatility.json", fixture)
+        images = []
+        for i in range(max(1, args.files)):
+            image = workdir / f"synthetic_{i}.raw"
+            make_image(image, args.size_mb, seed=args.seed + i)
+            images.append(image)
+
+        cwd = os.getcwd()
+        _prepare_workspace(workdir)
+        try:
+            results: List[Dict[str, Any]] = []
+            if not args.skip_micro:
+                results += bench_micro(args, images[0], fixture)
+            if not args.skip_api:
+                results += asyncio.run(bench_api(args, images))
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "params": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        },
+        "results": results,
+    }
+    if output_path:
+        output_path.write_text(json.dumps(report, indent=2))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for r in results:
+            if "p50_ms" in r:
+                print(
+                    f"{r['name']:<20} n={r['count']:<5} p50 {r['p50_ms']:9.1f} ms  p95 {r['p95_ms']:9.1f} ms  "
+                    f"{r['requests_per_sec']:8.1f} req/s"
+                )
+            else:
+                rate = f"{r['mb_per_sec']:8.1f} MB/s" if "mb_per_sec" in r else f"{r['rows_per_sec']:10.0f} rows/s"
+                print(f"{r['name']:<20} {r['seconds']:9.3f} s  {rate}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Block entropy throughput (MB/s) over a whole image for several worker counts.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_entropy --size-mb 1024 --workers 1 2 4 8
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_strings import make_image
+
+
+def main() -> None:
+    from app.ml.entropy import compute_entropy_features
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--block-size", type=int, default=64 * 1024)
+    parser.add_argument("--image", type=Path, help="Profile an existing image instead of a random one.")
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable JSON.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image = args.image
+        if image is None:
+            image = Path(tmp) / "synthetic.raw"
+            make_image(image, args.size_mb)
+        size = image.stat().st_size
+
+        results = []
+        for workers in args.workers:
+            started = time.perf_counter()
+            features = compute_entropy_features(image, {}, block_size=args.block_size, workers=workers)
+            elapsed = time.perf_counter() - started
+            results.append(
+                {
+                    "name": "block_entropy",
+                    "workers": workers,
+                    "bytes": size,
+                    "blocks": features["image"].get("blocks", 0),
+                    "seconds": elapsed,
+                    "mb_per_sec": size / elapsed / 1e6,
+                }
+            )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"workers={r['workers']:<3} {r['blocks']:>10} blocks  {r['seconds']:8.2f}s  {r['mb_per_sec']:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Process tree index, collapse and image rendering time for large synthetic trees.
+
+Trees are random forests with reused PIDs, orphans and a few malicious
+processes. Run from the backend directory:
+
+    python -m benchmarks.bench_graphs --nodes 1000 10000 100000
+"""
+
+import argparse
+import json
+import random
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+
+def make_processes(n: int, seed: int = 0, malicious_ratio: float = 0.003, orphan_ratio: float = 0.01):
+    rng = random.Random(seed)
+    processes = [{"pid": 4, "ppid": 0, "name": "System", "label": "benign"}]
+    for i in range(1, n):
+        parent = processes[rng.randrange(len(processes))]["pid"] if rng.random() > orphan_ratio else 1
+        processes.append(
+            {
+                # A small PID space makes reuse common.
+                "pid": rng.randrange(2, max(3, n // 2)) * 4,
+                "ppid": parent,
+                "name": f"proc{i}.exe",
+                "label": "malicious" if rng.random() < malicious_ratio else "benign",
+                "suspicious": False,
+                "anomaly_score": rng.random(),
+            }
+        )
+    return processes
+
+
+def run(n: int, out_dir: Path) -> dict:
+    from app.reports.graphs import render_network_graph, render_process_tree, tree_rows
+    from app.volatility.process_tree import ProcessTree
+
+    processes = make_processes(n, seed=n)
+
+    started = time.perf_counter()
+    tree = ProcessTree(processes)
+    index_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    rows = tree_rows(tree)
+    collapse_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    render_process_tree(processes, out_dir / "tree.png")
+    tree_seconds = time.perf_counter() - started
+
+    rng = random.Random(n)
+    edges = [(p["pid"], p["name"], f"10.0.{rng.randrange(64)}.{rng.randrange(256)}", rng.randint(1, 50)) for p in processes]
+    flagged = {p["pid"] for p in processes if p["label"] == "malicious"}
+    started = time.perf_counter()
+    render_network_graph(edges, flagged, out_dir / "network.png")
+    network_seconds = time.perf_counter() - started
+
+    return {
+        "name": "graphs",
+        "nodes": n,
+        "roots": len(tree.roots),
+        "rows": len(rows),
+        "index_seconds": index_seconds,
+        "collapse_seconds": collapse_seconds,
+        "tree_render_seconds": tree_seconds,
+        "network_render_seconds": network_seconds,
+        "tree_png_bytes": (out_dir / "tree.png").stat().st_size,
+        "network_png_bytes": (out_dir / "network.png").stat().st_size,
+        # ru_maxrss is in KiB on Linux.
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable JSON.")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.nodes:
+            results.append(run(n, Path(tmp)))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(
+            f"nodes={r['nodes']:<8} index {r['index_seconds']:6.3f}s  collapse {r['collapse_seconds']:6.3f}s  "
+            f"tree {r['tree_render_seconds']:6.3f}s  network {r['network_render_seconds']:6.3f}s  "
+            f"{r['rows']:>4} rows  peak RSS {r['peak_rss_mb']:.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Throughput of SimpleAnomalyModel.predict_processes / predict_batch.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_ml --sizes 10000 100000
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+
+def synthetic_processes(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    processes = []
+    for i in range(n):
+        conns = [
+            {"remote_ip": f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}", "remote_port": 443, "protocol": "TCP"}
+            for _ in range(rng.choice((0, 0, 0, 1, 2)))
+        ]
+        processes.append(
+            {
+                "pid": 4 * (i + 1),
+                "ppid": 4 * rng.randint(0, i) if i else 0,
+                "name": f"proc{i}.exe",
+                "threads": rng.randint(1, 64),
+                "dll_count": rng.randint(0, 150),
+                "entropy": rng.random(),
+                "suspicious": rng.random() < 0.02,
+                "connections": conns,
+            }
+        )
+    return processes
+
+
+def bench(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    from app.ml.registry import get_model
+
+    model = get_model()
+
+    results = []
+    for n in sizes:
+        processes = synthetic_processes(n)
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            model.predict_processes(processes)
+            best = min(best, time.perf_counter() - started)
+        results.append({"name": "predict_processes", "rows": n, "seconds": best, "rows_per_sec": n / best})
+
+        # Same rows split across 8 dumps, scored in one call.
+        batch = [processes[i::8] for i in range(8)]
+        started = time.perf_counter()
+        model.predict_batch(batch)
+        elapsed = time.perf_counter() - started
+        results.append({"name": "predict_batch[8]", "rows": n, "seconds": elapsed, "rows_per_sec": n / elapsed})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable JSON.")
+    args = parser.parse_args()
+
+    results = bench(args.sizes, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"{r['name']:<20} {r['rows']:>8} rows  {r['seconds']:8.3f}s  {r['rows_per_sec']:>12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+PDF report rendering time, size and peak memory for large synthetic sections.
+
+Rows are generated lazily (as the DB-backed sections produce them), so peak
+memory reflects the renderer rather than the input. Run from the backend
+directory:
+
+    python -m benchmarks.bench_report --rows 10000 50000 --chunk-rows 250
+"""
+
+import argparse
+import json
+import random
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+
+def _process_rows(n: int, rng: random.Random):
+    for i in range(n):
+        score = rng.random()
+        yield (
+            1000 + i, rng.randint(4, 999), f"proc{i % 500}.exe", rng.randint(1, 64), rng.randint(5, 200),
+            rng.random(), score > 0.9, score, rng.random(), "malicious" if score > 0.9 else "benign",
+        )
+
+
+def _connection_rows(n: int, rng: random.Random):
+    for i in range(n):
+        yield (
+            1000 + i % 5000, f"proc{i % 500}.exe", "TCP", f"10.0.0.{i % 250}:{49152 + i % 16000}",
+            f"185.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}:443", "ESTABLISHED",
+        )
+
+
+def _alerts(n: int, rng: random.Random):
+    for i in range(n):
+        yield {
+            "created_at": f"2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}",
+            "process_name": f"proc{i % 500}.exe",
+            "pid": 1000 + i,
+            "label": "malicious",
+            "anomaly_score": rng.random(),
+            "ml_confidence": rng.random(),
+        }
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(rows: int, chunk_rows: int, out: Path) -> dict:
+    from app.reports import pdf
+
+    rng = random.Random(rows)
+    sections = [
+        pdf.ReportSection("Processes", ["PID", "PPID", "Name", "Threads", "DLLs", "Entropy", "Suspicious",
+                                        "Anomaly", "Confidence", "Label"], _process_rows(rows, rng), total=rows),
+        pdf.ReportSection("Network connections", ["PID", "Owner", "Proto", "Local", "Remote", "State"],
+                          _connection_rows(rows // 4, rng), total=rows // 4),
+    ]
+    alerts = pdf.alerts_section(_alerts(rows // 10, rng), total=rows // 10)
+
+    original_chunk_rows = pdf.REPORT_TABLE_CHUNK_ROWS
+    pdf.REPORT_TABLE_CHUNK_ROWS = chunk_rows
+    try:
+        started = time.perf_counter()
+        pdf.build_pdf_report(
+            {"filename": "synthetic.raw", "sha256": "0" * 64, "size_bytes": 0, "case_id": "bench"},
+            None,
+            {"max_anomaly_score": 1.0, "any_malicious": True},
+            None,
+            alerts,
+            output=out,
+            sections=sections,
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        pdf.REPORT_TABLE_CHUNK_ROWS = original_chunk_rows
+
+    data = out.read_bytes()
+    return {
+        "name": "pdf_report",
+        "rows": rows,
+        "chunk_rows": chunk_rows,
+        "seconds": elapsed,
+        "rows_per_sec": (rows + rows // 4 + rows // 10) / elapsed,
+        "pages": data.count(b"/Type /Page\n") or data.count(b"/Type /Page "),
+        "bytes": len(data),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 50000], help="Process rows per report.")
+    parser.add_argument("--chunk-rows", type=int, default=250)
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable JSON.")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            results.append(run(rows, args.chunk_rows, Path(tmp) / f"report_{rows}.pdf"))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(
+            f"rows={r['rows']:<8} {r['seconds']:8.2f}s  {r['rows_per_sec']:9.0f} rows/s  "
+            f"{r['pages']:>6} pages  {r['bytes'] / 1e6:7.1f} MB  peak RSS {r['peak_rss_mb']:.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Application startup cost: import time of ``app.main``, startup (database
+migrations, job recovery) and time to first request, each measured in a
+fresh interpreter with a fresh database, plus the heavy libraries that were
+imported along the way (they should only load on first use or in warm-up).
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --budget-ms 1500   # exit 1 if slower
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HEAVY_MODULES = ("numpy", "pandas", "sklearn", "joblib", "reportlab", "PIL")
+
+_CHILD = r"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+heavy = [m for m in {heavy!r} if m in sys.modules]
+
+async def first_request():
+    import httpx
+    from app.main import app
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            (await client.get("/api/files")).raise_for_status()
+        return ready, time.perf_counter()
+
+ready, answered = asyncio.run(first_request())
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "first_request_ms": (answered - ready) * 1000,
+    "heavy_imported": heavy,
+}}))
+"""
+
+
+def run_once(backend: Path) -> dict:
+    with tempfile.TemporaryDirectory(prefix="bench-startup-") as tmp:
+        env = dict(
+            os.environ,
+            PYTHONPATH=str(backend),
+            DATABASE_URL=f"sqlite+aiosqlite:///{tmp}/bench.db",
+            REPORT_CACHE_DIR=f"{tmp}/report_cache",
+            CUSTODY_KEY_PATH=f"{tmp}/custody.key",
+            MODEL_DIR=f"{tmp}/models",
+            # Warm-up runs in the background and is not part of startup.
+            APP_WARMUP="0",
+        )
+        started = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-c", _CHILD.format(heavy=HEAVY_MODULES)],
+            cwd=tmp,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        wall = (time.perf_counter() - started) * 1000
+        created = sorted(p.name for p in Path(tmp).iterdir())
+    result = json.loads(out.strip().splitlines()[-1])
+    result["time_to_first_request_ms"] = result["import_ms"] + result["startup_ms"] + result["first_request_ms"]
+    # Including interpreter start and exit.
+    result["process_ms"] = wall
+    result["created_at_startup"] = [n for n in created if not n.startswith("bench.db")]
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, help="Fail when median time to first request exceeds this.")
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable JSON.")
+    args = parser.parse_args()
+
+    backend = Path(__file__).resolve().parent.parent
+    runs = [run_once(backend) for _ in range(max(1, args.runs))]
+    metrics = ("import_ms", "startup_ms", "first_request_ms", "time_to_first_request_ms", "process_ms")
+    result = {
+        "name": "startup",
+        "runs": len(runs),
+        **{m: statistics.median(r[m] for r in runs) for m in metrics},
+        "heavy_imported": sorted({m for r in runs for m in r["heavy_imported"]}),
+        "created_at_startup": sorted({n for r in runs for n in r["created_at_startup"]}),
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(
+            f"import {result['import_ms']:7.0f} ms  startup {result['startup_ms']:7.0f} ms  "
+            f"first request {result['first_request_ms']:6.0f} ms  total {result['time_to_first_request_ms']:7.0f} ms  "
+            f"(median of {result['runs']})"
+        )
+        print(f"heavy modules imported: {', '.join(result['heavy_imported']) or 'none'}")
+        print(f"created at startup: {', '.join(result['created_at_startup']) or 'nothing'}")
+
+    if args.budget_ms is not None and result["time_to_first_request_ms"] > args.budget_ms:
+        print(
+            f"time to first request {result['time_to_first_request_ms']:.0f} ms exceeds {args.budget_ms:.0f} ms",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
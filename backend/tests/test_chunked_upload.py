@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from app.utils import chunked_upload
+
+pytestmark = pytest.mark.anyio
+
+
+async def _slow_body(data: bytes, pause: float = 0.05):
+    """A request body that stalls halfway, so concurrent PUTs interleave."""
+    half = len(data) // 2
+    yield data[:half]
+    await asyncio.sleep(pause)
+    yield data[half:]
+
+
+async def _start(client, size: int) -> str:
+    response = await client.post(
+        "/api/uploads", json={"case_id": "c1", "filename": "dump.raw", "total_size": size}
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+async def _put(client, upload_id: str, offset: int, data: bytes, slow: bool = False):
+    return await client.put(
+        f"/api/uploads/{upload_id}",
+        params={"offset": offset},
+        content=_slow_body(data) if slow else data,
+        headers={"Content-Length": str(len(data))},
+    )
+
+
+def test_range_helpers():
+    ranges = chunked_upload.merge_range([[0, 10]], 20, 30)
+    ranges = chunked_upload.merge_range(ranges, 10, 20)
+    assert ranges == [[0, 30]]
+    assert chunked_upload.is_covered(ranges, 5, 25)
+    assert not chunked_upload.overlaps([[0, 10]], 10, 20)
+    assert chunked_upload.overlaps([[0, 10]], 9, 20)
+
+
+async def test_parallel_chunks_in_any_order(client):
+    data = os.urandom(64 * 1024)
+    upload_id = await _start(client, len(data))
+    step = 8 * 1024
+    offsets = list(range(0, len(data), step))[::-1]
+    responses = await asyncio.gather(
+        *(_put(client, upload_id, o, data[o : o + step], slow=True) for o in offsets)
+    )
+    assert [r.status_code for r in responses] == [200] * len(offsets)
+
+    response = await client.post(f"/api/uploads/{upload_id}/finalize")
+    assert response.status_code == 200
+    assert response.json()["sha256"] == hashlib.sha256(data).hexdigest()
+
+    # The Merkle leaves hashed while chunks arrived match the stored file.
+    validation = await client.post(f"/api/hash_validation/{response.json()['id']}")
+    assert validation.status_code == 200
+    assert validation.json()["valid"] is True
+    assert validation.json()["method"] == "merkle"
+
+
+async def _fill_gaps(client, upload_id: str, data: bytes) -> None:
+    ranges = (await client.get(f"/api/uploads/{upload_id}")).json()["received_ranges"]
+    position = 0
+    for start, end in ranges + [[len(data), len(data)]]:
+        if start > position:
+            assert (await _put(client, upload_id, position, data[position:start])).status_code == 200
+        position = end
+
+
+async def test_concurrent_overlapping_chunks_are_rejected(client):
+    data = os.urandom(32 * 1024)
+    upload_id = await _start(client, len(data))
+
+    # Whichever reserves its range first is written; the other is refused.
+    responses = await asyncio.gather(
+        _put(client, upload_id, 0, data[: 16 * 1024], slow=True),
+        _put(client, upload_id, 8 * 1024, data[8 * 1024 : 24 * 1024], slow=True),
+    )
+    assert sorted(r.status_code for r in responses) == [200, 409]
+
+    # The same chunk twice at once.
+    responses = await asyncio.gather(
+        _put(client, upload_id, 24 * 1024, data[24 * 1024 :], slow=True),
+        _put(client, upload_id, 24 * 1024, data[24 * 1024 :], slow=True),
+    )
+    assert sorted(r.status_code for r in responses) == [200, 409]
+    # Once received, re-sending it is a no-op.
+    assert (await _put(client, upload_id, 24 * 1024, data[24 * 1024 :])).status_code == 200
+
+    await _fill_gaps(client, upload_id, data)
+    response = await client.post(f"/api/uploads/{upload_id}/finalize")
+    assert response.status_code == 200
+    assert response.json()["sha256"] == hashlib.sha256(data).hexdigest()
+
+
+async def test_finalize_runs_once(client):
+    data = os.urandom(4096)
+    upload_id = await _start(client, len(data))
+    assert (await _put(client, upload_id, 0, data)).status_code == 200
+
+    responses = await asyncio.gather(
+        client.post(f"/api/uploads/{upload_id}/finalize"),
+        client.post(f"/api/uploads/{upload_id}/finalize"),
+    )
+    assert sorted(r.status_code for r in responses) == [200, 409]
+    assert (await _put(client, upload_id, 0, data)).status_code == 409
+
+
+async def test_non_numeric_content_length_is_rejected(client):
+    upload_id = await _start(client, 16)
+    response = await client.put(
+        f"/api/uploads/{upload_id}", params={"offset": 0}, content=b"x" * 16, headers={"Content-Length": "lots"}
+    )
+    assert response.status_code == 400
+
+
+async def test_idle_sessions_expire_and_lose_their_part_file(client, monkeypatch):
+    idle_id = await _start(client, 16)
+    assert (await _put(client, idle_id, 0, b"x" * 8)).status_code == 200
+    assert idle_id in chunked_upload._states
+    assert chunked_upload.part_path(idle_id).exists()
+
+    monkeypatch.setattr(chunked_upload, "UPLOAD_SESSION_TTL", 0.0)
+    await asyncio.sleep(0.01)
+    # Starting another upload sweeps the idle one.
+    await _start(client, 16)
+
+    assert not chunked_upload.part_path(idle_id).exists()
+    assert idle_id not in chunked_upload._states
+    response = await _put(client, idle_id, 8, b"x" * 8)
+    assert response.status_code == 409
+    assert (await client.get(f"/api/uploads/{idle_id}")).json()["status"] == "expired"
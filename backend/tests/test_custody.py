@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal, init_db
+from app.models.file import MemoryFile
+from app.models.log import ChainOfCustodyLog
+from app.utils import chain_of_custody
+from app.utils.chain_of_custody import CustodyLogger, verify_chain
+
+pytestmark = pytest.mark.anyio
+
+
+async def _write(file_id, events: int) -> None:
+    async with AsyncSessionLocal() as session:
+        async with CustodyLogger(session) as custody:
+            for i in range(events):
+                custody.record("test", f"event {i}", file_id=file_id)
+                custody.record("test", f"system event {i}")
+
+
+async def test_concurrent_sessions_extend_one_chain():
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        file_obj = MemoryFile(case_id="c1", filename="dump.raw", stored_path="dump.raw", size_bytes=1, sha256="0" * 64)
+        session.add(file_obj)
+        await session.commit()
+        file_id = file_obj.id
+        system_before = len((await session.scalars(
+            select(ChainOfCustodyLog.seq).where(ChainOfCustodyLog.file_id.is_(None))
+        )).all())
+
+    await asyncio.gather(*(_write(file_id, 3) for _ in range(8)))
+
+    async with AsyncSessionLocal() as session:
+        report = await verify_chain(session, file_id, full=True)
+        system_seqs = (await session.scalars(
+            select(ChainOfCustodyLog.seq).where(ChainOfCustodyLog.file_id.is_(None)).order_by(ChainOfCustodyLog.seq)
+        )).all()
+    assert report["verified"], report
+    assert report["entries_checked"] == 24
+    assert system_seqs == list(range(1, system_before + 25))
+
+
+def test_signing_key_created_once_under_races(tmp_path):
+    path = tmp_path / "custody.key"
+    barrier = threading.Barrier(8)
+    keys = []
+
+    def create():
+        barrier.wait()
+        chain_of_custody._create_key_file(path)
+        keys.append(path.read_text())
+
+    threads = [threading.Thread(target=create) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(keys)) == 1 and len(keys[0]) == 64
+    assert [p.name for p in tmp_path.iterdir()] == ["custody.key"]
@@ -0,0 +1,13 @@
+from app.dl.extract import iter_string_batches
+
+
+def test_single_worker_scan_matches_pool(tmp_path):
+    path = tmp_path / "image.raw"
+    data = b"\x00" * 50 + b"powershell -enc AAAA" + b"\x01" * 30 + "mimikatz.exe".encode("utf-16le") + b"\x00" * 40
+    path.write_bytes(data * 20)
+
+    serial = list(iter_string_batches(path, chunk_size=256, workers=1))
+    pooled = list(iter_string_batches(path, chunk_size=256, workers=2))
+
+    assert serial == pooled
+    assert sum(len(batch) for batch in serial) == 40
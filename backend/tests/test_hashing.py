@@ -0,0 +1,19 @@
+import io
+
+import pytest
+
+from app.utils.hashing import HashingWriter, merkle_leaves
+
+
+@pytest.mark.parametrize("size", [0, 1, 4095, 4096, 4097, 3 * 4096, 3 * 4096 + 100])
+def test_streamed_leaves_match_file_leaves(tmp_path, size):
+    data = bytes(range(256)) * (size // 256 + 1)
+    data = data[:size]
+    path = tmp_path / "dump.raw"
+    path.write_bytes(data)
+
+    writer = HashingWriter(io.BytesIO(), leaf_size=4096)
+    for start in range(0, size, 1000):  # writes that straddle leaf boundaries
+        writer.write(data[start : start + 1000])
+
+    assert writer.merkle_leaves() == merkle_leaves(path, 4096, workers=1)
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.session import AsyncSessionLocal, init_db
+from app.jobs import queue as queue_module
+from app.jobs.queue import AnalysisJobQueue, fail_interrupted_jobs, heartbeat_jobs
+from app.models.analysis import AnalysisResult
+from app.models.file import MemoryFile
+
+pytestmark = pytest.mark.anyio
+
+
+async def _add_file() -> int:
+    async with AsyncSessionLocal() as session:
+        file_obj = MemoryFile(case_id="c1", filename="dump.raw", stored_path="dump.raw", size_bytes=1, sha256="0" * 64)
+        session.add(file_obj)
+        await session.commit()
+        return file_obj.id
+
+
+async def _add_job(file_id: int, **values) -> int:
+    async with AsyncSessionLocal() as session:
+        job = AnalysisResult(file_id=file_id, status="queued", **values)
+        session.add(job)
+        await session.commit()
+        return job.id
+
+
+async def _status(job_id: int) -> str:
+    async with AsyncSessionLocal() as session:
+        return (await session.get(AnalysisResult, job_id)).status
+
+
+async def test_only_jobs_without_heartbeat_are_failed():
+    await init_db()
+    file_id = await _add_file()
+    long_ago = datetime.utcnow() - timedelta(hours=1)
+    # Another server process, still alive.
+    live = await _add_job(file_id, worker_id="other:1", heartbeat_at=datetime.utcnow())
+    # This process, which heartbeats its own jobs.
+    own = await _add_job(file_id, worker_id="self:1", heartbeat_at=long_ago, created_at=long_ago)
+    # A process that died, and a job from before heartbeats existed.
+    dead = await _add_job(file_id, worker_id="dead:1", heartbeat_at=long_ago, created_at=long_ago)
+    legacy = await _add_job(file_id, created_at=long_ago)
+
+    await heartbeat_jobs("self:1")
+    await fail_interrupted_jobs(timeout=60)
+
+    assert [await _status(job) for job in (live, own, dead, legacy)] == ["queued", "queued", "failed", "failed"]
+
+
+async def test_jobs_run_only_when_a_slot_is_free(monkeypatch):
+    await init_db()
+    file_id = await _add_file()
+    release = threading.Event()
+
+    def pipeline(dump_path, model_version, analysis_id):
+        release.wait(10)
+        raise RuntimeError("stop here")
+
+    monkeypatch.setattr(queue_module, "run_analysis_pipeline", pipeline)
+    job_queue = AnalysisJobQueue(max_workers=1)
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(job_queue, "_get_executor", lambda: executor)
+
+    first, second = await _add_job(file_id), await _add_job(file_id)
+    job_queue.submit(first, file_id, "dump.raw")
+    job_queue.submit(second, file_id, "dump.raw")
+    for _ in range(100):
+        if await _status(first) == "running":
+            break
+        await asyncio.sleep(0.02)
+
+    try:
+        assert [await _status(first), await _status(second)] == ["running", "queued"]
+    finally:
+        release.set()
+        await asyncio.gather(*list(job_queue._tasks.values()))
+        executor.shutdown()
+    assert [await _status(first), await _status(second)] == ["failed", "failed"]
+
+
+async def test_shutdown_waits_for_cancelled_tasks():
+    await init_db()
+    job_queue = AnalysisJobQueue(max_workers=1)
+    job_queue.start()
+    await asyncio.sleep(0)
+    heartbeat = job_queue._heartbeat
+
+    await job_queue.shutdown()
+
+    assert heartbeat.done()
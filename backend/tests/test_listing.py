@@ -0,0 +1,45 @@
+import pytest
+
+from app.db.session import AsyncSessionLocal
+from app.models.alert import Alert
+from app.utils.pagination import DEFAULT_PAGE_SIZE
+
+pytestmark = pytest.mark.anyio
+
+CASE = "listing-case"
+
+
+async def _create_alerts(client, count: int) -> None:
+    response = await client.post(
+        "/api/upload", data={"case_id": CASE}, files={"file": ("dump.raw", b"\x00" * 64)}
+    )
+    assert response.status_code in (200, 201), response.text
+    file_id = response.json()["id"]
+    async with AsyncSessionLocal() as session:
+        session.add_all(
+            Alert(
+                file_id=file_id, process_name="evil.exe", pid=pid,
+                anomaly_score=0.9, label="malicious", message="test",
+            )
+            for pid in range(count)
+        )
+        await session.commit()
+
+
+async def test_alerts_are_paged_by_default(client):
+    total = DEFAULT_PAGE_SIZE + 5
+    await _create_alerts(client, total)
+
+    first = await client.get("/api/alerts/list", params={"case_id": CASE})
+    assert len(first.json()) == DEFAULT_PAGE_SIZE
+    assert first.json()[0]["pid"] == total - 1
+    cursor = first.headers["x-next-cursor"]
+
+    rest = await client.get("/api/alerts/list", params={"case_id": CASE, "cursor": cursor})
+    assert [a["pid"] for a in rest.json()] == list(range(4, -1, -1))
+    assert "x-next-cursor" not in rest.headers
+
+
+async def test_next_cursor_is_exposed_to_browsers(client):
+    response = await client.get("/api/files", params={"limit": 1}, headers={"Origin": "http://ui.example"})
+    assert "x-next-cursor" in response.headers["access-control-expose-headers"].lower()
@@ -0,0 +1,165 @@
+"""Startup migrations: databases from the create_all() era, fresh files, racing workers."""
+
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import Base, alembic_config, create_engine, import_models, run_migrations
+from app.utils.chain_of_custody import verify_chain
+
+pytestmark = pytest.mark.anyio
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What create_all() made before the schema moved to Alembic.
+BASELINE_DDL = """
+CREATE TABLE memory_files (
+    id INTEGER NOT NULL,
+    case_id VARCHAR NOT NULL,
+    filename VARCHAR NOT NULL,
+    stored_path VARCHAR NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    sha256 VARCHAR NOT NULL,
+    created_at DATETIME NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE INDEX ix_memory_files_id ON memory_files (id);
+CREATE INDEX ix_memory_files_case_id ON memory_files (case_id);
+CREATE INDEX ix_memory_files_sha256 ON memory_files (sha256);
+CREATE TABLE chain_of_custody_logs (
+    id INTEGER NOT NULL,
+    file_id INTEGER,
+    event_type VARCHAR NOT NULL,
+    description VARCHAR NOT NULL,
+    created_at DATETIME NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(file_id) REFERENCES memory_files (id)
+);
+CREATE INDEX ix_chain_of_custody_logs_file_id ON chain_of_custody_logs (file_id);
+CREATE INDEX ix_chain_of_custody_logs_id ON chain_of_custody_logs (id);
+CREATE TABLE alerts (
+    id INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    process_name VARCHAR NOT NULL,
+    pid INTEGER NOT NULL,
+    anomaly_score FLOAT NOT NULL,
+    ml_confidence FLOAT,
+    label VARCHAR NOT NULL,
+    message VARCHAR NOT NULL,
+    created_at DATETIME NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(file_id) REFERENCES memory_files (id)
+);
+CREATE INDEX ix_alerts_file_id ON alerts (file_id);
+CREATE INDEX ix_alerts_id ON alerts (id);
+CREATE TABLE analysis_results (
+    id INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    status VARCHAR NOT NULL,
+    summary VARCHAR,
+    volatility_output JSON,
+    ml_output JSON,
+    dl_output JSON,
+    max_anomaly_score FLOAT,
+    created_at DATETIME NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(file_id) REFERENCES memory_files (id)
+);
+CREATE INDEX ix_analysis_results_id ON analysis_results (id);
+CREATE INDEX ix_analysis_results_file_id ON analysis_results (file_id);
+"""
+
+
+def _head() -> str:
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def _schema_diff(connection):
+    import_models()
+    context = MigrationContext.configure(connection, opts={"compare_type": True})
+    return compare_metadata(context, Base.metadata)
+
+
+def _version(path: str):
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT version_num FROM alembic_version").fetchall()
+
+
+async def _migrate(path: str):
+    engine = create_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(run_migrations)
+    async with engine.connect() as conn:
+        diff = await conn.run_sync(_schema_diff)
+    return engine, diff
+
+
+async def test_fresh_database_matches_models(tmp_path):
+    path = str(tmp_path / "fresh.db")
+    engine, diff = await _migrate(path)
+    await engine.dispose()
+    assert diff == []
+    assert _version(path) == [(_head(),)]
+
+
+async def test_baseline_database_is_upgraded(tmp_path):
+    path = str(tmp_path / "baseline.db")
+    created = datetime(2025, 3, 1, 12, 0, 0, 123456)
+    with sqlite3.connect(path) as db:
+        db.executescript(BASELINE_DDL)
+        db.execute(
+            "INSERT INTO memory_files VALUES (1, 'case-1', 'mem.raw', 'uploads/mem.raw', 4096, ?, ?)",
+            ("ab" * 32, created.isoformat(sep=" ")),
+        )
+        db.executemany(
+            "INSERT INTO chain_of_custody_logs (file_id, event_type, description, created_at) VALUES (?, ?, ?, ?)",
+            [
+                (1, "UPLOAD", "Uploaded mem.raw", created.isoformat(sep=" ")),
+                (None, "SYSTEM", "Service started", created.isoformat(sep=" ")),
+                (1, "ANALYSIS_STARTED", "Analysis ünïcode", created.isoformat(sep=" ")),
+            ],
+        )
+        db.execute(
+            "INSERT INTO analysis_results (file_id, status, ml_output, created_at) VALUES (1, 'completed', '{}', ?)",
+            (created.isoformat(sep=" "),),
+        )
+
+    engine, diff = await _migrate(path)
+    try:
+        assert diff == []
+        async with AsyncSession(engine) as session:
+            report = await verify_chain(session, 1, full=True)
+        assert report["verified"], report
+        assert report["entries_checked"] == 2
+    finally:
+        await engine.dispose()
+
+    assert _version(path) == [(_head(),)]
+    with sqlite3.connect(path) as db:
+        assert db.execute("SELECT size_bytes, sha256 FROM memory_files").fetchall() == [(4096, "ab" * 32)]
+        assert db.execute("SELECT seq FROM chain_of_custody_logs WHERE file_id IS NULL").fetchall() == [(1,)]
+
+
+def test_workers_starting_together_migrate_once(tmp_path):
+    path = str(tmp_path / "racing.db")
+    env = dict(os.environ, DATABASE_URL=f"sqlite+aiosqlite:///{path}")
+    script = "import asyncio\nfrom app.db.session import init_db\nasyncio.run(init_db())\n"
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-c", script], cwd=BACKEND_DIR, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        )
+        for _ in range(4)
+    ]
+    errors = [worker.communicate(timeout=120)[1] for worker in workers]
+
+    assert [worker.returncode for worker in workers] == [0] * len(workers), errors
+    assert _version(path) == [(_head(),)]
@@ -0,0 +1,30 @@
+import re
+
+from reportlab import rl_config
+
+from app.reports.pdf import build_pdf_report
+from app.reports.sources import ReportSection
+
+
+def test_report_longer_than_a_page_keeps_every_section(monkeypatch):
+    # Uncompressed page streams, so the text can be searched for.
+    monkeypatch.setattr(rl_config, "pageCompression", 0)
+    # 40 tables of REPORT_TABLE_CHUNK_ROWS rows: far more flowables than
+    # LazyStory buffers, so the story must be refilled while it is built.
+    rows = ((pid, f"proc{pid}.exe", 0.5) for pid in range(10_000))
+    section = ReportSection("Processes", ["PID", "Name", "Score"], rows, total=10_000)
+
+    pdf = build_pdf_report(
+        {"filename": "mem.raw", "sha256": "ab" * 32},
+        volatility_output=None,
+        ml_output={"max_anomaly_score": 0.5},
+        dl_output={"dl_score": 0.1},
+        alerts=[],
+        analyst_name="Report Tester",
+        sections=[section],
+    )
+
+    pages = len(re.findall(rb"/Type /Page\b(?!s)", pdf))
+    assert pages > 1
+    assert b"proc9999.exe" in pdf
+    assert b"Name: Report Tester" in pdf
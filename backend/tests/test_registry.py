@@ -0,0 +1,12 @@
+from app.ml import registry
+
+
+def test_versions_compare_numerically(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "MODEL_DIR", tmp_path)
+    for version in ("v9", "v10", "v2", "v10.1", "simple-rf-1"):
+        (tmp_path / registry.MODEL_NAME / version).mkdir(parents=True)
+        (tmp_path / registry.MODEL_NAME / version / "model.joblib").write_bytes(b"")
+    monkeypatch.setattr(registry, "PINNED_VERSION", None)
+
+    assert registry.list_versions() == ["simple-rf-1", "v2", "v9", "v10", "v10.1"]
+    assert registry.current_model_version() == "v10.1"
@@ -0,0 +1,31 @@
+import os
+import time
+
+from app.reports import cache
+from app.reports.cache import normalize_analyst_name, report_cache_key, sweep_cache
+
+
+def _cached(path, size: int, age: float):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\x00" * size)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def test_sweep_evicts_least_recently_used_reports_and_graphs(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "REPORT_CACHE_DIR", tmp_path)
+    oldest_graph = _cached(tmp_path / "graphs" / "1-network-v1.png", 400, age=3000)
+    old_report = _cached(tmp_path / "ab" / "ab12.pdf", 400, age=2000)
+    recent_report = _cached(tmp_path / "cd" / "cd34.pdf", 400, age=1000)
+    in_use = _cached(tmp_path / "ef" / "ef56.pdf", 400, age=0)
+
+    assert sweep_cache(max_bytes=900) == 800
+
+    assert not oldest_graph.exists() and not old_report.exists()
+    assert recent_report.exists() and in_use.exists()
+
+
+def test_analyst_name_variants_share_a_report():
+    assert normalize_analyst_name("  Jane   Doe ") == "Jane Doe"
+    assert report_cache_key(1, "0:None", " Jane\tDoe") == report_cache_key(1, "0:None", "Jane Doe")
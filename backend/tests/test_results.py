@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal
+from app.jobs.results import reuse_cached_analysis, store_results
+from app.models.alert import Alert
+from app.models.analysis import AnalysisResult
+
+pytestmark = pytest.mark.anyio
+
+
+def _process(pid: int, score: float) -> dict:
+    features = {
+        "pid": pid, "ppid": 4, "name": f"p{pid}.exe", "threads": 3, "dll_count": 2,
+        "suspicious_flag": 0, "entropy": 0.5, "net_conn_count": 1,
+    }
+    return {
+        "pid": pid, "ppid": 4, "name": f"p{pid}.exe", "anomaly_score": score,
+        "confidence": 0.1, "label": "benign", "features": features,
+    }
+
+
+OUTPUTS = {
+    "volatility_output": {
+        "pslist": [{"pid": 10}, {"pid": 11}],
+        "netscan": [{"pid": 10, "remote_ip": "10.0.0.1", "remote_port": 443}],
+        "dlllist": [],
+        "plugin_status": {"pslist": {"status": "ok"}},
+        "entropy": {"per_pid": {10: {"entropy": 0.5}}, "regions": [{"pid": 10}], "image": {"blocks": 2}},
+    },
+    "ml_output": {"processes": [_process(10, 0.2), _process(11, 0.9)], "max_anomaly_score": 0.9},
+    "dl_output": {"dl_score": 0.0, "details": []},
+}
+
+
+async def _upload(client, content: bytes) -> int:
+    response = await client.post("/api/upload", data={"case_id": "results"}, files={"file": ("m.raw", content)})
+    assert response.status_code in (200, 201), response.text
+    return response.json()["id"]
+
+
+async def test_processes_are_served_from_the_table_not_the_json(client):
+    file_id = await _upload(client, b"\x01" * 64)
+    async with AsyncSessionLocal() as session:
+        analysis = AnalysisResult(file_id=file_id, status="running")
+        session.add(analysis)
+        await session.commit()
+        analysis_id = analysis.id
+
+    await store_results(analysis_id, file_id, OUTPUTS)
+
+    async with AsyncSessionLocal() as session:
+        stored = await session.get(AnalysisResult, analysis_id)
+        assert "processes" not in stored.ml_output
+        assert stored.ml_output["process_count"] == 2
+        assert stored.volatility_output["counts"] == {"pslist": 2, "netscan": 1, "dlllist": 0}
+        assert stored.volatility_output["entropy"] == {"image": {"blocks": 2}, "regions": 1}
+        assert not any(isinstance(v, list) for v in stored.volatility_output.values())
+
+    response = await client.get(f"/api/results/{file_id}")
+    assert response.status_code == 200, response.text
+    processes = response.json()["processes"]
+    assert [(p["pid"], p["anomaly_score"]) for p in processes] == [(10, 0.2), (11, 0.9)]
+    assert processes[0]["features"]["net_conn_count"] == 1
+
+    partial = await client.get(f"/api/results/{file_id}", params={"fields": "id,status"})
+    assert partial.json() == {"id": analysis_id, "status": "completed"}
+
+    # A reused result gets the rows and the alerts of the original.
+    other_id = await _upload(client, b"\x02" * 64)
+    async with AsyncSessionLocal() as session:
+        cached = await session.get(AnalysisResult, analysis_id)
+        await reuse_cached_analysis(session, cached, other_id)
+
+    response = await client.get(f"/api/results/{other_id}")
+    assert [p["pid"] for p in response.json()["processes"]] == [10, 11]
+    async with AsyncSessionLocal() as session:
+        alerts = await session.scalars(select(Alert.pid).where(Alert.file_id == other_id))
+        assert list(alerts) == [11]
+
+
+async def test_fixture_results_are_not_cached(client):
+    file_id = await _upload(client, b"\x03" * 64)
+    async with AsyncSessionLocal() as session:
+        analysis = AnalysisResult(file_id=file_id, status="running", cache_key="k" * 64)
+        session.add(analysis)
+        await session.commit()
+        analysis_id = analysis.id
+
+    outputs = dict(OUTPUTS, volatility_output=dict(OUTPUTS["volatility_output"], source="fixture"))
+    await store_results(analysis_id, file_id, outputs)
+
+    async with AsyncSessionLocal() as session:
+        assert (await session.get(AnalysisResult, analysis_id)).cache_key is None
@@ -0,0 +1,58 @@
+from app.dl.matcher import KeywordMatcher
+from app.dl.text_model import StringAnalyzer, analyze_strings
+
+
+def test_hits_are_attributed_to_their_string():
+    result = analyze_strings(["cmd.exe /c whoami", "powershell -enc AAAA", "notepad.exe"])
+    assert [d["text"] for d in result["details"]] == ["powershell -enc AAAA"]
+    assert result["strings_scanned"] == 3
+    assert result["strings_matched"] == 1
+
+
+def test_case_folding_that_changes_length_keeps_attribution():
+    # "İ".lower() is two code points, so offsets in the lowered batch shift.
+    result = analyze_strings(["İİİİİİİİİİ powershell", "benign"])
+    assert result["details"] == [
+        {"text": "İİİİİİİİİİ powershell", "score": 0.25, "keywords": ["powershell"]}
+    ]
+
+    result = analyze_strings(["İ" * 40, "x", "MIMIKATZ payload"])
+    assert [d["text"] for d in result["details"]] == ["MIMIKATZ payload"]
+    assert result["details"][0]["keywords"] == ["mimikatz", "payload"]
+
+
+def test_matches_do_not_span_strings():
+    result = analyze_strings(["power", "shell"])
+    assert result["strings_matched"] == 0
+
+
+def test_feed_records_source_offsets_and_encodings():
+    analyzer = StringAnalyzer(KeywordMatcher(["invoke"]))
+    analyzer.feed(["Invoke-Expression", "ok"], source="image", offsets=[4096, 8192], encodings=["utf-16le", "ascii"])
+    (detail,) = analyzer.result()["details"]
+    assert detail["offset"] == 4096
+    assert detail["encoding"] == "utf-16le"
+    assert detail["source"] == "image"
+
+
+def test_pure_python_automaton_matches_overlapping_keywords():
+    matcher = KeywordMatcher(["he", "she", "hers"])
+    matcher._automaton = None
+    matcher._build()
+    assert sorted(matcher.iter_matches("ushers")) == [(3, "he"), (3, "she"), (5, "hers")]
+
+
+def test_image_strings_are_scored_apart_from_cmdlines(tmp_path):
+    from app.jobs.pipeline import score_strings
+
+    path = tmp_path / "image.raw"
+    benign = b"".join(b"ordinary string %06d\x00" % i for i in range(20_000))
+    path.write_bytes(benign + b"mimikatz payload\x00")
+
+    dl_output = score_strings(str(path), {"cmdline": [{"cmdline": "notepad.exe"}]})
+
+    image = dl_output["image_strings"]
+    assert image["strings_scanned"] > 20_000
+    assert image["dl_score"] == 0.5
+    assert dl_output["cmdline_score"] == 0.0
+    assert dl_output["dl_score"] == 0.5
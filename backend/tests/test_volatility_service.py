@@ -0,0 +1,37 @@
+import time
+
+from app.volatility import service
+
+
+def _sleepy(path):
+    time.sleep(0.4)
+    return [{"pid": 4}]
+
+
+def test_timeout_counts_from_plugin_start(monkeypatch):
+    monkeypatch.setitem(service._PLUGINS, "slow_a", _sleepy)
+    monkeypatch.setitem(service._PLUGINS, "slow_b", _sleepy)
+    events = []
+
+    output = service.run_volatility_plugins(
+        "dump.raw",
+        plugins=("slow_a", "slow_b"),
+        timeout=0.7,
+        max_workers=1,
+        on_progress=lambda event, **data: events.append((event, data["plugin"])),
+    )
+
+    # slow_b waits 0.4s for the only worker, then runs 0.4s: 0.8s after submission.
+    assert {name: s["status"] for name, s in output["plugin_status"].items()} == {"slow_a": "ok", "slow_b": "ok"}
+    assert output["slow_b"] == [{"pid": 4}]
+    for name in ("slow_a", "slow_b"):
+        assert events.index(("plugin_started", name)) < events.index(("plugin_finished", name))
+
+
+def test_overdue_plugin_is_reported_as_timeout(monkeypatch):
+    monkeypatch.setitem(service._PLUGINS, "slow_a", _sleepy)
+
+    output = service.run_volatility_plugins("dump.raw", plugins=("slow_a", "pslist"), timeout=0.1)
+
+    assert output["plugin_status"]["slow_a"]["status"] == "timeout"
+    assert output["partial"] is True